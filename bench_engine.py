@@ -0,0 +1,111 @@
+# 文件名: bench_engine.py
+# 模拟引擎性能测试
+# 运行: python bench_engine.py [--board 40] [--steps 20000] [--batch 4096]
+"""
+测量 SnakeEngine.step 在不同蛇长下的单步耗时。
+
+蛇沿一条哈密顿回路移动（食物放在棋盘外，蛇长保持不变），
+因此从 3 节到几乎占满棋盘都不会死亡；单步耗时应与蛇长无关。
+
+指定 --batch 时，另外比较随机动作下逐个调用 SnakeEngine.step
+与 SnakeBatchEnv 批量推进的吞吐量（步/秒）。
+"""
+
+import argparse, random, time
+from collections import deque
+
+import numpy as np
+
+from snake_engine import SnakeEngine
+from snake_batch import SnakeBatchEnv
+from snake_ai import serpentine_cycle
+
+
+# 方向名称 -> (动作编号, 行偏移, 列偏移)
+ACTIONS = {(-1, 0): 0, (0, -1): 1, (0, 1): 2, (1, 0): 3}
+DIRECTION_NAMES = {(-1, 0): "UP", (0, -1): "LEFT", (0, 1): "RIGHT", (1, 0): "DOWN"}
+
+
+# 把引擎状态设置为沿回路排列、长度为 length 的蛇
+def place_snake(engine, cycle, length):
+    """蛇头位于 cycle[length - 1]，蛇尾位于 cycle[0]，食物放在棋盘外"""
+    body = deque(reversed(cycle[:length]))
+    engine.snake = body
+    engine.snake_set = set(body)
+    engine._rebuild_occupancy()
+    engine._update_available_positions()
+    head, neck = body[0], body[1]
+    engine.direction = DIRECTION_NAMES[(head[0] - neck[0], head[1] - neck[1])]
+    engine.food = (-1, -1)
+
+
+# 测量给定蛇长下的平均单步耗时
+def bench_length(board_size, length, steps):
+    """返回沿回路移动 steps 步的平均单步耗时（微秒）"""
+    engine = SnakeEngine(seed=0, board_size=board_size)
+    cycle = serpentine_cycle(board_size)
+    place_snake(engine, cycle, length)
+
+    # 预先计算回路上每个格子的下一步动作
+    next_action = {}
+    for i, (r, c) in enumerate(cycle):
+        nr, nc = cycle[(i + 1) % len(cycle)]
+        next_action[(r, c)] = ACTIONS[(nr - r, nc - c)]
+
+    start = time.perf_counter()
+    for _ in range(steps):
+        done, _ = engine.step(next_action[engine.snake[0]])
+        if done:
+            raise RuntimeError(f"蛇长 {length} 时意外死亡: {engine.death_reason}")
+    elapsed = time.perf_counter() - start
+    return elapsed / steps * 1e6
+
+
+# 测量随机动作下单个引擎与批量环境的吞吐量
+def bench_batch(board_size, num_envs, steps):
+    """返回 (单引擎步/秒, 批量环境步/秒)，两者都在结束时自动重置"""
+    engine = SnakeEngine(seed=0, board_size=board_size)
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for _ in range(steps):
+        done, _ = engine.step(rng.randrange(-1, 4))
+        if done:
+            engine.reset()
+    single = steps / (time.perf_counter() - start)
+
+    env = SnakeBatchEnv(num_envs, board_size=board_size, seed=0)
+    np_rng = np.random.default_rng(0)
+    batch_steps = max(1, steps // num_envs)
+    actions = np_rng.integers(-1, 4, size=(batch_steps, num_envs))
+    start = time.perf_counter()
+    for t in range(batch_steps):
+        env.step(actions[t])
+    batched = batch_steps * num_envs / (time.perf_counter() - start)
+    return single, batched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SnakeEngine 单步耗时测试")
+    parser.add_argument("--board", type=int, default=40, help="棋盘边长（需为偶数）")
+    parser.add_argument("--steps", type=int, default=20000, help="每种蛇长测量的步数")
+    parser.add_argument("--batch", type=int, default=0, help="批量环境的棋盘数量（0 表示不测试）")
+    args = parser.parse_args()
+
+    if args.board % 2:
+        parser.error("哈密顿回路需要偶数边长的棋盘")
+
+    full = args.board * args.board - 1
+    lengths = sorted({3, 10, 100, full // 4, full // 2, full})
+    print(f"棋盘 {args.board}x{args.board}，每种蛇长 {args.steps} 步")
+    for length in lengths:
+        us = bench_length(args.board, length, args.steps)
+        print(f"蛇长 {length:>5}: {us:7.2f} 微秒/步")
+
+    if args.batch:
+        single, batched = bench_batch(args.board, args.batch, args.steps * 10)
+        print(f"随机动作吞吐量: 单引擎 {single:,.0f} 步/秒，"
+              f"批量环境（{args.batch} 个棋盘）{batched:,.0f} 步/秒，约 {batched / single:.0f} 倍")
+
+
+if __name__ == "__main__":
+    main()
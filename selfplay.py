@@ -0,0 +1,185 @@
+# 文件名: selfplay.py
+# 无界面 AI 批量自我对局
+# 运行: python selfplay.py --mode classic --games 1000 [--ai hamiltonian] [--workers 8] [--out results.npz]
+"""
+用多进程并行运行大量无界面对局（AI 由 get_ai_action 控制），统计
+得分、蛇长、死亡原因和存活步数的分布，并保存为压缩的 .npz 结果文件。
+
+    classic: 普通模式，直到死亡、吃满棋盘或达到 --max-steps
+    versus:  对抗模式，两条蛇都由 AI 控制，玩家蛇死亡或达到胜利分数即结束
+    timed:   限时模式，TIMED_MODE_SECONDS / DEFAULT_SNAKE_SPEED（60 秒 / 0.10 秒更新间隔 = 600 步）
+
+--ai 选择 AI 策略：search 为 get_ai_action 的搜索策略，
+hamiltonian 为哈密顿回路规划（普通模式和限时模式下每步耗时固定），
+anytime 为按 AI_DIFFICULTY_BUDGETS 中等难度预算逐级细化的限时决策，
+rollout 在对抗模式中用蒙特卡洛模拟控制对抗蛇（玩家蛇仍使用 search），
+自我对局中每个候选动作固定模拟 SELFPLAY_ROLLOUTS 次，不使用时间预算。
+
+对局 i 使用种子 --seed + i，每个任务处理一段连续的种子区间。
+search、hamiltonian 和 rollout 的结果与进程数、机器速度无关，可直接复现任意一局；
+anytime 按实际耗时决定细化到哪一级，结果随机器负载变化，不能逐局复现，只适合比较统计分布。
+"""
+
+# 导入必要的模块
+import argparse, os, time
+from collections import Counter
+from functools import partial
+from multiprocessing import Pool
+
+import numpy as np
+
+from snake_engine import SnakeEngine, DEFAULT_SNAKE_SPEED, TIMED_MODE_SECONDS
+from snake_ai import get_ai_action, get_anytime_ai_action, get_hamiltonian_ai_action
+from snake_rollout import ROLLOUT_BATCH, get_rollout_ai_action
+
+SELFPLAY_ROLLOUTS = 2 * ROLLOUT_BATCH  # rollout 策略每个候选动作的模拟次数（代替时间预算，结果可复现）
+MODES = ("classic", "versus", "timed")
+AI_POLICIES = {"search": get_ai_action, "hamiltonian": get_hamiltonian_ai_action,
+               "anytime": get_anytime_ai_action,
+               "rollout": partial(get_rollout_ai_action, rollouts=SELFPLAY_ROLLOUTS)}
+TIMED_TICKS = round(TIMED_MODE_SECONDS / DEFAULT_SNAKE_SPEED)  # 限时模式步数（与 main_timed 的时长、默认更新间隔一致）
+VERSUS_WIN_SCORE = 1000      # 对抗模式胜利分数（与 main_opponent 一致）
+REASON_MAX_STEPS = "达到步数上限"
+REASON_TIME_UP = "时间到"
+REASON_WIN = "达到胜利分数"
+REASON_FULL = "吃满棋盘"
+
+
+# 运行一局无界面对局
+def play_game(mode, seed, board_size, max_steps, ai="search"):
+    """
+    运行一局对局
+
+    参数:
+        mode: "classic"、"versus" 或 "timed"
+        seed: 随机种子
+        board_size: 棋盘边长（格子数）
+        max_steps: 普通模式和对抗模式的最大步数
+        ai: AI_POLICIES 中的策略名称
+
+    返回:
+        tuple: (score, length, death_reason, steps)
+    """
+    policy = AI_POLICIES[ai]
+    engine = SnakeEngine(seed=seed, board_size=board_size)
+    if mode == "versus":
+        engine.reset_opponent_mode()
+    limit = TIMED_TICKS if mode == "timed" else max_steps
+
+    steps = 0
+    death_reason = REASON_TIME_UP if mode == "timed" else REASON_MAX_STEPS
+    while steps < limit:
+        if mode == "versus":
+            done, info = engine.step_opponent_mode(policy(engine))
+            # 与 main_opponent 相同：对抗蛇随后移动，死亡后立即重新部署
+            if not engine.opponent_dead:
+                done_opponent, _ = engine.opponent_step(policy(engine, is_opponent=True))
+                if done_opponent:
+                    engine.respawn_opponent()
+        else:
+            done, info = engine.step(policy(engine))
+        steps += 1
+
+        if done:
+            death_reason = info["death_reason"]
+            break
+        if mode == "versus" and engine.score >= VERSUS_WIN_SCORE:
+            death_reason = REASON_WIN
+            break
+        if len(engine.snake) == board_size * board_size:
+            death_reason = REASON_FULL
+            break
+
+    return engine.score, len(engine.snake), death_reason, steps
+
+
+# 工作进程：运行一段连续种子区间内的所有对局
+def play_seed_range(task):
+    """
+    参数:
+        task: (mode, ai, board_size, max_steps, first_seed, stop_seed)
+
+    返回:
+        list: 每局的 (seed, score, length, death_reason, steps)
+    """
+    mode, ai, board_size, max_steps, first_seed, stop_seed = task
+    return [(seed,) + play_game(mode, seed, board_size, max_steps, ai)
+            for seed in range(first_seed, stop_seed)]
+
+
+# 把种子区间切分为任务
+def split_seeds(first_seed, games, workers):
+    """每个进程约分到 4 个任务，兼顾负载均衡和进程间通信开销"""
+    chunk = max(1, -(-games // (workers * 4)))
+    return [(start, min(start + chunk, first_seed + games))
+            for start in range(first_seed, first_seed + games, chunk)]
+
+
+# 打印分布摘要
+def print_summary(name, values):
+    """打印均值、标准差和分位数"""
+    p10, p50, p90 = np.percentile(values, [10, 50, 90])
+    print(f"{name:<6} 均值 {values.mean():8.1f}  标准差 {values.std():8.1f}  "
+          f"P10 {p10:7.0f}  中位数 {p50:7.0f}  P90 {p90:7.0f}  最大 {values.max():7d}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="无界面 AI 批量自我对局")
+    parser.add_argument("--mode", choices=MODES, default="classic", help="游戏模式")
+    parser.add_argument("--ai", choices=sorted(AI_POLICIES), default="search", help="AI 策略")
+    parser.add_argument("--games", type=int, default=1000, help="对局数量")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="进程数")
+    parser.add_argument("--board", type=int, default=40, help="棋盘边长")
+    parser.add_argument("--seed", type=int, default=0, help="第一局的随机种子")
+    parser.add_argument("--max-steps", type=int, default=5000, help="普通/对抗模式每局最大步数")
+    parser.add_argument("--out", default="selfplay_results.npz", help="结果文件路径（.npz）")
+    args = parser.parse_args()
+    if args.games < 1:
+        parser.error("--games 必须 >= 1")
+    if args.workers < 1:
+        parser.error("--workers 必须 >= 1")
+
+    tasks = [(args.mode, args.ai, args.board, args.max_steps, start, stop)
+             for start, stop in split_seeds(args.seed, args.games, args.workers)]
+
+    start_time = time.perf_counter()
+    if args.workers == 1:
+        chunks = [play_seed_range(task) for task in tasks]
+    else:
+        with Pool(args.workers) as pool:
+            chunks = pool.map(play_seed_range, tasks)
+    elapsed = time.perf_counter() - start_time
+
+    rows = [row for chunk in chunks for row in chunk]
+    seeds, scores, lengths, reasons, steps = zip(*rows)
+    reason_names = sorted(set(reasons))
+    reason_codes = {name: code for code, name in enumerate(reason_names)}
+
+    scores = np.array(scores, dtype=np.int32)
+    lengths = np.array(lengths, dtype=np.int32)
+    steps = np.array(steps, dtype=np.int32)
+    np.savez_compressed(
+        args.out,
+        mode=args.mode,
+        ai=args.ai,
+        board_size=args.board,
+        seed=np.array(seeds, dtype=np.int64),
+        score=scores,
+        length=lengths,
+        steps=steps,
+        death_reason=np.array([reason_codes[r] for r in reasons], dtype=np.int16),
+        death_reason_names=np.array(reason_names),
+    )
+
+    print(f"{args.mode} 模式（{args.ai}）{len(rows)} 局，{args.workers} 个进程，用时 {elapsed:.1f} 秒"
+          f"（{int(steps.sum()) / elapsed:,.0f} 步/秒）")
+    print_summary("得分", scores)
+    print_summary("蛇长", lengths)
+    print_summary("步数", steps)
+    for name, count in Counter(reasons).most_common():
+        print(f"{name}: {count} 局 ({count / len(rows):.1%})")
+    print(f"结果已保存到 {args.out}")
+
+
+if __name__ == "__main__":
+    main()
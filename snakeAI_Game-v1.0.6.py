@@ -7,15 +7,424 @@
 """
 
 # 导入必要的模块
-import sys, random, heapq, time, pygame
+import argparse, sys, random, time, pygame
 from pygame import mixer
 import numpy as np
-from collections import deque, defaultdict
+from collections import deque
+from functools import lru_cache
+from itertools import islice
+from snake_engine import SnakeEngine, DIRECTION_INDEX, DEFAULT_SNAKE_SPEED, TIMED_MODE_SECONDS
+from snake_ai import AIWorker
+from snake_rollout import get_rollout_ai_action
+from snake_replay import (ReplayRecorder, ReplayPlayer, decode_replay, RESET_NORMAL, RESET_OPPONENT, RESET_THREE_SNAKE,
+                          EVENT_STEP, EVENT_STEP_OPPONENT_MODE, EVENT_OPPONENT_STEP, EVENT_RESPAWN,
+                          EVENT_STEP_THREE_SNAKE)
+# ---------------------------
+# 绘制缓存
+# ---------------------------
+
+# 预渲染垂直渐变背景
+@lru_cache(maxsize=32)
+def gradient_surface(width, height, start, delta, floor=(0, 0, 0)):
+    """
+    生成垂直渐变背景，每种尺寸和配色只生成一次，之后每帧只需一次 blit（代替逐行 pygame.draw.line）
+
+    第 y 行各通道的颜色为 max(floor, int(start + delta * y / height))，与逐行绘制的结果完全相同
+
+    参数:
+        width, height: 背景尺寸（像素）
+        start: 顶部颜色 (r, g, b)
+        delta: 从顶部到底部各通道的变化量
+        floor: 各通道的下限
+
+    返回:
+        pygame.Surface: 与屏幕像素格式相同的背景
+    """
+    rows = np.arange(height, dtype=np.float64)[:, None]
+    column = np.maximum((np.array(start) + np.array(delta) * rows / height).astype(np.int64), floor)
+    pixels = np.repeat(column[None].astype(np.uint8), width, axis=0)  # surfarray 的下标顺序为 (x, y)
+    return pygame.surfarray.make_surface(pixels).convert()
+
+
+# 文字渲染缓存
+@lru_cache(maxsize=512)
+def text_surface(font, text, antialias, color):
+    """
+    与 font.render(text, antialias, color) 相同，但按 (字体, 文字, 抗锯齿, 颜色) 缓存结果：
+    固定的标签只渲染一次，分数等变化的文字只在数值变化时重新渲染。
+    返回的 surface 被多处共享，调用方不能修改它（需要修改时先 copy）
+
+    参数:
+        font: pygame.font.Font
+        text: 文字
+        antialias: 是否抗锯齿
+        color: 文字颜色
+
+    返回:
+        pygame.Surface
+    """
+    return font.render(text, antialias, color)
+
+
+# 棋盘配色主题
+BOARD_THEMES = {
+    "default": {
+        "background": ((10, 15, 30), (-5, -8, 10), (0, 0, 20)),  # 窗口渐变背景（gradient_surface 的参数）
+        "playfield": (10, 15, 30),        # 游戏区域背景
+        "grid": (50, 50, 70, 100),        # 网格线
+        "diagonal": (40, 40, 60, 150),    # 两条主对角线上的格子
+        "outer_border": (150, 150, 180),  # 外边框
+        "inner_border": (200, 200, 255),  # 内边框
+    },
+}
+
+
+# 预渲染静态棋盘层
+@lru_cache(maxsize=8)
+def board_layer_surface(screen_size, board_size, cell_size, border_size, width, height, theme="default"):
+    """
+    把每帧都相同的棋盘部分（渐变背景、游戏区域、对角线格子、网格线、双线边框）绘制到一张缓存的 surface 上，
+    棋盘参数或主题不变时每帧只需一次 blit
+
+    参数:
+        screen_size: 窗口尺寸 (宽, 高)
+        board_size: 棋盘边长（格子数）
+        cell_size: 每个格子的像素大小
+        border_size: 棋盘左上角的边距
+        width, height: 棋盘的像素尺寸
+        theme: BOARD_THEMES 中的主题名
+
+    返回:
+        pygame.Surface
+    """
+    colors = BOARD_THEMES[theme]
+    surface = gradient_surface(*screen_size, *colors["background"]).copy()
+
+    # 游戏区域背景
+    pygame.draw.rect(surface, colors["playfield"], (border_size, border_size, width, height), border_radius=5)
+
+    # 两条主对角线（左上到右下、右上到左下）上的格子
+    for r in range(board_size):
+        for c in {r, board_size - 1 - r}:
+            pygame.draw.rect(surface, colors["diagonal"],
+                             (border_size + c * cell_size, border_size + r * cell_size, cell_size, cell_size))
+
+    # 网格线
+    for i in range(1, board_size):
+        x = border_size + i * cell_size
+        pygame.draw.line(surface, colors["grid"], (x, border_size), (x, border_size + height), 1)
+        y = border_size + i * cell_size
+        pygame.draw.line(surface, colors["grid"], (border_size, y), (border_size + width, y), 1)
+
+    # 双线边框
+    pygame.draw.rect(surface, colors["outer_border"],
+                     (border_size - 3, border_size - 3, width + 6, height + 6), 2)
+    pygame.draw.rect(surface, colors["inner_border"],
+                     (border_size - 1, border_size - 1, width + 2, height + 2), 1)
+    return surface
+
+
+# 精灵图的蛇头配色：(头部颜色, 光泽颜色)
+HEAD_COLORS = {
+    "opponent": ((180, 0, 0), (220, 80, 80)),
+    "ai1": ((0, 150, 255), (40, 190, 255)),
+    "ai2": ((150, 0, 255), (190, 40, 255)),
+}
+
+
+# 新建透明精灵图
+def _sprite_surface(width, height):
+    """返回带透明通道、与屏幕像素格式相同的空白 surface"""
+    return pygame.Surface((width, height), pygame.SRCALPHA).convert_alpha()
+
+
+# 食物当前的脉动相位
+def food_pulse():
+    """按实际时间计算食物的脉动相位（每秒一个周期，与逻辑步长和重绘次数无关），取值 0~30"""
+    return abs(30 - int(time.perf_counter() * 60) % 60)
+
+
+# 预渲染食物的一个脉动相位
+@lru_cache(maxsize=64)
+def food_sprite(cell_size, pulse):
+    """
+    绘制食物（阴影、径向渐变主体、高光、点缀）的精灵图，左上角对齐食物所在格子；
+    阴影向右下偏移 2 像素，因此精灵图比格子大 3 像素
+
+    参数:
+        cell_size: 每个格子的像素大小
+        pulse: 脉动相位 food_pulse()，取值 0~30
+
+    返回:
+        pygame.Surface
+    """
+    surface = _sprite_surface(cell_size + 3, cell_size + 3)
+    current_size = cell_size * 0.8 * (1.0 + 0.1 * pulse / 30)
+    offset = (cell_size - current_size) // 2
+    half = cell_size // 2
+
+    # 食物阴影（增加立体感）
+    pygame.draw.circle(surface, (150, 10, 10), (half + 2, half + 2), current_size // 2)
+
+    # 食物主体：从边缘到中心的径向渐变
+    radius = int(current_size // 2)
+    for i in range(radius, 0, -1):
+        intensity = 255 - (radius - i) * 255 // radius
+        pygame.draw.circle(surface, (255, intensity // 5, intensity // 5), (half, half), i)
+
+    # 食物高光（增加光泽感）
+    pygame.draw.circle(surface, (255, 255, 255), (half - offset, half - offset), max(1, current_size // 4))
+
+    # 食物细节点缀（装饰效果）
+    decor_size = max(1, current_size // 8)
+    for x in (cell_size // 4, cell_size * 3 // 4):
+        for y in (cell_size // 4, cell_size * 3 // 4):
+            pygame.draw.circle(surface, (255, 255, 255), (x, y), decor_size)
+    return surface
+
+
+# 预渲染吃到食物时的一帧光环
+@lru_cache(maxsize=32)
+def eat_effect_sprite(cell_size, timer):
+    """
+    绘制吃到食物时向外扩散的黄色光环，精灵图为两倍格子大小，以食物所在格子的中心为中心
+
+    参数:
+        cell_size: 每个格子的像素大小
+        timer: food_effect_timer 的当前值（3, 2, 1）
+
+    返回:
+        pygame.Surface
+    """
+    surface = _sprite_surface(cell_size * 2, cell_size * 2)
+    size_factor = 1.0 + (3 - timer) * 0.3
+    opacity = 255 - (3 - timer) * 85
+    for i in range(5):
+        current_size = int(cell_size * size_factor * (1 - i * 0.15))
+        pygame.draw.circle(surface, (255, 255, 50, int(opacity * (1 - i * 0.2))),
+                           (cell_size, cell_size), current_size // 2)
+    return surface
+
+
+# 预渲染朝某个方向的蛇头
+@lru_cache(maxsize=64)
+def head_sprite(cell_size, style, direction):
+    """
+    绘制蛇头（菱形、光泽、朝移动方向看的眼睛），左上角对齐蛇头所在格子
+
+    参数:
+        cell_size: 每个格子的像素大小
+        style: "player" 为玩家蛇，其余为 HEAD_COLORS 中的键
+        direction: "UP" / "DOWN" / "LEFT" / "RIGHT"
+
+    返回:
+        pygame.Surface
+    """
+    surface = _sprite_surface(cell_size + 1, cell_size + 1)
+    half = cell_size // 2
+    diamond = [(half, 0), (cell_size, half), (half, cell_size), (0, half)]
+
+    if style == "player":
+        pygame.draw.polygon(surface, (80, 120, 255), diamond)
+        pygame.draw.polygon(surface, (150, 180, 255), [
+            (cell_size // 3, cell_size // 4),
+            (half, cell_size // 3),
+            (2 * cell_size // 3, cell_size // 4),
+            (half, half)
+        ])
+
+        # 眼睛位于中心两侧，瞳孔向移动方向偏 2 像素
+        eye_size = max(3, cell_size // 6)
+        eye_offset = cell_size // 4
+        shift = 2 if eye_offset else 0
+        if direction == "UP":
+            eyes, pupil = [(-eye_offset, -eye_offset), (eye_offset, -eye_offset)], (0, -shift)
+        elif direction == "DOWN":
+            eyes, pupil = [(-eye_offset, eye_offset), (eye_offset, eye_offset)], (0, shift)
+        elif direction == "LEFT":
+            eyes, pupil = [(-eye_offset, -eye_offset), (-eye_offset, eye_offset)], (-shift, 0)
+        else:  # RIGHT
+            eyes, pupil = [(eye_offset, -eye_offset), (eye_offset, eye_offset)], (shift, 0)
+        for dx, dy in eyes:
+            pygame.draw.circle(surface, (255, 255, 255), (half + dx, half + dy), eye_size)
+            pygame.draw.circle(surface, (0, 0, 0), (half + dx + pupil[0], half + dy + pupil[1]),
+                               max(1, eye_size // 2))
+        return surface
+
+    head_color, highlight_color = HEAD_COLORS[style]
+    pygame.draw.polygon(surface, head_color, diamond)
+    pygame.draw.polygon(surface, highlight_color, [
+        (half, cell_size // 5),
+        (cell_size * 0.8, half),
+        (half, cell_size * 0.4),
+        (cell_size * 0.2, half)
+    ])
+
+    # 眼睛位于朝向一侧的两个角
+    eye_size = max(2, cell_size // 12)
+    near, far = cell_size // 4, cell_size - cell_size // 4
+    eyes = {"UP": [(near, near), (far, near)], "DOWN": [(near, far), (far, far)],
+            "LEFT": [(near, near), (near, far)], "RIGHT": [(far, near), (far, far)]}[direction]
+    for pos in eyes:
+        pygame.draw.circle(surface, (255, 255, 255), pos, eye_size)
+    for pos in eyes:
+        pygame.draw.circle(surface, (0, 0, 0), pos, eye_size // 2)
+    return surface
+
+
+# 预渲染一节蛇身
+@lru_cache(maxsize=4096)
+def body_sprite(cell_size, style, color, base_color=None):
+    """
+    绘制一节蛇身，左上角对齐所在格子
+
+    参数:
+        cell_size: 每个格子的像素大小
+        style: "player" 为玩家蛇（大圆角加高光），"plain" 为纯色圆角方块（对抗蛇、影子蛇的底色），
+               "shadow" 为影子蛇的渐变身体（base_color 底色上内缩 2 像素的圆角方块加高光）
+        color: 身体颜色 (r, g, b)
+        base_color: "shadow" 样式的底色
+
+    返回:
+        pygame.Surface
+    """
+    surface = _sprite_surface(cell_size, cell_size)
+    if style == "player":
+        pygame.draw.rect(surface, color, (0, 0, cell_size, cell_size), border_radius=max(4, cell_size // 3))
+        pygame.draw.rect(surface, tuple(min(255, v + 30) for v in color),
+                         (cell_size // 4, cell_size // 4, cell_size // 2, cell_size // 4), border_radius=2)
+    elif style == "shadow":
+        pygame.draw.rect(surface, base_color, (0, 0, cell_size, cell_size), border_radius=5)
+        pygame.draw.rect(surface, color, (2, 2, cell_size - 4, cell_size - 4), border_radius=5)
+        pygame.draw.rect(surface, tuple(min(255, v + 40) for v in color),
+                         (3, 3, cell_size - 8, cell_size // 3), border_radius=2)
+    else:  # plain
+        pygame.draw.rect(surface, color, (0, 0, cell_size, cell_size), border_radius=5)
+    return surface
+
+
+# 预渲染蛇尾尖端
+@lru_cache(maxsize=1024)
+def tail_sprite(cell_size, style, color, direction):
+    """
+    绘制蛇尾尖端的三角形，叠加在最后一节蛇身上
+
+    参数:
+        cell_size: 每个格子的像素大小
+        style: "player" 为玩家蛇（格子中央的小三角），"shadow" 为影子蛇（占满格子的三角）
+        color: 尾部颜色 (r, g, b)
+        direction: 尾尖朝向 "UP" / "DOWN" / "LEFT" / "RIGHT"（见 tail_direction）
+
+    返回:
+        pygame.Surface
+    """
+    surface = _sprite_surface(cell_size + 1, cell_size + 1)
+    half, third, quarter = cell_size // 2, cell_size // 3, cell_size // 4
+    if style == "player":
+        points = {
+            "DOWN": [(half - third, half - quarter), (half + third, half - quarter), (half, half + half)],
+            "UP": [(half - third, half + quarter), (half + third, half + quarter), (half, half - half)],
+            "RIGHT": [(half - quarter, half - third), (half - quarter, half + third), (half + half, half)],
+            "LEFT": [(half + quarter, half - third), (half + quarter, half + third), (half - half, half)],
+        }[direction]
+    else:  # shadow
+        points = {
+            "DOWN": [(half, 0), (0, cell_size), (cell_size, cell_size)],
+            "UP": [(half, cell_size), (0, 0), (cell_size, 0)],
+            "RIGHT": [(0, half), (cell_size, 0), (cell_size, cell_size)],
+            "LEFT": [(cell_size, half), (0, 0), (0, cell_size)],
+        }[direction]
+    pygame.draw.polygon(surface, color, points)
+    return surface
+
+
+# 蛇身纹理变化后各通道的范围 (下限, 上限) 和纹理幅度（cell_texture 的偏移除以的数）
+SNAKE_COLOR_LIMITS = {
+    "player": ((0, 50, 0), (0, 255, 0), 1),
+    "ai1": ((30, 0, 0), (200, 50, 255), 3),
+    "ai2": ((30, 0, 0), (200, 50, 200), 3),
+}
+
+
+# 预计算蛇身渐变色查找表
+@lru_cache(maxsize=8)
+def snake_color_ramp(style, length):
+    """
+    蛇身渐变色查找表，按 (样式, 身体节数) 缓存，蛇长变化时才重新生成
+
+    第 i 节的进度 t = i / length，用立方函数让颜色变化更自然：
+    玩家蛇为从亮绿到暗绿，AI1 蛇为蓝色渐变，AI2 蛇为紫色渐变
+
+    参数:
+        style: "player" / "ai1" / "ai2"
+        length: 身体节数（不含蛇头）
+
+    返回:
+        numpy.ndarray: 形状 (length, 3) 的 int16 数组，第 i 行为从蛇头数起第 i 节身体的基础颜色（只读）
+    """
+    t = np.arange(length) / max(length, 1)
+    ramp = np.zeros((length, 3), dtype=np.int16)
+    if style == "player":
+        ramp[:, 1] = (255 - 155 * t ** 3).astype(np.int16)
+    else:
+        progress_cubed = (1 - t) ** 3
+        if style == "ai1":
+            ramp[:, 0] = ramp[:, 1] = (50 + 50 * progress_cubed).astype(np.int16)
+            ramp[:, 2] = (150 + 105 * progress_cubed).astype(np.int16)
+        else:  # ai2
+            ramp[:, 0] = ramp[:, 2] = (100 + 100 * progress_cubed).astype(np.int16)
+            ramp[:, 1] = (20 + 30 * progress_cubed).astype(np.int16)
+    ramp.flags.writeable = False
+    return ramp
+
+
+# 每个格子固定的蛇身纹理
+@lru_cache(maxsize=4)
+def cell_texture(board_size):
+    """
+    每个格子固定的颜色偏移（-15~15），用固定种子生成：身体节不会移动，
+    因此同一节在它存在期间颜色保持不变，不会闪烁，也不消耗任何游戏随机数
+
+    返回:
+        numpy.ndarray: 长度 board_size * board_size 的 int16 数组，下标为 r * board_size + c（只读）
+    """
+    texture = np.random.default_rng(board_size).integers(-15, 16, board_size * board_size).astype(np.int16)
+    texture.flags.writeable = False
+    return texture
+
+
+# 蛇尾尖端的朝向
+def tail_direction(prev, tail):
+    """
+    参数:
+        prev: 倒数第二节的坐标 (行, 列)
+        tail: 尾节的坐标 (行, 列)
+
+    返回:
+        str: 尾尖朝向（背离倒数第二节的方向）
+    """
+    if prev[0] < tail[0]:
+        return "DOWN"
+    if prev[0] > tail[0]:
+        return "UP"
+    if prev[1] < tail[1]:
+        return "RIGHT"
+    return "LEFT"
+
+
 # ---------------------------
 # 游戏主类
 # ---------------------------
-class SnakeGame:
-    # 游戏主类
+class SnakeGame(SnakeEngine):
+    # 游戏主类：在 SnakeEngine 的棋盘状态和规则之上负责绘制、音效和输入
+
+    # 对局录像：replay_dir 不为 None 时，每次重置开始录制，对局结束时保存到该目录
+    replay_dir = None
+    replay = None   # 当前的 ReplayRecorder
+
+    # 脏矩形渲染：render 只重绘并提交变化的区域，适合低性能设备和远程桌面
+    dirty_rendering = False
+    _last_frame = None  # 上一次 render 的 (窗口尺寸, 精灵图集合, 面板状态)，None 表示需要完整重绘
     def __init__(self, seed=0, board_size=50, silent_mode=False):
         """
         初始化贪吃蛇游戏
@@ -25,18 +434,14 @@ class SnakeGame:
             board_size: 棋盘边长（格子数）
             silent_mode: True 时不初始化 pygame 显示（便于无界面测试）
         """
-        # 随机数设置
-        random.seed(seed)
-        
         # 游戏配置参数
-        self.board_size = board_size    # 棋盘边长（格子数）
         self.cell_size = 20            # 每个格子的像素大小
         self.border_size = 40          # 边框大小
+        self.board_theme = "default"   # 棋盘配色（BOARD_THEMES 的键）
         
         # 计算尺寸相关变量
-        self.width = self.board_size * self.cell_size  # 棋盘宽度
-        self.height = self.width                       # 棋盘高度（正方形）
-        self.grid_size = self.board_size ** 2          # 总格子数
+        self.width = board_size * self.cell_size  # 棋盘宽度
+        self.height = self.width                  # 棋盘高度（正方形）
         
         # 显示窗口尺寸
         self.display_width = 1080  # 固定窗口宽度
@@ -101,15 +506,6 @@ class SnakeGame:
             
         # 游戏速度设置
         self.speed = 30  # 默认游戏速度
-
-        self.snake = None
-        self.non_snake = None
-        self.direction = None
-        self.score = 0
-        self.food = None
-        self.seed_value = seed
-        random.seed(seed)  # 设置随机种子
-        np.random.seed(seed)
         
         # 背景音乐控制标志
         self.bgm_enabled = True  # 默认启用背景音乐
@@ -118,7 +514,8 @@ class SnakeGame:
         self.paused = False  # 游戏暂停状态
         self.pause_menu_buttons = []  # 暂停菜单按钮
 
-        self.reset()
+        # 初始化棋盘状态（创建实例随机数生成器并重置游戏）
+        super().__init__(seed=seed, board_size=board_size)
 
 
     # ---------------------------
@@ -212,7 +609,7 @@ class SnakeGame:
         pygame.draw.rect(self.screen, (70, 70, 100), (menu_x, menu_y, menu_width, menu_height), 2, border_radius=10)
         
         # 标题
-        title = self.large_font.render("游戏暂停", True, (255, 255, 255))
+        title = text_surface(self.large_font, "游戏暂停", True, (255, 255, 255))
         title_rect = title.get_rect(center=(menu_x + menu_width // 2, menu_y + menu_height // 2))
         self.screen.blit(title, title_rect)
         
@@ -243,730 +640,176 @@ class SnakeGame:
                 pass
     
 
+
     # ---------------------------
     # 重置游戏状态
     # ---------------------------
 
     # 重置游戏状态（普通模式）
-    def reset(self):
-        """重置游戏状态（普通模式）
-        
-        初始化玩家蛇、食物位置和游戏状态变量。
-        """
-        # 计算棋盘中心点
-        mid = self.board_size // 2
-        
-        # 初始化玩家蛇（3节，位于中心）
-        self.snake = [(mid + i, mid) for i in range(1, -2, -1)]
-        self.snake_set = set(self.snake)  # 用于快速碰撞检测
-        self.direction = "DOWN"          # 玩家蛇初始方向
-        
-        # 初始化游戏状态
-        self.score = 0
-        self.death_reason = None
-        self.game_start_time = time.time()  # 初始化游戏开始时间
+    def reset(self, seed=None):
+        """重置游戏状态（普通模式），并确保游戏处于非暂停状态"""
+        super().reset(self._begin_replay(RESET_NORMAL, seed))
         self.paused = False  # 确保游戏重置时为非暂停状态
-        
-        # 更新可用位置集合
-        self._update_available_positions()
-        
-        # 生成初始食物
-        self.food = self._generate_food()
-    
+
     # 重置游戏状态（影子模式）
-    def reset_three_snake_mode(self):
-        """重置影子模式游戏状态
-        
-        初始化玩家蛇、AI1蛇（影子）、AI2蛇（影子）、食物位置和游戏状态变量。
-        AI蛇完全模仿玩家的移动和蛇身长度，AI就是影子，AI死亡玩家也会死亡。
-        """
-        # 计算棋盘中心点
-        mid = self.board_size // 2
-        
-        # 初始化玩家蛇（3节，位于中心）
-        self.snake = [(mid + i, mid) for i in range(1, -2, -1)]
-        self.snake_set = set(self.snake)
-        self.direction = "DOWN"          # 玩家蛇初始方向
-        
-        # 初始化AI1蛇（3节，位于玩家左侧）
-        self.ai1_snake = [(mid + i, mid - 5) for i in range(1, -2, -1)]
-        self.ai1_snake_set = set(self.ai1_snake)
-        self.ai1_direction = "DOWN"       # AI1蛇初始方向（与玩家相同）
-        self.ai1_dead = False
-        
-        # 初始化AI2蛇（3节，位于玩家右侧）
-        self.ai2_snake = [(mid + i, mid + 5) for i in range(1, -2, -1)]
-        self.ai2_snake_set = set(self.ai2_snake)
-        self.ai2_direction = "DOWN"       # AI2蛇初始方向（与玩家相同）
-        self.ai2_dead = False
-        
-        # 初始化游戏状态
-        self.score = 0
-        self.ai1_score = 0
-        self.ai2_score = 0
-        self.death_reason = None
-        self.game_start_time = time.time()  # 初始化游戏开始时间
+    def reset_three_snake_mode(self, seed=None):
+        """重置影子模式游戏状态，并确保游戏处于非暂停状态"""
+        super().reset_three_snake_mode(self._begin_replay(RESET_THREE_SNAKE, seed))
         self.paused = False  # 确保游戏重置时为非暂停状态
-        
-        # 更新可用位置集合（排除三条蛇的位置）
-        all_snake_positions = set(self.snake + self.ai1_snake + self.ai2_snake)
-        self.non_snake = set((r, c) for r in range(self.board_size) for c in range(self.board_size) if (r, c) not in all_snake_positions)
-        
-        # 生成初始食物
-        self.food = self._generate_food()
 
     # 重置游戏状态（对抗模式）
-    def reset_opponent_mode(self):
-        """重置游戏状态（对抗模式）
-        
-        初始化玩家蛇、对抗蛇、食物位置和游戏状态变量。
-        """
-        # 计算棋盘中心点
-        mid = self.board_size // 2
-        
-        # 初始化玩家蛇（3节，位于中心）
-        self.snake = [(mid + i, mid) for i in range(1, -2, -1)]
-        self.snake_set = set(self.snake)
-        self.direction = "DOWN"          # 玩家蛇初始方向
-        
-        # 初始化对抗蛇（3节，位于对角位置避免与玩家蛇重叠）
-        self.opponent_snake = [(mid - i - 5, mid - 5) for i in range(1, -2, -1)]
-        self.opponent_snake_set = set(self.opponent_snake)
-        self.opponent_direction = "UP"   # 对抗蛇初始方向（与玩家相反）
-        self.opponent_dead = False       # 对抗蛇死亡状态标记
-        
-        # 初始化游戏状态
-        self.score = 0
-        self.opponent_score = 0
-        self.death_reason = None
-        self.game_start_time = time.time()  # 初始化游戏开始时间
+    def reset_opponent_mode(self, seed=None):
+        """重置对抗模式游戏状态，并确保游戏处于非暂停状态"""
+        super().reset_opponent_mode(self._begin_replay(RESET_OPPONENT, seed))
         self.paused = False  # 确保游戏重置时为非暂停状态
-        
-        # 更新可用位置集合（排除两条蛇的位置）
-        self._update_available_positions()
-        
-        # 生成初始食物
-        self.food = self._generate_food()
 
 
     # ---------------------------
-    # 游戏模式相关设置
+    # 对局录像
     # ---------------------------
 
-    # 执行游戏的一步移动（普通模式）
-    def step(self, action):
+    # 开始录制新的录像
+    def _begin_replay(self, kind, seed):
         """
-        执行游戏的一步移动（普通模式）
-        
+        保存上一局未保存的录像；启用录像时为新的一局选定种子并开始录制
+
         参数:
-            action: -1（不变/无输入），或 0:UP, 1:LEFT, 2:RIGHT, 3:DOWN
-            
+            kind: 重置方式（snake_replay.RESET_*）
+            seed: 指定的随机种子，None 时从游戏随机数生成器中取一个
+
         返回:
-            tuple: (done, info) - done表示游戏是否结束，info包含游戏状态信息
+            重置时使用的种子（未启用录像且未指定种子时为 None，即沿用当前随机序列）
         """
-        # 更新方向（如果有新的动作输入）
-        if action != -1:
-            self._update_direction(action)
-
-        # 计算新的蛇头位置
-        row, col = self.snake[0]  # 当前蛇头位置
-        if self.direction == "UP":
-            row -= 1
-        elif self.direction == "DOWN":
-            row += 1
-        elif self.direction == "LEFT":
-            col -= 1
-        elif self.direction == "RIGHT":
-            col += 1
-        
-        new_head = (row, col)
-
-        # 初始化状态变量
-        done = False
-        self.death_reason = None
-        food_obtained = False
-
-        # 处理蛇的移动和碰撞检测
-        if new_head == self.food:
-            # 吃到食物的情况
-            food_obtained = True
-            self.score += 10
-            
-            # 播放进食音效（静默失败）
-            if self.sound_eat:
-                try:
-                    self.sound_eat.play()
-                except Exception:
-                    pass
-                    
-            # 添加新头部（不删除尾部，蛇长度增加）
-            self.snake.insert(0, new_head)
-            self.snake_set.add(new_head)
-            self.non_snake.discard(new_head)
-            
-            # 添加吃到食物时的视觉反馈标记
-            if not hasattr(self, 'food_effect_timer'):
-                self.food_effect_timer = 0
-                self.last_food_position = None
-            self.last_food_position = new_head  # 记录吃到食物的位置
-            self.food_effect_timer = 3  # 持续3帧的视觉效果
-        else:
-            # 没吃到食物的情况
-            # 移除尾格并更新位置集合
-            tail = self.snake.pop()
-            if tail in self.snake_set:  # 确保tail存在于集合中再移除
-                self.snake_set.remove(tail)
-            self.non_snake.add(tail)
-            
-            # 添加新头部
-            self.snake.insert(0, new_head)
-            self.snake_set.add(new_head)
-            self.non_snake.discard(new_head)
-
-        # 检查碰撞条件
-        # 1. 撞墙检测
-        if row < 0 or row >= self.board_size or col < 0 or col >= self.board_size:
-            done = True
-            self.death_reason = "撞墙死亡"
-        # 2. 撞到自己检测（检查蛇头是否与身体其他部分碰撞）
-        elif len(self.snake) > 1 and new_head in self.snake[1:]:
-            done = True
-            self.death_reason = "撞到自己"
-
-        # 处理游戏结束逻辑
-        if done:
-            # 播放游戏结束音效（静默失败）
-            if self.sound_game_over:
-                try:
-                    self.sound_game_over.play()
-                except Exception:
-                    pass
-        else:
-            # 吃到食物时生成新食物
-            if food_obtained:
-                self.food = self._generate_food()
-
-        # 构建并返回游戏状态信息
-        info = {
-            "snake_size": len(self.snake),
-            "snake_head_pos": self.snake[0],  # 直接使用元组，避免不必要的转换
-            "prev_snake_head_pos": self.snake[1] if len(self.snake) > 1 else self.snake[0],
-            "food_pos": self.food,
-            "food_obtained": food_obtained,
-            "death_reason": self.death_reason
-        }
-
-        return done, info
+        self.finish_replay()
+        if self.replay_dir is None:
+            return seed
+        if seed is None:
+            seed = self.rng.getrandbits(32)
+        self.replay = ReplayRecorder(kind, self.board_size, seed)
+        return seed
+
+    # 记录一个事件
+    def _record_replay(self, event, before, after):
+        """方向由 before 变为 after 时记录新方向，否则记录 -1（方向不变）"""
+        if self.replay is not None:
+            self.replay.record(event, -1 if after == before else DIRECTION_INDEX[after])
+
+    # 保存录像
+    def finish_replay(self):
+        """
+        结束录制并保存当前录像（没有正在录制的录像时什么也不做）
 
-    # 更新可用位置集合，排除两条蛇的位置（对抗模式）
-    def _update_available_positions(self):
-        """更新所有非蛇体位置的集合
-        
-        用于路径查找和食物生成时的位置有效性检查。
+        返回:
+            str: 录像文件路径，未保存时为 None
         """
-        # 创建所有可能的位置集合
-        all_positions = set((r, c) for r in range(self.board_size) 
-                          for c in range(self.board_size))
-        
-        # 移除玩家蛇占据的位置
-        available = all_positions - self.snake_set
-        
-        # 移除对抗蛇占据的位置（如果存在）
-        if hasattr(self, 'opponent_snake_set'):
-            available -= self.opponent_snake_set
-        
-        self.non_snake = available
+        if self.replay is None:
+            return None
+        replay, self.replay = self.replay, None
+        try:
+            path = replay.save(self.replay_dir)
+        except OSError as e:
+            print("录像保存失败:", e)
+            return None
+        print("录像已保存:", path)
+        return path
 
-    # 执行游戏的一步移动（对抗模式）
-    def step_opponent_mode(self, action):
+
+    # ---------------------------
+    # 游戏模式相关设置（规则由 SnakeEngine 实现，此处只处理音效和视觉反馈）
+    # ---------------------------
+
+    # 播放音效（静默失败）
+    def _play_sound(self, sound):
+        """播放音效，声音未加载或播放失败时静默忽略"""
+        if sound:
+            try:
+                sound.play()
+            except Exception:
+                pass
+
+    # 记录吃到食物时的视觉反馈标记
+    def _mark_food_effect(self, position):
+        """记录吃到食物的位置，供 board_sprites 绘制持续3帧的视觉效果"""
+        if not hasattr(self, 'food_effect_timer'):
+            self.food_effect_timer = 0
+            self.last_food_position = None
+        self.last_food_position = position  # 记录吃到食物的位置
+        self.food_effect_timer = 3  # 持续3帧的视觉效果
+
+    # 是否有进行中的动画
+    def is_animating(self):
         """
-        执行游戏的一步移动（对抗模式）
-        
-        参数:
-            action: -1（不变/无输入），或 0:UP, 1:LEFT, 2:RIGHT, 3:DOWN
-            
-        返回:
-            tuple: (done, info) - done表示游戏是否结束，info包含游戏状态信息
+        有进行中的动画时返回 True，主循环据此决定是否逐帧重绘：
+        吃到食物的视觉效果，或棋盘上有食物且脉动相位与上次绘制时不同
         """
-        # 更新方向（如果有新的动作输入）
-        if action != -1:
-            self._update_direction(action)
-
-        # 计算新的蛇头位置
-        row, col = self.snake[0]  # 当前蛇头位置
-        if self.direction == "UP":
-            row -= 1
-        elif self.direction == "DOWN":
-            row += 1
-        elif self.direction == "LEFT":
-            col -= 1
-        elif self.direction == "RIGHT":
-            col += 1
-        
-        new_head = (row, col)
-
-        # 初始化状态变量
-        done = False
-        self.death_reason = None
-        food_obtained = False
-
-        # 先添加新头部（无论是否吃到食物）
-        self.snake.insert(0, new_head)
-        self.snake_set.add(new_head)
-        self.non_snake.discard(new_head)
-
-        # 检查是否吃到食物
-        if new_head == self.food:
-            food_obtained = True
-            self.score += 10
-            
-            # 播放进食音效（静默失败）
-            if self.sound_eat:
-                try:
-                    self.sound_eat.play()
-                except Exception:
-                    pass
-                    
-            # 添加吃到食物时的视觉反馈标记
-            if not hasattr(self, 'food_effect_timer'):
-                self.food_effect_timer = 0
-                self.last_food_position = None
-            self.last_food_position = new_head  # 记录吃到食物的位置
-            self.food_effect_timer = 3  # 持续3帧的视觉效果
-        else:
-            # 没吃到食物时移除尾部（如果蛇长度>1）
-            food_obtained = False
-            if len(self.snake) > 1:
-                tail = self.snake.pop()
-                if tail in self.snake_set:  # 确保tail存在于集合中再移除
-                    self.snake_set.remove(tail)
-                self.non_snake.add(tail)
-
-        # 检查碰撞条件
-        # 1. 撞墙检测
-        if row < 0 or row >= self.board_size or col < 0 or col >= self.board_size:
-            done = True
-            self.death_reason = "撞墙死亡"
-        # 2. 撞到自己检测（检查蛇头是否与身体其他部分碰撞）
-        elif len(self.snake) > 1 and new_head in self.snake[1:]:
-            done = True
-            self.death_reason = "撞到自己"
-        # 3. 撞到对抗蛇检测
-        elif new_head in self.opponent_snake_set:
-            done = True
-            self.death_reason = "撞到对抗蛇"
-
-        # 处理游戏结束逻辑
+        if getattr(self, 'food_effect_timer', 0) > 0:
+            return True
+        return len(self.snake) < self.grid_size and food_pulse() != getattr(self, 'food_pulse_drawn', None)
+
+    # 执行游戏的一步移动（普通模式）
+    def step(self, action):
+        """执行游戏的一步移动（普通模式），并播放对应音效"""
+        before = self.direction
+        done, info = super().step(action)
+        self._record_replay(EVENT_STEP, before, self.direction)
+        if info["food_obtained"]:
+            self._play_sound(self.sound_eat)
+            self._mark_food_effect(info["snake_head_pos"])
         if done:
-            # 播放游戏结束音效（静默失败）
-            if self.sound_game_over:
-                try:
-                    self.sound_game_over.play()
-                except Exception:
-                    pass
-        else:
-            # 吃到食物时生成新食物
-            if food_obtained:
-                self.food = self._generate_food()
-
-        # 构建并返回游戏状态信息（移除numpy依赖）
-        info = {
-            "snake_size": len(self.snake),
-            "snake_head_pos": self.snake[0],  # 直接使用元组
-            "prev_snake_head_pos": self.snake[1] if len(self.snake) > 1 else self.snake[0],
-            "food_pos": self.food,
-            "food_obtained": food_obtained,
-            "death_reason": self.death_reason
-        }
+            self._play_sound(self.sound_game_over)
+            self.finish_replay()
+        return done, info
 
+    # 执行游戏的一步移动（对抗模式）
+    def step_opponent_mode(self, action):
+        """执行游戏的一步移动（对抗模式），并播放对应音效"""
+        before = self.direction
+        done, info = super().step_opponent_mode(action)
+        self._record_replay(EVENT_STEP_OPPONENT_MODE, before, self.direction)
+        if info["food_obtained"]:
+            self._play_sound(self.sound_eat)
+            self._mark_food_effect(info["snake_head_pos"])
+        if done:
+            self._play_sound(self.sound_game_over)
+            self.finish_replay()
         return done, info
 
     # 执行对抗蛇的一步移动（增强版）
     def opponent_step(self, action):
-        """
-        处理对抗蛇的移动逻辑（增强版）
-        
-        参数:
-            action: -1（不变/无输入），或 0:UP, 1:LEFT, 2:RIGHT, 3:DOWN
-            
-        返回:
-            tuple: (done, info) - done表示对抗蛇是否死亡，info包含死亡原因
-        """
-        # 如果对抗蛇已经死亡，则不再移动
-        if hasattr(self, 'opponent_dead') and self.opponent_dead:
-            return True, {"death_reason": self.death_reason}
-
-        # 更新移动方向（如果有新的动作输入）
-        if action != -1:
-            self._update_opponent_direction(action)
-
-        # 计算新的对抗蛇头位置
-        row, col = self.opponent_snake[0]  # 当前对抗蛇头位置
-        if self.opponent_direction == "UP":
-            row -= 1
-        elif self.opponent_direction == "DOWN":
-            row += 1
-        elif self.opponent_direction == "LEFT":
-            col -= 1
-        elif self.opponent_direction == "RIGHT":
-            col += 1
-        
-        new_head = (row, col)
-
-        # 初始化状态变量
-        done = False
-        death_reason = None
-
-        # 先添加新头部（无论是否吃到食物）
-        self.opponent_snake.insert(0, new_head)
-        self.opponent_snake_set.add(new_head)
-
-        # 检查碰撞条件
-        # 1. 撞墙检测
-        if row < 0 or row >= self.board_size or col < 0 or col >= self.board_size:
-            done = True
-            death_reason = "对抗蛇撞墙死亡"
-        # 2. 撞到自己检测（排除刚添加的头部）
-        elif new_head in self.opponent_snake_set and new_head != self.opponent_snake[0]:
-            done = True
-            death_reason = "对抗蛇撞到自己"
-        # 3. 撞到玩家蛇检测
-        elif new_head in self.snake_set:
-            done = True
-            death_reason = "对抗蛇撞到玩家蛇"
-
-        # 处理对抗蛇死亡逻辑
-        if done:
-            self.opponent_dead = True
-            self.death_reason = death_reason
-            # 为玩家增加额外奖励分数
-            self.score += 50  # 击败对抗蛇的奖励
-            
+        """执行对抗蛇的一步移动，并播放对应音效"""
+        was_dead = getattr(self, 'opponent_dead', False)
+        before = self.opponent_direction
+        done, info = super().opponent_step(action)
+        self._record_replay(EVENT_OPPONENT_STEP, before, self.opponent_direction)
+        if done and not was_dead:
             # 播放对抗蛇死亡音效（如果有）
-            if hasattr(self, 'sound_crash') and self.sound_crash:
-                try:
-                    self.sound_crash.play()
-                except Exception:
-                    pass
-            
-            return done, {"death_reason": death_reason}
-
-        # 处理移动后的蛇身更新
-        if new_head != self.food:
-            # 没吃到食物时移除尾部（如果蛇长度>1）
-            if len(self.opponent_snake) > 1:
-                tail = self.opponent_snake.pop()
-                self.opponent_snake_set.remove(tail)
-        else:
-            # 吃到食物，生成新食物
-            self.opponent_score += 10
-            
-            # 播放对抗蛇进食音效（如果有）
-            if hasattr(self, 'sound_eat') and self.sound_eat:
-                try:
-                    # 调整音量或使用不同音效区分玩家和对抗蛇
-                    pygame.mixer.Sound.set_volume(self.sound_eat, 0.5)
-                    self.sound_eat.play()
-                    pygame.mixer.Sound.set_volume(self.sound_eat, 1.0)  # 恢复原音量
-                except Exception:
-                    pass
-            
-            self.food = self._generate_food()
-        
-        # 更新non_snake集合，确保游戏状态一致性
-        self._update_available_positions()
-
-        return done, {"death_reason": death_reason}
+            self._play_sound(getattr(self, 'sound_crash', None))
+        elif info["food_obtained"] and self.sound_eat:
+            # 播放对抗蛇进食音效，降低音量以区分玩家和对抗蛇
+            try:
+                pygame.mixer.Sound.set_volume(self.sound_eat, 0.5)
+                self.sound_eat.play()
+                pygame.mixer.Sound.set_volume(self.sound_eat, 1.0)  # 恢复原音量
+            except Exception:
+                pass
+        return done, info
 
-    # 重新部署对抗蛇（确保与玩家蛇不重叠）
+    # 重新部署对抗蛇
     def respawn_opponent(self):
-        """重新部署对抗蛇"""
-        mid = self.board_size // 2
-        
-        # 尝试最多10次生成有效的对抗蛇位置
-        for _ in range(10):
-            # 随机选择一个远离玩家的区域
-            # 使用边界检查确保位置有效
-            opponent_row = random.randint(2, self.board_size - 5)
-            opponent_col = random.randint(2, self.board_size - 5)
-            
-            # 创建对抗蛇（3节）
-            new_opponent_snake = [(opponent_row + i, opponent_col) for i in range(1, -2, -1)]
-            new_opponent_set = set(new_opponent_snake)
-            
-            # 检查是否与玩家蛇重叠或越界
-            valid_position = True
-            for pos in new_opponent_snake:
-                r, c = pos
-                # 检查是否在棋盘内
-                if r < 0 or r >= self.board_size or c < 0 or c >= self.board_size:
-                    valid_position = False
-                    break
-                # 检查是否与玩家蛇重叠
-                if pos in self.snake_set:
-                    valid_position = False
-                    break
-            
-            if valid_position:
-                # 有效位置，更新对抗蛇
-                self.opponent_snake = new_opponent_snake
-                self.opponent_snake_set = new_opponent_set
-                self.opponent_direction = random.choice(["UP", "DOWN", "LEFT", "RIGHT"])
-                self.opponent_dead = False
-                
-                # 重新计算non_snake集合，确保准确性
-                self.non_snake = set((r, c) for r in range(self.board_size) for c in range(self.board_size) 
-                                  if (r, c) not in self.snake_set and (r, c) not in self.opponent_snake_set and (r, c) != self.food)
-                return
-        
-        # 如果多次尝试都失败，使用安全的默认位置
-        self.opponent_snake = [(max(2, mid - 3), max(2, mid - 5)), 
-                              (max(2, mid - 4), max(2, mid - 5)), 
-                              (max(2, mid - 5), max(2, mid - 5))]
-        self.opponent_snake_set = set(self.opponent_snake)
-        self.opponent_direction = "UP"
-        self.opponent_dead = False
-        
-        # 重新计算non_snake集合
-        self.non_snake = set((r, c) for r in range(self.board_size) for c in range(self.board_size) 
-                          if (r, c) not in self.snake_set and (r, c) not in self.opponent_snake_set and (r, c) != self.food)
-
-    # 更新玩家蛇的移动方向（防止180度转向）
-    def _update_direction(self, action):
-        """
-        根据用户操作更新玩家蛇的移动方向
-        
-        参数:
-            action: 0:UP, 1:LEFT, 2:RIGHT, 3:DOWN
-        
-        说明:
-            实现了180度转向限制，防止蛇直接反向移动
-        """
-        # 使用条件判断直接更新方向，避免不必要的嵌套
-        if action == 0 and self.direction != "DOWN":  # 向上且不与当前方向冲突
-            self.direction = "UP"
-        elif action == 1 and self.direction != "RIGHT":  # 向左且不与当前方向冲突
-            self.direction = "LEFT"
-        elif action == 2 and self.direction != "LEFT":  # 向右且不与当前方向冲突
-            self.direction = "RIGHT"
-        elif action == 3 and self.direction != "UP":  # 向下且不与当前方向冲突
-            self.direction = "DOWN"
-
-    # 更新对抗蛇的移动方向（防止180度转向）
-    def _update_opponent_direction(self, action):
-        """
-        根据输入更新对抗蛇的移动方向
-        
-        参数:
-            action: 0:UP, 1:LEFT, 2:RIGHT, 3:DOWN
-        
-        说明:
-            实现了180度转向限制，防止对抗蛇直接反向移动
-        """
-        # 使用条件判断直接更新方向，避免不必要的嵌套
-        if action == 0 and self.opponent_direction != "DOWN":  # 向上且不与当前方向冲突
-            self.opponent_direction = "UP"
-        elif action == 1 and self.opponent_direction != "RIGHT":  # 向左且不与当前方向冲突
-            self.opponent_direction = "LEFT"
-        elif action == 2 and self.opponent_direction != "LEFT":  # 向右且不与当前方向冲突
-            self.opponent_direction = "RIGHT"
-        elif action == 3 and self.opponent_direction != "UP":  # 向下且不与当前方向冲突
-            self.opponent_direction = "DOWN"
+        """重新部署对抗蛇，并记入录像"""
+        super().respawn_opponent()
+        self._record_replay(EVENT_RESPAWN, None, None)
 
     # 执行游戏的一步移动（影子模式）
     def step_three_snake_mode(self, action):
-        """
-        影子模式的游戏逻辑步骤
-        AI蛇完全模仿玩家的移动和蛇身长度，AI就是影子，AI死亡玩家也死亡
-        玩家吃到食物增长蛇身，AI也会增长蛇身
-        
-        参数:
-            action: -1（不变/无输入），或 0:UP, 1:LEFT, 2:RIGHT, 3:DOWN
-            
-        返回:
-            tuple: (done, info) - done表示游戏是否结束，info包含游戏状态信息
-        """
-        # 确保AI蛇的生命状态属性存在并设置为True
-        if not hasattr(self, 'ai1_alive'):
-            self.ai1_alive = True
-        if not hasattr(self, 'ai2_alive'):
-            self.ai2_alive = True
-        
-        # 初始化状态变量
-        done = False
-        self.death_reason = None
-        food_obtained = False
-        
-        # 1. 处理玩家蛇的移动 - 传统蛇形移动方式
-        if action != -1:
-            self._update_direction(action)
-        
-        # 计算新的蛇头位置
-        row, col = self.snake[0]  # 当前蛇头位置
-        if self.direction == "UP":
-            row -= 1
-        elif self.direction == "DOWN":
-            row += 1
-        elif self.direction == "LEFT":
-            col -= 1
-        elif self.direction == "RIGHT":
-            col += 1
-        
-        new_head = (row, col)
-        
-        # 先添加新头部（无论是否吃到食物）
-        self.snake.insert(0, new_head)
-        if hasattr(self, 'snake_set'):
-            self.snake_set.add(new_head)
-            self.non_snake.discard(new_head)
-        
-        # 检查碰撞条件（玩家蛇）
-        # 1. 撞墙检测
-        if row < 0 or row >= self.board_size or col < 0 or col >= self.board_size:
-            done = True
-            self.death_reason = "玩家蛇撞墙死亡！"
-        # 2. 撞自己检测
-        elif new_head in self.snake[1:]:
-            done = True
-            self.death_reason = "玩家蛇咬到自己！"
-        # 3. 撞AI蛇检测
-        elif hasattr(self, 'ai1_snake') and new_head in self.ai1_snake:
-            done = True
-            self.death_reason = "玩家蛇撞到AI1蛇！"
-        elif hasattr(self, 'ai2_snake') and new_head in self.ai2_snake:
-            done = True
-            self.death_reason = "玩家蛇撞到AI2蛇！"
-        
-        # 2. 处理食物逻辑
-        if not done and hasattr(self, 'food') and new_head == self.food:
-            food_obtained = True
-            self.score += 10
-            # 记录最后食物位置用于视觉效果
-            if hasattr(self, 'non_snake'):
-                # 从可用位置集合中移除旧食物位置
-                self.non_snake.discard(self.food)
-            # 生成新食物
-            self.food = self._generate_food()
-        else:
-            # 如果没吃到食物，移除尾部（保持蛇长度不变）
-            tail = self.snake.pop()
-            if hasattr(self, 'snake_set'):
-                self.snake_set.discard(tail)
-                self.non_snake.add(tail)
-        
-        # 3. 处理AI蛇的移动 - AI蛇完全模仿玩家移动（作为影子）
-        if hasattr(self, 'ai1_snake') and hasattr(self, 'ai2_snake') and not done:
-            # 3.1 计算AI1蛇的新位置（位于玩家左侧一定距离）
-            shadow_offset1 = -5  # AI1位于玩家左侧5格
-            new_ai1_snake = []
-            
-            for i, (r, c) in enumerate(self.snake):
-                # 复制玩家蛇的形状，但水平位置偏移
-                new_c = c + shadow_offset1
-                # 确保在边界内
-                new_c = max(0, min(new_c, self.board_size - 1))
-                new_ai1_snake.append((r, new_c))
-            
-            # 3.2 计算AI2蛇的新位置（位于玩家右侧一定距离）
-            shadow_offset2 = 5  # AI2位于玩家右侧5格
-            new_ai2_snake = []
-            
-            for i, (r, c) in enumerate(self.snake):
-                # 复制玩家蛇的形状，但水平位置偏移
-                new_c = c + shadow_offset2
-                # 确保在边界内
-                new_c = max(0, min(new_c, self.board_size - 1))
-                new_ai2_snake.append((r, new_c))
-            
-            # 检查AI蛇的碰撞
-            # AI1蛇碰撞检测
-            ai1_dead = False
-            # 检查AI1蛇是否撞墙
-            for (r, c) in new_ai1_snake:
-                if r < 0 or r >= self.board_size or c < 0 or c >= self.board_size:
-                    ai1_dead = True
-                    break
-            # 检查AI1蛇是否咬自己
-            if not ai1_dead and len(set(new_ai1_snake)) != len(new_ai1_snake):
-                ai1_dead = True
-            # 检查AI1蛇是否撞玩家蛇
-            if not ai1_dead and any(pos in self.snake for pos in new_ai1_snake):
-                ai1_dead = True
-            # 检查AI1蛇是否撞AI2蛇
-            if not ai1_dead and any(pos in new_ai2_snake for pos in new_ai1_snake):
-                ai1_dead = True
-            
-            # AI2蛇碰撞检测
-            ai2_dead = False
-            # 检查AI2蛇是否撞墙
-            for (r, c) in new_ai2_snake:
-                if r < 0 or r >= self.board_size or c < 0 or c >= self.board_size:
-                    ai2_dead = True
-                    break
-            # 检查AI2蛇是否咬自己
-            if not ai2_dead and len(set(new_ai2_snake)) != len(new_ai2_snake):
-                ai2_dead = True
-            # 检查AI2蛇是否撞玩家蛇
-            if not ai2_dead and any(pos in self.snake for pos in new_ai2_snake):
-                ai2_dead = True
-            # 检查AI2蛇是否撞AI1蛇
-            if not ai2_dead and any(pos in new_ai1_snake for pos in new_ai2_snake):
-                ai2_dead = True
-            
-            # 更新AI蛇的生命状态
-            self.ai1_alive = not ai1_dead
-            self.ai2_alive = not ai2_dead
-            
-            # 如果任何一条AI蛇死亡，玩家也死亡
-            if ai1_dead or ai2_dead:
-                done = True
-                if ai1_dead and ai2_dead:
-                    self.death_reason = "两条影子蛇都死亡了！"
-                elif ai1_dead:
-                    self.death_reason = "左侧影子蛇死亡了！"
-                else:
-                    self.death_reason = "右侧影子蛇死亡了！"
-            else:
-                # 更新AI蛇的位置
-                # 先从non_snake中移除旧位置
-                if hasattr(self, 'non_snake'):
-                    for pos in self.ai1_snake:
-                        self.non_snake.add(pos)
-                    for pos in self.ai2_snake:
-                        self.non_snake.add(pos)
-                
-                # 更新AI蛇的位置
-                self.ai1_snake = new_ai1_snake
-                self.ai2_snake = new_ai2_snake
-                
-                # 从non_snake中添加新位置
-                if hasattr(self, 'non_snake'):
-                    for pos in self.ai1_snake:
-                        self.non_snake.discard(pos)
-                    for pos in self.ai2_snake:
-                        self.non_snake.discard(pos)
-        
-        # 返回游戏状态
-        info = {
-            "death_reason": self.death_reason,
-            "score": self.score,
-            "food_obtained": food_obtained,
-            "ai1_alive": self.ai1_alive,
-            "ai2_alive": self.ai2_alive
-        }
-        
+        """执行影子模式的一步移动，并记入录像"""
+        before = self.direction
+        done, info = super().step_three_snake_mode(action)
+        self._record_replay(EVENT_STEP_THREE_SNAKE, before, self.direction)
+        if done:
+            self.finish_replay()
         return done, info
 
-    # 生成食物（确保不在蛇身体或对抗蛇身体上）
-    def _generate_food(self):
-        """随机在空格里生成食物（若无可用空格则返回 (0,0)）"""
-        if len(self.non_snake) > 0:
-            # 将集合转换为列表后再随机选择
-            non_snake_list = list(self.non_snake)
-            return non_snake_list[0] if len(non_snake_list) == 1 else random.choice(non_snake_list)
-        else:
-            return (0, 0)
-
 
     # ---------------------------
     # GUI绘制
@@ -976,11 +819,7 @@ class SnakeGame:
     def draw_game_over_screen(self):
         """绘制游戏结束界面"""
         # 绘制深蓝色渐变背景
-        for y in range(self.display_height):
-            r = int(0)
-            g = int(10)
-            b = int(30 - 20 * y / self.display_height)
-            pygame.draw.line(self.screen, (r, g, b), (0, y), (self.display_width, y))
+        self.screen.blit(gradient_surface(self.display_width, self.display_height, (0, 10, 30), (0, 0, -20)), (0, 0))
             
         margin_top = 60
         spacing = 35
@@ -997,8 +836,8 @@ class SnakeGame:
             shadow_color = (150, 150, 150) # 灰色阴影
             
         # 标题阴影效果
-        title_shadow = self.large_font.render(title_text, True, shadow_color)
-        title = self.large_font.render(title_text, True, title_color)
+        title_shadow = text_surface(self.large_font, title_text, True, shadow_color)
+        title = text_surface(self.large_font, title_text, True, title_color)
         title_rect = title.get_rect(center=(self.display_width // 2, margin_top))
         
         # 绘制阴影和标题
@@ -1007,20 +846,20 @@ class SnakeGame:
         self.screen.blit(title, title_rect)
 
         # 分数显示 - 使用更醒目的颜色和更大的字体
-        score_text = self.font.render(f"最终分数: {self.score}", True, (255, 255, 150))
+        score_text = text_surface(self.font, f"最终分数: {self.score}", True, (255, 255, 150))
         score_rect = score_text.get_rect(center=(self.display_width // 2, title_rect.bottom + spacing))
         self.screen.blit(score_text, score_rect)
 
         # 蛇身长度
         length = len(self.snake)
-        length_text = self.font.render(f"蛇身长度: {length} 格", True, (200, 255, 200))
+        length_text = text_surface(self.font, f"蛇身长度: {length} 格", True, (200, 255, 200))
         length_rect = length_text.get_rect(center=(self.display_width // 2, score_rect.bottom + spacing // 2))
         self.screen.blit(length_text, length_rect)
 
         # 死亡原因
         reason_rect = None
         if hasattr(self, 'death_reason') and self.death_reason:
-            reason_text = self.font.render(f"死亡原因: {self.death_reason}", True, (255, 200, 200))
+            reason_text = text_surface(self.font, f"死亡原因: {self.death_reason}", True, (255, 200, 200))
             reason_rect = reason_text.get_rect(center=(self.display_width // 2, length_rect.bottom + spacing // 2))
             self.screen.blit(reason_text, reason_rect)
 
@@ -1038,7 +877,7 @@ class SnakeGame:
         )
         pygame.draw.rect(self.screen, (0, 150, 0), retry_button_rect, border_radius=10)
         pygame.draw.rect(self.screen, (0, 255, 0), retry_button_rect, 2, border_radius=10)
-        retry_text = self.font.render("重试", True, (255, 255, 255))
+        retry_text = text_surface(self.font, "重试", True, (255, 255, 255))
         retry_text_rect = retry_text.get_rect(center=retry_button_rect.center)
         self.screen.blit(retry_text, retry_text_rect)
 
@@ -1051,7 +890,7 @@ class SnakeGame:
         )
         pygame.draw.rect(self.screen, (100, 100, 150), menu_button_rect, border_radius=10)
         pygame.draw.rect(self.screen, (150, 150, 255), menu_button_rect, 2, border_radius=10)
-        menu_text = self.font.render("返回菜单", True, (255, 255, 255))
+        menu_text = text_surface(self.font, "返回菜单", True, (255, 255, 255))
         menu_text_rect = menu_text.get_rect(center=menu_button_rect.center)
         self.screen.blit(menu_text, menu_text_rect)
 
@@ -1064,7 +903,7 @@ class SnakeGame:
         )
         pygame.draw.rect(self.screen, (150, 0, 0), exit_button_rect, border_radius=10)
         pygame.draw.rect(self.screen, (255, 0, 0), exit_button_rect, 2, border_radius=10)
-        exit_text = self.font.render("退出游戏", True, (255, 255, 255))
+        exit_text = text_surface(self.font, "退出游戏", True, (255, 255, 255))
         exit_text_rect = exit_text.get_rect(center=exit_button_rect.center)
         self.screen.blit(exit_text, exit_text_rect)
   
@@ -1076,547 +915,168 @@ class SnakeGame:
         参数:
             draw_opponent: 是否绘制对抗蛇
         """
-        # 绘制深蓝色渐变背景
-        for y in range(self.screen.get_height()):
-            # 从深蓝到稍微亮一点的蓝色渐变
-            r = max(0, int(10 - 5 * y / self.screen.get_height()))
-            g = max(0, int(15 - 8 * y / self.screen.get_height()))
-            b = max(20, int(30 + 10 * y / self.screen.get_height()))
-            pygame.draw.line(self.screen, (r, g, b), (0, y), (self.screen.get_width(), y))
-
-        # 绘制游戏区域背景
-        pygame.draw.rect(self.screen, (10, 15, 30),
-                         (self.border_size, self.border_size, self.width, self.height),
-                         border_radius=5)
-        
-        # 绘制棋盘网格线（浅灰色，半透明）和灰色对角线填充
-        grid_color = (50, 50, 70, 100)
-        # 绘制两条主对角线上的格子填充灰色
-        diagonal_color = (40, 40, 60, 150)  # 灰色填充颜色
-        for r in range(self.board_size):
-            for c in range(self.board_size):
-                # 判断是否在主对角线上（左上到右下）或副对角线上（右上到左下）
-                if r == c or r + c == self.board_size - 1:
-                    # 计算格子的左上角坐标
-                    start_x = self.border_size + c * self.cell_size
-                    start_y = self.border_size + r * self.cell_size
-                    # 填充整个格子为灰色
-                    pygame.draw.rect(self.screen, diagonal_color,
-                                  (start_x, start_y, self.cell_size, self.cell_size))
-        
-        # 绘制网格线
-        for i in range(1, self.board_size):
-            # 垂直线
-            x = self.border_size + i * self.cell_size
-            pygame.draw.line(self.screen, grid_color, 
-                           (x, self.border_size), 
-                           (x, self.border_size + self.height),
-                           1)
-            # 水平线
-            y = self.border_size + i * self.cell_size
-            pygame.draw.line(self.screen, grid_color, 
-                           (self.border_size, y), 
-                           (self.border_size + self.width, y),
-                           1)
-
-        # 绘制棋盘边框（白色双线，增强视觉效果）
-        # 外边框
-        pygame.draw.rect(self.screen, (150, 150, 180),
-                         (self.border_size - 3, self.border_size - 3, self.width + 6, self.height + 6), 2)
-        # 内边框
-        pygame.draw.rect(self.screen, (200, 200, 255),
-                         (self.border_size - 1, self.border_size - 1, self.width + 2, self.height + 2), 1)
-
-        # 绘制玩家蛇
-        self.draw_snake()
+        self.screen.blit(self.board_layer(), (0, 0))
+        self.screen.blits(self.board_sprites(draw_opponent), doreturn=False)
+
+    # 当前棋盘参数对应的静态棋盘层
+    def board_layer(self):
+        """静态棋盘层（渐变背景、游戏区域、对角线、网格线、双线边框），预渲染一次，每帧一次 blit"""
+        return board_layer_surface(self.screen.get_size(), self.board_size, self.cell_size,
+                                   self.border_size, self.width, self.height, self.board_theme)
+
+    # 棋盘上所有动态元素的精灵图
+    def board_sprites(self, draw_opponent=False):
+        """
+        按绘制顺序返回棋盘上的蛇、食物和吃到食物效果的 (精灵图, 位置) 列表，
+        食物脉动和吃到食物效果的计时器每调用一次前进一帧
+
+        参数:
+            draw_opponent: 是否绘制对抗蛇
+
+        返回:
+            list
+        """
+        # 玩家蛇
+        sprites = self.snake_sprites()
         
-        # 绘制对抗蛇（仅在对抗模式且对抗蛇未死亡时）
+        # 对抗蛇（仅在对抗模式且对抗蛇未死亡时）
         opponent_alive = hasattr(self, 'opponent_snake') and (
             not hasattr(self, 'opponent_dead') or not self.opponent_dead
         )
         if draw_opponent and opponent_alive:
-            self.draw_opponent_snake()
+            sprites += self.opponent_sprites()
         
-        # 绘制AI1蛇（影子模式）
+        # AI1蛇（影子模式）
         ai1_alive = hasattr(self, 'ai1_snake') and (not hasattr(self, 'ai1_dead') or not self.ai1_dead)
         if ai1_alive:
-            self.draw_ai_3snake('ai1')
+            sprites += self.ai_3snake_sprites('ai1')
         
-        # 绘制AI2蛇（影子模式）
+        # AI2蛇（影子模式）
         ai2_alive = hasattr(self, 'ai2_snake') and (not hasattr(self, 'ai2_dead') or not self.ai2_dead)
         if ai2_alive:
-            self.draw_ai_3snake('ai2')
+            sprites += self.ai_3snake_sprites('ai2')
 
-        # 绘制食物 - 使用更吸引人的样式，带有立体感和脉动效果
+        # 食物 - 使用更吸引人的样式，带有立体感和脉动效果（每个脉动相位的精灵图只渲染一次）
         if len(self.snake) < self.grid_size:
             r, c = self.food
             food_x = c * self.cell_size + self.border_size
             food_y = r * self.cell_size + self.border_size
             
-            # 添加脉动动画效果
-            if not hasattr(self, 'food_pulse_timer'):
-                self.food_pulse_timer = 0
-            self.food_pulse_timer = (self.food_pulse_timer + 1) % 60
-            pulse_factor = 1.0 + 0.1 * abs(30 - self.food_pulse_timer) / 30
-            
-            # 计算食物大小
-            base_size = self.cell_size * 0.8
-            current_size = base_size * pulse_factor
-            offset = (self.cell_size - current_size) // 2
-            
-            # 食物阴影（增加立体感）
-            shadow_offset = 2
-            pygame.draw.circle(self.screen, (150, 10, 10),
-                              (food_x + self.cell_size // 2 + shadow_offset, 
-                               food_y + self.cell_size // 2 + shadow_offset),
-                              current_size // 2)
-            
-            # 食物主体（渐变色圆形）
-            # 创建径向渐变效果的surface
-            food_surf = pygame.Surface((self.cell_size, self.cell_size), pygame.SRCALPHA)
-            center = (self.cell_size // 2, self.cell_size // 2)
-            radius = int(current_size // 2)
-            
-            # 从中心到边缘的径向渐变
-            for i in range(radius, 0, -1):
-                intensity = 255 - (radius - i) * 255 // radius
-                color = (255, intensity // 5, intensity // 5)
-                pygame.draw.circle(food_surf, color, center, i)
-            
-            # 将渐变效果绘制到屏幕
-            self.screen.blit(food_surf, (food_x, food_y))
-            
-            # 食物高光（增加光泽感）
-            highlight_size = max(1, current_size // 4)
-            pygame.draw.circle(self.screen, (255, 255, 255),
-                              (food_x + self.cell_size // 2 - offset, 
-                               food_y + self.cell_size // 2 - offset),
-                              highlight_size)
-            
-            # 食物细节点缀（装饰效果）
-            decor_size = max(1, current_size // 8)
-            decor_positions = [
-                (food_x + self.cell_size // 4, food_y + self.cell_size // 4),
-                (food_x + self.cell_size * 3 // 4, food_y + self.cell_size // 4),
-                (food_x + self.cell_size // 4, food_y + self.cell_size * 3 // 4),
-                (food_x + self.cell_size * 3 // 4, food_y + self.cell_size * 3 // 4)
-            ]
-            
-            for pos in decor_positions:
-                pygame.draw.circle(self.screen, (255, 255, 255, 180), pos, decor_size)
+            # 添加脉动动画效果（相位按实际时间计算）
+            self.food_pulse_drawn = food_pulse()
+            sprites.append((food_sprite(self.cell_size, self.food_pulse_drawn), (food_x, food_y)))
         
-        # 绘制吃到食物时的视觉反馈效果
+        # 吃到食物时的视觉反馈效果
         if hasattr(self, 'food_effect_timer') and self.food_effect_timer > 0 and hasattr(self, 'last_food_position') and self.last_food_position:
             # 计算效果的屏幕坐标
             r, c = self.last_food_position
             effect_x = c * self.cell_size + self.border_size
             effect_y = r * self.cell_size + self.border_size
-            
-            # 根据计时器计算效果大小和透明度
-            size_factor = 1.0 + (3 - self.food_effect_timer) * 0.3
-            opacity = 255 - (3 - self.food_effect_timer) * 85
-            
-            # 创建一个临时的surface用于绘制带透明度的效果
-            effect_surf = pygame.Surface((self.cell_size * 2, self.cell_size * 2), pygame.SRCALPHA)
-            
-            # 绘制食物效果的外环（带有渐变效果）
-            for i in range(5):
-                current_size = int(self.cell_size * size_factor * (1 - i * 0.15))
-                current_opacity = int(opacity * (1 - i * 0.2))
-                pygame.draw.circle(
-                    effect_surf,
-                    (255, 255, 50, current_opacity),  # 黄色带透明度
-                    (self.cell_size, self.cell_size),
-                    current_size // 2
-                )
-            
-            # 将效果绘制到屏幕上
-            self.screen.blit(effect_surf, (effect_x - self.cell_size // 2, effect_y - self.cell_size // 2))
+            sprites.append((eat_effect_sprite(self.cell_size, self.food_effect_timer),
+                            (effect_x - self.cell_size // 2, effect_y - self.cell_size // 2)))
             
             # 减少计时器
             self.food_effect_timer -= 1
+        return sprites
 
-    # 绘制对抗蛇（包括头部和眼睛）
-    def draw_opponent_snake(self):
-        """绘制对抗蛇（包括头部和眼睛）"""
+    # 对抗蛇的精灵图（包括头部和眼睛）
+    def opponent_sprites(self):
+        """返回绘制对抗蛇（包括头部和眼睛）的 (精灵图, 位置) 列表"""
+        cell = self.cell_size
+        border = self.border_size
         head_r, head_c = self.opponent_snake[0]
-        head_x = head_c * self.cell_size + self.border_size
-        head_y = head_r * self.cell_size + self.border_size
-
-        # 绘制蛇头（深红色调，更有质感）
-        snake_head_color = (180, 0, 0)  # 更深的红色
-        pygame.draw.polygon(self.screen, snake_head_color, [
-            (head_x + self.cell_size // 2, head_y),
-            (head_x + self.cell_size, head_y + self.cell_size // 2),
-            (head_x + self.cell_size // 2, head_y + self.cell_size),
-            (head_x, head_y + self.cell_size // 2)
-        ])
-        
-        # 添加头部光泽效果
-        highlight_color = (220, 80, 80)
-        highlight_points = [
-            (head_x + self.cell_size // 2, head_y + self.cell_size // 5),
-            (head_x + self.cell_size * 0.8, head_y + self.cell_size // 2),
-            (head_x + self.cell_size // 2, head_y + self.cell_size * 0.4),
-            (head_x + self.cell_size * 0.2, head_y + self.cell_size // 2)
-        ]
-        pygame.draw.polygon(self.screen, highlight_color, highlight_points)
+        sprites = [(head_sprite(cell, "opponent", self.opponent_direction),
+                    (head_c * cell + border, head_r * cell + border))]
 
-        # 眼睛 - 根据当前方向调整眼睛位置，增强视觉反馈
-        eye_size = max(2, self.cell_size // 12)  # 根据单元格大小动态调整
-        eye_offset = self.cell_size // 4
-        
-        # 根据移动方向调整眼睛位置，让蛇看起来朝移动方向看
-        if self.opponent_direction == "UP":
-            eye1_pos = (head_x + eye_offset, head_y + eye_offset)
-            eye2_pos = (head_x + self.cell_size - eye_offset, head_y + eye_offset)
-        elif self.opponent_direction == "DOWN":
-            eye1_pos = (head_x + eye_offset, head_y + self.cell_size - eye_offset)
-            eye2_pos = (head_x + self.cell_size - eye_offset, head_y + self.cell_size - eye_offset)
-        elif self.opponent_direction == "LEFT":
-            eye1_pos = (head_x + eye_offset, head_y + eye_offset)
-            eye2_pos = (head_x + eye_offset, head_y + self.cell_size - eye_offset)
-        else:  # RIGHT
-            eye1_pos = (head_x + self.cell_size - eye_offset, head_y + eye_offset)
-            eye2_pos = (head_x + self.cell_size - eye_offset, head_y + self.cell_size - eye_offset)
-        
-        # 绘制眼睛和瞳孔
-        pygame.draw.circle(self.screen, (255, 255, 255), eye1_pos, eye_size)
-        pygame.draw.circle(self.screen, (255, 255, 255), eye2_pos, eye_size)
-        pygame.draw.circle(self.screen, (0, 0, 0), eye1_pos, eye_size // 2)
-        pygame.draw.circle(self.screen, (0, 0, 0), eye2_pos, eye_size // 2)
-        
-        # 绘制身体部分
-        for i, (r, c) in enumerate(self.opponent_snake[1:]):
-            body_x = c * self.cell_size + self.border_size
-            body_y = r * self.cell_size + self.border_size
-            # 使用稍微浅一点的红色表示身体
-            body_color = (200, 50, 50)
-            pygame.draw.rect(self.screen, body_color, (body_x, body_y, self.cell_size, self.cell_size), border_radius=5)
-
-    # 绘制AI蛇（影子模式）
-    def draw_ai_3snake(self, ai_type):
+        # 身体使用稍微浅一点的红色
+        body = body_sprite(cell, "plain", (200, 50, 50))
+        sprites.extend((body, (c * cell + border, r * cell + border))
+                       for r, c in islice(self.opponent_snake, 1, None))
+        return sprites
+
+    # AI蛇的精灵图（影子模式）
+    def ai_3snake_sprites(self, ai_type):
         """
-        绘制AI蛇（影子模式）
+        返回绘制AI蛇（影子模式）的 (精灵图, 位置) 列表
         
         参数:
             ai_type: 'ai1' 或 'ai2'
         """
-        # 根据AI类型选择蛇的属性
+        # 根据AI类型选择蛇的属性：AI1蛇使用蓝色，AI2蛇使用紫色
         if ai_type == 'ai1':
             snake = self.ai1_snake
             direction = self.ai1_direction
-            # AI1蛇使用蓝色
-            head_color = (0, 150, 255)
             body_color = (0, 100, 255)
         else:  # ai2
             snake = self.ai2_snake
             direction = self.ai2_direction
-            # AI2蛇使用紫色
-            head_color = (150, 0, 255)
             body_color = (100, 0, 255)
-        
-        # 绘制蛇身
-        for i, (r, c) in enumerate(snake):
-            x = c * self.cell_size + self.border_size
-            y = r * self.cell_size + self.border_size
-            
-            # 蛇头特殊绘制
-            if i == 0:
-                # 绘制蛇头（多边形）
-                pygame.draw.polygon(self.screen, head_color, [
-                    (x + self.cell_size // 2, y),
-                    (x + self.cell_size, y + self.cell_size // 2),
-                    (x + self.cell_size // 2, y + self.cell_size),
-                    (x, y + self.cell_size // 2)
-                ])
-                
-                # 添加头部光泽效果
-                highlight_color = (min(head_color[0] + 40, 255), min(head_color[1] + 40, 255), min(head_color[2] + 40, 255))
-                highlight_points = [
-                    (x + self.cell_size // 2, y + self.cell_size // 5),
-                    (x + self.cell_size * 0.8, y + self.cell_size // 2),
-                    (x + self.cell_size // 2, y + self.cell_size * 0.4),
-                    (x + self.cell_size * 0.2, y + self.cell_size // 2)
-                ]
-                pygame.draw.polygon(self.screen, highlight_color, highlight_points)
-                
-                # 绘制眼睛（根据移动方向调整位置）
-                eye_size = max(2, self.cell_size // 12)
-                eye_offset = self.cell_size // 4
-                
-                if direction == "UP":
-                    eye1_pos = (x + eye_offset, y + eye_offset)
-                    eye2_pos = (x + self.cell_size - eye_offset, y + eye_offset)
-                elif direction == "DOWN":
-                    eye1_pos = (x + eye_offset, y + self.cell_size - eye_offset)
-                    eye2_pos = (x + self.cell_size - eye_offset, y + self.cell_size - eye_offset)
-                elif direction == "LEFT":
-                    eye1_pos = (x + eye_offset, y + eye_offset)
-                    eye2_pos = (x + eye_offset, y + self.cell_size - eye_offset)
-                else:  # RIGHT
-                    eye1_pos = (x + self.cell_size - eye_offset, y + eye_offset)
-                    eye2_pos = (x + self.cell_size - eye_offset, y + self.cell_size - eye_offset)
-                
-                # 绘制眼睛和瞳孔
-                pygame.draw.circle(self.screen, (255, 255, 255), eye1_pos, eye_size)
-                pygame.draw.circle(self.screen, (255, 255, 255), eye2_pos, eye_size)
-                pygame.draw.circle(self.screen, (0, 0, 0), eye1_pos, eye_size // 2)
-                pygame.draw.circle(self.screen, (0, 0, 0), eye2_pos, eye_size // 2)
-            else:
-                # 绘制蛇身
-                pygame.draw.rect(self.screen, body_color, (x, y, self.cell_size, self.cell_size), border_radius=5)
-        
-        # 绘制蛇身体（渐变效果）
-        snake_to_draw = self.ai1_snake if ai_type == 'ai1' else self.ai2_snake
-        for i, (r, c) in enumerate(snake_to_draw[1:]):
-            segment_x = c * self.cell_size + self.border_size
-            segment_y = r * self.cell_size + self.border_size
-            
-            # 根据位置计算渐变色（立方函数，更自然的过渡）
-            total_segments = len(snake_to_draw) - 1
-            if total_segments > 0:
-                progress = 1 - (i / total_segments)
-                # 使用立方函数让颜色变化更自然
-                progress_cubed = progress ** 3
-                
-                # 蓝色/紫色渐变：从头部附近的亮色到尾部的暗色
-                if ai_type == 'ai1':
-                    # 蓝色渐变
-                    blue_intensity = int(150 + 105 * progress_cubed)
-                    red_green = int(50 + 50 * progress_cubed)
-                else:
-                    # 紫色渐变
-                    red_intensity = int(100 + 100 * progress_cubed)
-                    blue_intensity = int(100 + 100 * progress_cubed)
-                    green_intensity = int(20 + 30 * progress_cubed)
-                
-                # 添加一点随机性使身体更有趣
-                random_offset = random.randint(-5, 5)
-                if ai_type == 'ai1':
-                    # 蓝色渐变颜色
-                    segment_color = (max(30, min(200, red_green + random_offset)), 
-                                    max(0, min(50, red_green + random_offset)), 
-                                    max(0, min(255, blue_intensity + random_offset)))
-                else:
-                    # 紫色渐变颜色
-                    segment_color = (max(30, min(200, red_intensity + random_offset)), 
-                                    max(0, min(50, green_intensity + random_offset)), 
-                                    max(0, min(200, blue_intensity + random_offset)))
-                
-                # 绘制带圆角的矩形身体
-                rect = pygame.Rect(segment_x + 2, segment_y + 2, 
-                                  self.cell_size - 4, self.cell_size - 4)
-                pygame.draw.rect(self.screen, segment_color, rect, border_radius=5)
-                
-                # 添加高光效果
-                highlight_rect = pygame.Rect(segment_x + 3, segment_y + 3, 
-                                          self.cell_size - 8, self.cell_size // 3)
-                highlight_color = (min(255, segment_color[0] + 40), 
-                                  min(255, segment_color[1] + 40), 
-                                  min(255, segment_color[2] + 40))
-                pygame.draw.rect(self.screen, highlight_color, highlight_rect, border_radius=2)
+
+        cell = self.cell_size
+        border = self.border_size
+        head_r, head_c = snake[0]
+        sprites = [(head_sprite(cell, ai_type, direction), (head_c * cell + border, head_r * cell + border))]
+
+        # 蛇身体（渐变效果）：从头部附近的亮色到尾部的暗色
+        body = list(islice(snake, 1, None))
+        total_segments = len(body)
+        for i, ((r, c), segment_color) in enumerate(zip(body, self.body_colors(ai_type, body))):
+            pos = (c * cell + border, r * cell + border)
+            sprites.append((body_sprite(cell, "shadow", segment_color, body_color), pos))
             
             # 尾部尖端处理
             if i == total_segments - 1 and total_segments > 1:
-                prev_r, prev_c = snake_to_draw[-2]
-                # 确定尾部方向
-                if prev_r < r:  # 尾部向下
-                    pygame.draw.polygon(self.screen, segment_color, [
-                        (segment_x + self.cell_size // 2, segment_y),
-                        (segment_x, segment_y + self.cell_size),
-                        (segment_x + self.cell_size, segment_y + self.cell_size)
-                    ])
-                elif prev_r > r:  # 尾部向上
-                    pygame.draw.polygon(self.screen, segment_color, [
-                        (segment_x + self.cell_size // 2, segment_y + self.cell_size),
-                        (segment_x, segment_y),
-                        (segment_x + self.cell_size, segment_y)
-                    ])
-                elif prev_c < c:  # 尾部向右
-                    pygame.draw.polygon(self.screen, segment_color, [
-                        (segment_x, segment_y + self.cell_size // 2),
-                        (segment_x + self.cell_size, segment_y),
-                        (segment_x + self.cell_size, segment_y + self.cell_size)
-                    ])
-                else:  # 尾部向左
-                    pygame.draw.polygon(self.screen, segment_color, [
-                        (segment_x + self.cell_size, segment_y + self.cell_size // 2),
-                        (segment_x, segment_y),
-                        (segment_x, segment_y + self.cell_size)
-                    ])
-            # 删除错误的眼睛绘制代码
-
-        # 绘制身体 - 使用渐变效果，与玩家蛇风格一致
-        # 这部分代码已经在上面实现，此处为重复代码，需要删除
-            
-            # 删除重复代码
+                sprites.append((tail_sprite(cell, "shadow", segment_color, tail_direction(snake[-2], (r, c))), pos))
+        return sprites
 
-    # 绘制玩家蛇（头、眼、身体渐变）
-    def draw_snake(self):
-        """绘制蛇（头、眼、身体渐变）"""
-        # 头坐标换算为像素
-        head_r, head_c = self.snake[0]
-        head_x = head_c * self.cell_size + self.border_size
-        head_y = head_r * self.cell_size + self.border_size
-
-        # 头（蓝色多边形）- 使用更深的蓝色，添加光泽效果
-        head_color = (80, 120, 255)
-        pygame.draw.polygon(self.screen, head_color, [
-            (head_x + self.cell_size // 2, head_y),
-            (head_x + self.cell_size, head_y + self.cell_size // 2),
-            (head_x + self.cell_size // 2, head_y + self.cell_size),
-            (head_x, head_y + self.cell_size // 2)
-        ])
-        
-        # 添加蛇头光泽效果
-        gloss_points = [
-            (head_x + self.cell_size // 3, head_y + self.cell_size // 4),
-            (head_x + self.cell_size // 2, head_y + self.cell_size // 3),
-            (head_x + 2 * self.cell_size // 3, head_y + self.cell_size // 4),
-            (head_x + self.cell_size // 2, head_y + self.cell_size // 2)
-        ]
-        pygame.draw.polygon(self.screen, (150, 180, 255), gloss_points)
+    # 蛇身各节的颜色
+    def body_colors(self, style, body):
+        """
+        用渐变色查找表加上各格子固定的纹理偏移计算蛇身各节的颜色（NumPy 向量运算）；
+        玩家蛇靠近头部的第一节不加纹理，使用带红蓝分量的亮绿色
 
-        # 眼睛 - 根据当前方向调整眼睛位置，增强视觉反馈
-        eye_size = max(3, self.cell_size // 6)
-        pupil_size = max(1, eye_size // 2)
-        eye_offset = self.cell_size // 4
-        
-        # 根据移动方向调整眼睛位置，让蛇看起来朝移动方向看
-        if self.direction == "UP":
-            eye_y_offset = -eye_offset
-            eye_x_offset1 = -eye_offset
-            eye_x_offset2 = eye_offset
-        elif self.direction == "DOWN":
-            eye_y_offset = eye_offset
-            eye_x_offset1 = -eye_offset
-            eye_x_offset2 = eye_offset
-        elif self.direction == "LEFT":
-            eye_x_offset1 = -eye_offset
-            eye_x_offset2 = -eye_offset
-            eye_y_offset1 = -eye_offset
-            eye_y_offset2 = eye_offset
-        else:  # RIGHT
-            eye_x_offset1 = eye_offset
-            eye_x_offset2 = eye_offset
-            eye_y_offset1 = -eye_offset
-            eye_y_offset2 = eye_offset
-        
-        # 绘制眼睛
-        if self.direction in ["LEFT", "RIGHT"]:
-            # 左眼
-            pygame.draw.circle(self.screen, (255, 255, 255), 
-                              (head_x + self.cell_size // 2 + eye_x_offset1, 
-                               head_y + self.cell_size // 2 + eye_y_offset1), 
-                              eye_size)
-            # 左眼瞳孔
-            pygame.draw.circle(self.screen, (0, 0, 0), 
-                              (head_x + self.cell_size // 2 + eye_x_offset1 + 
-                               (eye_x_offset1 // abs(eye_x_offset1) if eye_x_offset1 != 0 else 0) * 2, 
-                               head_y + self.cell_size // 2 + eye_y_offset1), 
-                              pupil_size)
-            # 右眼
-            pygame.draw.circle(self.screen, (255, 255, 255), 
-                              (head_x + self.cell_size // 2 + eye_x_offset2, 
-                               head_y + self.cell_size // 2 + eye_y_offset2), 
-                              eye_size)
-            # 右眼瞳孔
-            pygame.draw.circle(self.screen, (0, 0, 0), 
-                              (head_x + self.cell_size // 2 + eye_x_offset2 + 
-                               (eye_x_offset2 // abs(eye_x_offset2) if eye_x_offset2 != 0 else 0) * 2, 
-                               head_y + self.cell_size // 2 + eye_y_offset2), 
-                              pupil_size)
-        else:  # UP, DOWN
-            # 左眼
-            pygame.draw.circle(self.screen, (255, 255, 255), 
-                              (head_x + self.cell_size // 2 + eye_x_offset1, 
-                               head_y + self.cell_size // 2 + eye_y_offset), 
-                              eye_size)
-            # 左眼瞳孔
-            pygame.draw.circle(self.screen, (0, 0, 0), 
-                              (head_x + self.cell_size // 2 + eye_x_offset1, 
-                               head_y + self.cell_size // 2 + eye_y_offset + 
-                               (eye_y_offset // abs(eye_y_offset) if eye_y_offset != 0 else 0) * 2), 
-                              pupil_size)
-            # 右眼
-            pygame.draw.circle(self.screen, (255, 255, 255), 
-                              (head_x + self.cell_size // 2 + eye_x_offset2, 
-                               head_y + self.cell_size // 2 + eye_y_offset), 
-                              eye_size)
-            # 右眼瞳孔
-            pygame.draw.circle(self.screen, (0, 0, 0), 
-                              (head_x + self.cell_size // 2 + eye_x_offset2, 
-                               head_y + self.cell_size // 2 + eye_y_offset + 
-                               (eye_y_offset // abs(eye_y_offset) if eye_y_offset != 0 else 0) * 2), 
-                              pupil_size)
+        参数:
+            style: "player" / "ai1" / "ai2"
+            body: 身体各节的坐标列表（不含蛇头）
+
+        返回:
+            list: 各节颜色 (r, g, b)
+        """
+        if not body:
+            return []
+        n = self.board_size
+        ramp = snake_color_ramp(style, len(body))
+        low, high, scale = SNAKE_COLOR_LIMITS[style]
+        cells = np.fromiter((r * n + c for r, c in body), dtype=np.intp, count=len(body))
+        offsets = cell_texture(n)[cells] // scale
+        colors = np.clip(ramp + offsets[:, None], low, high)
+        if style == "player":
+            colors[0] = (50, ramp[0, 1], 50)
+        return [tuple(color) for color in colors.tolist()]
+
+    # 玩家蛇的精灵图（头、眼、身体渐变）
+    def snake_sprites(self):
+        """
+        返回绘制玩家蛇（头、眼、身体渐变）的 (精灵图, 位置) 列表
+
+        蛇头、各颜色的身体段和尾尖都是按格子大小缓存的精灵图，整条蛇只需一次 Surface.blits 调用
+        """
+        cell = self.cell_size
+        border = self.border_size
+        head_r, head_c = self.snake[0]
+        sprites = [(head_sprite(cell, "player", self.direction), (head_c * cell + border, head_r * cell + border))]
 
         # 身体渐变（增强视觉效果）
-        body_length = len(self.snake) - 1
-        for i, (r, c) in enumerate(self.snake[1:]):
-            body_x = c * self.cell_size + self.border_size
-            body_y = r * self.cell_size + self.border_size
-            
-            # 计算渐变颜色 - 更平滑的渐变效果
-            progress = i / max(body_length, 1)
-            # 使用立方函数使渐变更自然
-            green_intensity = int(255 - (155 * progress * progress * progress))
-            
-            # 根据不同部分使用微妙的颜色变化
-            if i == 0:  # 靠近头部的第一节
-                color = (50, green_intensity, 50)
-            else:
-                # 身体部分使用稍微不同的绿色色调
-                green_variation = random.randint(-15, 15)  # 添加一点随机性
-                color = (0, max(50, min(255, green_intensity + green_variation)), 0)
+        body = list(islice(self.snake, 1, None))
+        body_length = len(body)
+        for i, ((r, c), color) in enumerate(zip(body, self.body_colors("player", body))):
+            pos = (c * cell + border, r * cell + border)
+            sprites.append((body_sprite(cell, "player", color), pos))
             
-            # 绘制身体段，使用更大的圆角
-            pygame.draw.rect(self.screen, color, 
-                           (body_x, body_y, self.cell_size, self.cell_size), 
-                           border_radius=max(4, self.cell_size // 3))
-            
-            # 添加身体高光效果
-            highlight_rect = pygame.Rect(
-                body_x + self.cell_size // 4,
-                body_y + self.cell_size // 4,
-                self.cell_size // 2,
-                self.cell_size // 4
-            )
-            highlight_color = tuple(min(255, c + 30) for c in color)
-            pygame.draw.rect(self.screen, highlight_color, highlight_rect, border_radius=2)
-            
-            # 尾部特殊处理
-            if i == body_length - 1:
-                # 尾部尖端效果
-                tail_center_x = body_x + self.cell_size // 2
-                tail_center_y = body_y + self.cell_size // 2
-                # 确定尾部方向
-                if i > 0:
-                    prev_r, prev_c = self.snake[-2]
-                    if prev_r < r:  # 尾部向下
-                        pygame.draw.polygon(self.screen, color, [
-                            (tail_center_x - self.cell_size // 3, tail_center_y - self.cell_size // 4),
-                            (tail_center_x + self.cell_size // 3, tail_center_y - self.cell_size // 4),
-                            (tail_center_x, tail_center_y + self.cell_size // 2)
-                        ])
-                    elif prev_r > r:  # 尾部向上
-                        pygame.draw.polygon(self.screen, color, [
-                            (tail_center_x - self.cell_size // 3, tail_center_y + self.cell_size // 4),
-                            (tail_center_x + self.cell_size // 3, tail_center_y + self.cell_size // 4),
-                            (tail_center_x, tail_center_y - self.cell_size // 2)
-                        ])
-                    elif prev_c < c:  # 尾部向右
-                        pygame.draw.polygon(self.screen, color, [
-                            (tail_center_x - self.cell_size // 4, tail_center_y - self.cell_size // 3),
-                            (tail_center_x - self.cell_size // 4, tail_center_y + self.cell_size // 3),
-                            (tail_center_x + self.cell_size // 2, tail_center_y)
-                        ])
-                    elif prev_c > c:  # 尾部向左
-                        pygame.draw.polygon(self.screen, color, [
-                            (tail_center_x + self.cell_size // 4, tail_center_y - self.cell_size // 3),
-                            (tail_center_x + self.cell_size // 4, tail_center_y + self.cell_size // 3),
-                            (tail_center_x - self.cell_size // 2, tail_center_y)
-                        ])
+            # 尾部尖端效果
+            if i == body_length - 1 and i > 0:
+                sprites.append((tail_sprite(cell, "player", color, tail_direction(self.snake[-2], (r, c))), pos))
+        return sprites
 
     # 绘制右侧控制面板（玩家蛇信息、对抗蛇信息、AI连接按钮）
     def draw_side_panel(self, ai_connected, show_ai=True):
@@ -1636,615 +1096,211 @@ class SnakeGame:
         pygame.draw.rect(self.screen, (80, 80, 80), panel_bg_rect, border_radius=10, width=1)
 
         # 标题
-        title_surf = self.large_font.render("控制面板", True, (220, 220, 220))
+        title_surf = text_surface(self.large_font, "控制面板", True, (220, 220, 220))
         self.screen.blit(title_surf, (panel_x, panel_y))
 
         panel_y += 60
 
         # 玩家蛇信息
-        score_surf = self.font.render(f"玩家分数: {self.score}", True, (255, 255, 255))
+        score_surf = text_surface(self.font, f"玩家分数: {self.score}", True, (255, 255, 255))
         self.screen.blit(score_surf, (panel_x, panel_y))
         panel_y += 25
-        size_surf = self.font.render(f"蛇长: {len(self.snake)}", True, (255, 255, 255))
+        size_surf = text_surface(self.font, f"蛇长: {len(self.snake)}", True, (255, 255, 255))
         self.screen.blit(size_surf, (panel_x, panel_y))
         panel_y += 25
         
         # 显示当前等级/速度信息
         speed_level = max(1, int(self.speed / 5))
-        speed_surf = self.font.render(f"速度等级: {speed_level}", True, (200, 200, 255))
+        speed_surf = text_surface(self.font, f"速度等级: {speed_level}", True, (200, 200, 255))
         self.screen.blit(speed_surf, (panel_x, panel_y))
-        panel_y += 35
-
-        # 对抗模式信息（如果存在对抗蛇）
-        if hasattr(self, 'opponent_snake'):
-            # 显示对抗蛇分数和状态
-            opponent_status = "存活" if (not hasattr(self, 'opponent_dead') or not self.opponent_dead) else "已死亡"
-            opponent_status_color = (255, 100, 100) if opponent_status == "已死亡" else (200, 200, 200)
-            
-            opponent_title_surf = self.font.render("对抗蛇信息:", True, (220, 100, 100))
-            self.screen.blit(opponent_title_surf, (panel_x, panel_y))
-            panel_y += 25
-            
-            # 对抗蛇分数
-            opponent_score = getattr(self, 'opponent_score', 0)
-            opponent_score_surf = self.font.render(f"分数: {opponent_score}", True, (255, 255, 255))
-            self.screen.blit(opponent_score_surf, (panel_x + 10, panel_y))
-            panel_y += 25
-            
-            # 对抗蛇状态
-            opponent_status_surf = self.font.render(f"状态: {opponent_status}", True, opponent_status_color)
-            self.screen.blit(opponent_status_surf, (panel_x + 10, panel_y))
-            panel_y += 35
-
-        # 只在普通模式下显示AI相关内容
-        if show_ai:
-            # AI 状态显示
-            status_text = "已连接" if ai_connected else "已断开"
-            status_color = (100, 255, 100) if ai_connected else (255, 100, 100)
-            status_surf = self.font.render(f"AI 状态: {status_text}", True, status_color)
-            self.screen.blit(status_surf, (panel_x, panel_y))
-            panel_y += 40
-
-            # 绘制按钮（Connect/Disconnect）- 改进视觉效果
-            self.ai_button_rect = pygame.Rect(panel_x, panel_y, 160, 36)
-            mouse_pos = pygame.mouse.get_pos()
-            hovering = self.ai_button_rect.collidepoint(mouse_pos)
-            
-            # 按钮背景和边框效果
-            bg_color = (100, 180, 255) if ai_connected else (100, 255, 150)
-            hover_color = (150, 210, 255) if ai_connected else (150, 255, 200)
-            border_color = (200, 200, 200)
-            
-            button_color = hover_color if hovering else bg_color
-            pygame.draw.rect(self.screen, button_color, self.ai_button_rect, border_radius=8)
-            pygame.draw.rect(self.screen, border_color, self.ai_button_rect, border_radius=8, width=2)
-            
-            # 按钮文字
-            btn_text = "断开 AI" if ai_connected else "接通 AI"
-            btn_surf = self.font.render(btn_text, True, (20, 20, 20))
-            btn_rect = btn_surf.get_rect(center=self.ai_button_rect.center)
-            self.screen.blit(btn_surf, btn_rect)
-
-    # 绘制游戏界面（棋盘 + 右侧面板）
-    def render(self, ai_connected=False, draw_opponent=False, show_ai=True):
-        """综合绘制函数：棋盘 + 右侧面板"""
-        self.draw_board(draw_opponent)
-        self.draw_side_panel(ai_connected, show_ai)
-        pygame.display.flip()
-
-    # 判断鼠标是否在矩形区域内
-    def is_mouse_on_rect(self, rect):
-        """判断鼠标是否在给定 rect 上（rect 为 pygame.Rect）"""
-        return rect.collidepoint(pygame.mouse.get_pos())
-
-
-# ---------------------------
-# AI 行为接口
-# ---------------------------
-def get_ai_action(game, is_opponent=False):
-    """
-    智能AI策略：支持控制对抗蛇
-    优化版本：集成A*搜索、智能空间评估、循环检测和长期生存策略
-    对抗模式增强：添加攻击玩家、包围、食物竞争和防御策略
-    is_opponent: True=控制红色对抗蛇，False=控制绿色玩家蛇
-    """
-    # 根据控制对象选择蛇的信息
-    if is_opponent:
-        snake = game.opponent_snake
-        direction = game.opponent_direction
-        # 使用现有的opponent_snake_set提高性能
-        if hasattr(game, 'opponent_snake_set'):
-            body = game.opponent_snake_set
-        else:
-            body = set(snake)
-        # 获取对抗蛇特定的信息
-        if hasattr(game, 'opponent_score'):
-            score = game.opponent_score
-        else:
-            score = len(snake) - 3  # 默认初始长度为3
-        
-        # 获取玩家蛇信息（对抗模式特有）
-        if hasattr(game, 'snake'):
-            player_snake = game.snake
-            player_head = player_snake[0] if player_snake else None
-            player_body = set(player_snake) if player_snake else set()
-        else:
-            player_snake = []
-            player_head = None
-            player_body = set()
-    else:
-        snake = game.snake
-        direction = game.direction
-        # 使用现有的snake_set提高性能
-        if hasattr(game, 'snake_set'):
-            body = game.snake_set
-        else:
-            body = set(snake)
-        score = game.score
-        
-        # 非对抗模式时初始化玩家相关变量
-        player_snake = []
-        player_head = None
-        player_body = set()
-    
-
-
-    head = snake[0]
-    food = game.food
-    board = game.board_size
-    snake_length = len(snake)
-    
-    # 计算游戏进度百分比
-    board_area = board * board
-    game_progress = snake_length / board_area
-
-    # 方向映射
-    dirs = {
-        0: (-1, 0),  # 上
-        1: (0, -1),  # 左
-        2: (0, 1),   # 右
-        3: (1, 0)    # 下
-    }
-
-    # 方向名称映射
-    dir_names = {
-        0: "UP",
-        1: "LEFT",
-        2: "RIGHT",
-        3: "DOWN"
-    }
-
-    opposite = {"UP": 3, "DOWN": 0, "LEFT": 2, "RIGHT": 1}
-    opposite_dir = opposite.get(direction, -1)  # 使用对应蛇的当前方向
-
-    # 检查位置是否有效
-    def is_valid(pos):
-        r, c = pos
-        return 0 <= r < board and 0 <= c < board and (r, c) not in body
-    
-    # 曼哈顿距离计算
-    def manhattan_dist(pos1, pos2):
-        return abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1])
-    
-    # 欧几里得距离计算
-    def euclidean_dist(pos1, pos2):
-        return ((pos1[0] - pos2[0]) ** 2 + (pos1[1] - pos2[1]) ** 2) ** 0.5
-    
-    # ----------------------------------------------------------------------
-    # � A*搜索算法：更智能的路径规划
-    # ----------------------------------------------------------------------
-    def a_star_path(start, goal):
-        """优化版A*搜索算法：限制搜索范围，使用更高效的数据结构，支持障碍物检测"""
-        # 快速检查目标是否已被占据
-        if goal in body:
-            return None, float('inf')
-            
-        # 如果起点就是终点
-        if start == goal:
-            return [], 0
-        
-        # 优化：限制搜索深度，避免在复杂情况下无限搜索
-        max_search_steps = min(board * board // 2, 1000)
-        search_steps = 0
-        
-        # 开放列表和关闭列表 - 使用集合加速检查
-        open_set = []
-        open_positions = set()  # 额外集合用于快速检查
-        heapq.heappush(open_set, (0, start))
-        open_positions.add(start)
-        
-        came_from = {}
-        g_score = {start: 0}  # 从起点到当前点的实际代价
-        f_score = {start: manhattan_dist(start, goal)}  # 使用优化的距离函数
-        
-        # 优化：预计算方向列表
-        dir_list = list(dirs.items())
-        
-        while open_set and search_steps < max_search_steps:
-            search_steps += 1
-            _, current = heapq.heappop(open_set)
-            open_positions.remove(current)
-            
-            if current == goal:
-                # 重建路径
-                path = []
-                while current in came_from:
-                    prev_pos, dir_taken = came_from[current]
-                    path.append(dir_taken)
-                    current = prev_pos
-                path.reverse()
-                return path, g_score[goal]
-            
-            # 优化：游戏后期减少搜索分支
-            dirs_to_check = dir_list
-            if game_progress > 0.6:
-                # 只检查较少的方向，优先选择朝向食物的方向
-                hx, hy = current
-                fx, fy = goal
-                preferred_dirs = []
-                if hx > fx: preferred_dirs.append((0, (-1, 0)))
-                if hx < fx: preferred_dirs.append((3, (1, 0)))
-                if hy > fy: preferred_dirs.append((1, (0, -1)))
-                if hy < fy: preferred_dirs.append((2, (0, 1)))
-                
-                # 最多检查3个方向
-                dirs_to_check = preferred_dirs[:3] if preferred_dirs else dir_list[:3]
-            
-            for d, (dr, dc) in dirs_to_check:
-                r, c = current
-                neighbor = (r + dr, c + dc)
-                
-                if 0 <= neighbor[0] < board and 0 <= neighbor[1] < board and neighbor not in body:
-                    tentative_g_score = g_score[current] + 1
-                    
-                    # 优化：动态启发式因子，基于游戏进度
-                    heuristic_factor = 1.0 - min(0.5, game_progress * 0.5)
-                    
-                    if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
-                        came_from[neighbor] = (current, d)
-                        g_score[neighbor] = tentative_g_score
-                        f_score[neighbor] = tentative_g_score + heuristic_factor * manhattan_dist(neighbor, goal)
-                        
-                        # 优化：使用集合快速检查
-                        if neighbor not in open_positions:
-                            heapq.heappush(open_set, (f_score[neighbor], neighbor))
-                            open_positions.add(neighbor)
-        
-        return None, float('inf')
-    
-    # ----------------------------------------------------------------------
-    # 🏃 智能空间评估：考虑蛇身体增长后的安全空间
-    # ----------------------------------------------------------------------
-    def advanced_flood_fill(start):
-        """
-        优化版洪水填充算法，评估移动方向的安全性，支持障碍物检测
-        增加：搜索深度限制、提前剪枝、更高效的评分计算
-        """
-        # 快速检查起点是否有效
-        if start in body or not (0 <= start[0] < board and 0 <= start[1] < board):
-            return 1  # 返回最小值
-            
-        q = deque([start])
-        seen = {start}
-        
-        # 记录每个位置到起点的距离
-        distance_map = {start: 0}
-        
-        # 优化：限制搜索深度，避免在大棋盘上过度计算
-        max_search_nodes = min(board * board // 2, 500)
-        nodes_count = 0
-        
-        # 优化：预计算方向列表
-        dir_values = list(dirs.values())
-        
-        # 计算空间的连通性指标
-        while q and nodes_count < max_search_nodes:
-            nodes_count += 1
-            r, c = q.popleft()
-            
-            # 优化：游戏后期优先探索远离边界的方向
-            if game_progress > 0.5:
-                # 按距离边界远近排序方向
-                dir_with_priority = []
-                for dr, dc in dir_values:
-                    nr, nc = r + dr, c + dc
-                    new_pos = (nr, nc)
-                    if (0 <= nr < board and 0 <= nc < board and 
-                        new_pos not in body and new_pos not in seen):
-                        # 计算到边界的距离作为优先级
-                        border_dist = min(nr, board - 1 - nr, nc, board - 1 - nc)
-                        dir_with_priority.append((-border_dist, dr, dc))  # 负号使距离大的排在前面
-                
-                # 按优先级排序
-                dir_with_priority.sort()
-                directions_to_check = [(dr, dc) for _, dr, dc in dir_with_priority]
-            else:
-                directions_to_check = dir_values
-            
-            for dr, dc in directions_to_check:
-                nr, nc = r + dr, c + dc
-                new_pos = (nr, nc)
-                if (0 <= nr < board and 0 <= nc < board and 
-                    new_pos not in body and new_pos not in seen):
-                    seen.add(new_pos)
-                    distance_map[new_pos] = distance_map[(r, c)] + 1
-                    q.append(new_pos)
-        
-        # 优化：提前计算分数所需的关键指标
-        seen_size = len(seen)
-        if seen_size == 0:
-            return 1
-        
-        # 计算平均距离（优化：避免重复计算）
-        avg_distance = sum(distance_map.values()) / seen_size
-        
-        # 优化边界检测：只计算必要的边界位置
-        boundary_count = 0
-        border_threshold = 1
-        
-        # 游戏后期调整边界阈值
-        if game_progress > 0.7:
-            border_threshold = 2
-        
-        # 快速边界检测
-        for pos in seen:
-            if (pos[0] <= border_threshold or pos[0] >= board - border_threshold - 1 or 
-                pos[1] <= border_threshold or pos[1] >= board - border_threshold - 1):
-                boundary_count += 1
-        
-        boundary_ratio = boundary_count / seen_size
-        
-        # 优化评分计算
-        if game_progress > 0.6:
-            # 游戏后期更看重空间大小和安全性
-            safety_factor = 1.0 - boundary_ratio
-            return max(1, int(seen_size * 2 * safety_factor))
-        else:
-            # 综合评分：空间大小 * 平均距离 * (1 - 边界接近度)
-            score = seen_size * avg_distance * (1 - boundary_ratio)
-            return max(1, score)
-    
-    # ----------------------------------------------------------------------
-    # 🔄 循环检测：避免蛇在小区域内原地绕圈
-    # ----------------------------------------------------------------------
-    def detect_cycle(pos):
-        """优化版循环检测算法，更高效地识别绕圈行为"""
-        # 如果蛇很短，不可能形成循环
-        if snake_length < 8:  # 降低阈值以便更早检测
-            return False
-        
-        # 获取位置历史记录
-        recent_positions = getattr(game, 'recent_positions', None)
-        if not recent_positions or len(recent_positions) < 12:  # 降低历史长度要求
-            return False
-        
-        # 优化1：使用集合快速统计唯一位置数量
-        recent_10_pos = list(recent_positions)[-10:]
-        unique_pos_count = len(set(recent_10_pos))
-        
-        # 如果唯一位置太少，可能在绕圈
-        if unique_pos_count <= 4:  # 更宽松的阈值，提高检测敏感度
-            return True
-        
-        # 优化2：计算最近位置的平均距离（优化计算方式）
-        if len(recent_positions) > 15:
-            # 只计算最近的8个位置与当前位置的距离
-            recent_8_pos = list(recent_positions)[-8:]
-            total_dist = 0
-            for old_pos in recent_8_pos:
-                total_dist += manhattan_dist(pos, old_pos)
-            avg_dist = total_dist / 8
-            
-            # 游戏后期更严格地检测
-            threshold = 3.0
-            if game_progress > 0.6:
-                threshold = 2.5
-            
-            if avg_dist < threshold:
-                return True
-        
-        # 优化3：检测方向变化模式
-        if len(recent_positions) >= 15:
-            # 检查是否在进行频繁的U形转弯
-            direction_changes = 0
-            positions = list(recent_positions)[-15:]
-            
-            for i in range(2, len(positions)):
-                # 计算连续两步的方向
-                prev_dir = (positions[i-1][0] - positions[i-2][0], 
-                           positions[i-1][1] - positions[i-2][1])
-                curr_dir = (positions[i][0] - positions[i-1][0], 
-                           positions[i][1] - positions[i-1][1])
-                
-                # 检查是否反向
-                if (prev_dir[0] == -curr_dir[0] and prev_dir[1] == -curr_dir[1]):
-                    direction_changes += 1
-                    # 如果短时间内多次反向，立即判定为循环
-                    if direction_changes >= 2:
-                        return True
-        
-        return False
-    
-    # 初始化或更新蛇的位置历史记录
-    if not hasattr(game, 'recent_positions'):
-        game.recent_positions = deque(maxlen=30)  # 减少历史记录长度，节省内存
-    game.recent_positions.append(head)
-    
-    # ----------------------------------------------------------------------
-    # 🔍 评估所有可能的移动方向
-    # ----------------------------------------------------------------------
-    def evaluate_directions():
-        direction_scores = {}
-        hx, hy = head
-        
-        for d, (dr, dc) in dirs.items():
-            nr, nc = hx + dr, hy + dc
-            new_pos = (nr, nc)
-            
-            # 跳过反向和无效方向
-            if d == opposite_dir or not is_valid(new_pos):
-                direction_scores[d] = -1
-                continue
-            
-            # 循环惩罚
-            if detect_cycle(new_pos):
-                cycle_penalty = 0.3  # 降低可能导致循环的方向的评分
-            else:
-                cycle_penalty = 1.0
-            
-            # 计算方向评分
-            score = 0
-            
-            # 基础策略评分
+        panel_y += 35
+
+        # 对抗模式信息（如果存在对抗蛇）
+        if hasattr(self, 'opponent_snake'):
+            # 显示对抗蛇分数和状态
+            opponent_status = "存活" if (not hasattr(self, 'opponent_dead') or not self.opponent_dead) else "已死亡"
+            opponent_status_color = (255, 100, 100) if opponent_status == "已死亡" else (200, 200, 200)
             
-            # 1. 空间安全评分
-            space_score = advanced_flood_fill(new_pos)
-            score += space_score * 0.4  # 空间安全权重
+            opponent_title_surf = text_surface(self.font, "对抗蛇信息:", True, (220, 100, 100))
+            self.screen.blit(opponent_title_surf, (panel_x, panel_y))
+            panel_y += 25
             
-            # 2. 食物接近度评分
-            dist_to_food = manhattan_dist(new_pos, food)
-            # 距离越近分数越高，但使用非线性关系
-            food_score = 100 / (dist_to_food + 1)
-            score += food_score * 0.3  # 食物接近度权重
+            # 对抗蛇分数
+            opponent_score = getattr(self, 'opponent_score', 0)
+            opponent_score_surf = text_surface(self.font, f"分数: {opponent_score}", True, (255, 255, 255))
+            self.screen.blit(opponent_score_surf, (panel_x + 10, panel_y))
+            panel_y += 25
             
-            # 3. 边界远离度评分（越远离边界越安全）
-            border_dist = min(nr, board - 1 - nr, nc, board - 1 - nc)
-            border_score = border_dist * 10
-            score += border_score * 0.2  # 边界远离度权重
+            # 对抗蛇状态
+            opponent_status_surf = text_surface(self.font, f"状态: {opponent_status}", True, opponent_status_color)
+            self.screen.blit(opponent_status_surf, (panel_x + 10, panel_y))
+            panel_y += 35
+
+        # 只在普通模式下显示AI相关内容
+        if show_ai:
+            # AI 状态显示
+            status_text = "已连接" if ai_connected else "已断开"
+            status_color = (100, 255, 100) if ai_connected else (255, 100, 100)
+            status_surf = text_surface(self.font, f"AI 状态: {status_text}", True, status_color)
+            self.screen.blit(status_surf, (panel_x, panel_y))
+            panel_y += 40
+
+            # 绘制按钮（Connect/Disconnect）- 改进视觉效果
+            self.ai_button_rect = pygame.Rect(panel_x, panel_y, 160, 36)
+            mouse_pos = pygame.mouse.get_pos()
+            hovering = self.ai_button_rect.collidepoint(mouse_pos)
             
-            # 4. 移动多样性评分（避免一直朝一个方向移动）
-            if hasattr(game, 'previous_directions') and len(game.previous_directions) > 3:
-                if d == game.previous_directions[-1] == game.previous_directions[-2]:
-                    direction_penalty = 0.7  # 连续多次同一方向会被惩罚
-                else:
-                    direction_penalty = 1.0
-            else:
-                direction_penalty = 1.0
+            # 按钮背景和边框效果
+            bg_color = (100, 180, 255) if ai_connected else (100, 255, 150)
+            hover_color = (150, 210, 255) if ai_connected else (150, 255, 200)
+            border_color = (200, 200, 200)
             
-            # 对抗模式特有策略（当is_opponent=True时）
-            if is_opponent and player_head:
-                
-                # 5. 玩家攻击策略：尝试攻击玩家蛇头
-                player_attack_bonus = 0
-                dist_to_player = manhattan_dist(new_pos, player_head)
-                
-                # 如果距离玩家蛇头很近，给予攻击奖励
-                if dist_to_player <= 2:
-                    # 计算是否可以在下一步或两步内攻击到玩家
-                    if dist_to_player == 1:
-                        player_attack_bonus = 300  # 直接攻击奖励
-                    elif dist_to_player == 2:
-                        player_attack_bonus = 150  # 接近攻击奖励
-                
-                # 6. 包围策略：尝试切断玩家蛇的路径
-                encircle_bonus = 0
-                # 计算玩家蛇的可能移动方向
-                if len(player_snake) > 1:
-                    player_body_set = player_body
-                    # 如果新位置可以切断玩家到食物的路径，给予奖励
-                    player_to_food_path, _ = a_star_path(player_head, food)
-                    if player_to_food_path and new_pos in [
-                        (player_head[0] + dr, player_head[1] + dc) 
-                        for dr, dc in dirs.values()
-                    ]:
-                        encircle_bonus = 100
-                
-                # 7. 防御策略：避免被玩家包围
-                defense_bonus = 0
-                # 计算玩家蛇头与对抗蛇头的位置关系
-                if len(player_snake) > 5 and dist_to_player < 5:
-                    # 检查是否处于被包围的风险
-                    if space_score < 20:
-                        defense_bonus = 50  # 在被包围风险下优先逃跑
-                
-                # 8. 食物竞争策略：当食物靠近时优先获取
-                food_competition_bonus = 0
-                if dist_to_food < manhattan_dist(player_head, food):
-                    food_competition_bonus = 80  # 比玩家更接近食物时的奖励
-                
-                # 9. 避免撞玩家蛇：给予玩家蛇身体更大的避让权重
-                avoid_player_penalty = 1.0
-                if new_pos in player_body:
-                    direction_scores[d] = -1
-                    continue
-                # 检查下一步是否靠近玩家蛇身体
-                for p_pos in player_body:
-                    if manhattan_dist(new_pos, p_pos) == 1:
-                        avoid_player_penalty = 0.5
-                        break
-                
-                # 根据游戏状态调整权重
-                current_weight = 0.1  # 默认权重较低
-                
-                # 根据分数差距调整攻击性
-                player_score = len(player_snake) - 3 if player_snake else 0
-                score_diff = score - player_score
-                
-                if score_diff > 5:  # 对抗蛇领先时，更注重防御
-                    current_weight = 0.1
-                elif score_diff < -5:  # 对抗蛇落后时，更注重攻击
-                    current_weight = 0.3
-                else:  # 势均力敌时，平衡策略
-                    current_weight = 0.2
-                
-                # 应用对抗模式策略评分
-                score += (player_attack_bonus + encircle_bonus + 
-                         defense_bonus + food_competition_bonus) * current_weight
-                cycle_penalty *= avoid_player_penalty
+            button_color = hover_color if hovering else bg_color
+            pygame.draw.rect(self.screen, button_color, self.ai_button_rect, border_radius=8)
+            pygame.draw.rect(self.screen, border_color, self.ai_button_rect, border_radius=8, width=2)
             
-            # 综合所有评分
-            final_score = score * cycle_penalty * direction_penalty
-            direction_scores[d] = final_score
-        
-        return direction_scores
-    
-    # ----------------------------------------------------------------------
-    # � 主决策逻辑
-    # ----------------------------------------------------------------------
-    # 1. 首先尝试A*找食物路径
-    path_to_food, path_length = a_star_path(head, food)
-    
-    # 如果有到食物的安全路径，且不会导致立即危险
-    if path_to_food and path_to_food[0] != opposite_dir:
-        # 检查路径第一步是否安全（空间足够）
-        hx, hy = head
-        dr, dc = dirs[path_to_food[0]]
-        next_pos = (hx + dr, hy + dc)
-        
-        # 计算吃完食物后的预期空间
-        # 模拟吃完食物后的身体状态（假设身体变长）
-        if hasattr(game, 'simulate_growth'):
-            future_space = game.simulate_growth(next_pos)
+            # 按钮文字
+            btn_text = "断开 AI" if ai_connected else "接通 AI"
+            btn_surf = text_surface(self.font, btn_text, True, (20, 20, 20))
+            btn_rect = btn_surf.get_rect(center=self.ai_button_rect.center)
+            self.screen.blit(btn_surf, btn_rect)
+
+    # 右侧控制面板占用的屏幕区域
+    def side_panel_rect(self):
+        """返回右侧控制面板的区域（从面板左边缘到窗口右边缘，容纳超出面板背景的长文字）"""
+        left = self.width + self.border_size + 10
+        return pygame.Rect(left, self.border_size, self.display_width - left, 400)
+
+    # 要求下一次 render 完整重绘
+    def invalidate_frame(self):
+        """其他界面（欢迎、暂停、结束、倒计时）覆盖了屏幕之后调用，下一次 render 完整重绘并 flip"""
+        self._last_frame = None
+
+    # 绘制游戏界面（棋盘 + 右侧面板）
+    def render(self, ai_connected=False, draw_opponent=False, show_ai=True, show_panel=True, overlays=()):
+        """
+        综合绘制函数：棋盘 + 右侧面板 + 叠加层，并刷新到窗口
+
+        dirty_rendering 为 True 时只重绘并提交变化的区域（pygame.display.update(rects)）：
+        与上一帧比较各精灵图及其位置，新出现或消失的精灵图所在区域先用静态棋盘层擦除，
+        再按原顺序补画与之相交的精灵图；面板显示的数值或按钮悬停状态变化时才重绘面板。
+        第一帧、窗口尺寸变化或 invalidate_frame 之后完整重绘并 flip。
+
+        参数:
+            ai_connected: AI 是否已连接（面板显示）
+            draw_opponent: 是否绘制对抗蛇
+            show_ai: 面板是否显示 AI 状态和按钮
+            show_panel: 是否绘制右侧面板
+            overlays: 画在最上层的 (surface, 位置) 列表（如计时、回放进度），参与变化比较
+        """
+        layer = self.board_layer()
+        sprites = self.board_sprites(draw_opponent)
+        sprites.extend(overlays)
+        size = self.screen.get_size()
+
+        panel_state = None
+        if show_panel:
+            button = getattr(self, 'ai_button_rect', None)
+            panel_state = (self.score, len(self.snake), self.speed, hasattr(self, 'opponent_snake'),
+                           getattr(self, 'opponent_score', 0), getattr(self, 'opponent_dead', False),
+                           ai_connected, show_ai,
+                           show_ai and button is not None and button.collidepoint(pygame.mouse.get_pos()))
+
+        last_frame = self._last_frame
+        drawn = set(sprites)
+        self._last_frame = (size, drawn, panel_state)
+        if not self.dirty_rendering or last_frame is None or last_frame[0] != size:
+            # 完整重绘
+            self.screen.blit(layer, (0, 0))
+            if show_panel:
+                self.draw_side_panel(ai_connected, show_ai)
+            self.screen.blits(sprites, doreturn=False)
+            pygame.display.flip()
+            return
+
+        # 新出现和消失的精灵图所在区域，先恢复为静态棋盘层
+        screen = self.screen
+        _, last_drawn, last_panel_state = last_frame
+        rects = [surf.get_rect(topleft=pos) for surf, pos in drawn.symmetric_difference(last_drawn)]
+        for rect in rects:
+            screen.blit(layer, rect, rect)
+
+        # 面板内容变化或被擦除时整体重绘
+        if show_panel:
+            panel_rect = self.side_panel_rect()
+            if panel_state != last_panel_state or panel_rect.collidelist(rects) != -1:
+                screen.blit(layer, panel_rect, panel_rect)
+                self.draw_side_panel(ai_connected, show_ai)
+                rects.append(panel_rect)
+
+        # 在每个变化区域内按原顺序补画与之相交的精灵图
+        if rects:
+            sprite_rects = [surf.get_rect(topleft=pos) for surf, pos in sprites]
+            for rect in rects:
+                screen.set_clip(rect)
+                screen.blits([sprites[i] for i in rect.collidelistall(sprite_rects)], doreturn=False)
+            screen.set_clip(None)
+            pygame.display.update(rects)
+
+    # 判断鼠标是否在矩形区域内
+    def is_mouse_on_rect(self, rect):
+        """判断鼠标是否在给定 rect 上（rect 为 pygame.Rect）"""
+        return rect.collidepoint(pygame.mouse.get_pos())
+
+
+# ---------------------------
+# 游戏循环调度
+# ---------------------------
+class FixedTimestep:
+    """
+    固定时间步长调度器：逻辑更新的步长由 snake_speed（每步秒数）决定，与渲染帧率无关。
+
+    每帧调用 ticks() 取得本帧应执行的逻辑步数：用单调时钟把经过的时间累加到累加器中，
+    每满一个步长执行一步；卡顿后最多补 max_catch_up 步，更早积压的时间直接丢弃，
+    避免恢复后蛇瞬间连走很多格。sleep() 在下一步到期前让出 CPU，代替固定的 clock.tick。
+    """
+
+    def __init__(self, interval, max_catch_up=3, frame_time=1 / 60):
+        """
+        参数:
+            interval: 逻辑步长（秒），即 game_config["snake_speed"]
+            max_catch_up: 每帧最多补执行的步数
+            frame_time: 两次检查之间最长的等待时间（秒），决定输入和动画的响应速度
+        """
+        self.interval = interval
+        self.max_catch_up = max_catch_up
+        self.frame_time = frame_time
+        self.reset()
+
+    def reset(self):
+        """重新开始计时，丢弃累计的时间（开始游戏、暂停或停留在菜单时调用）"""
+        self._last = time.monotonic()
+        self._accumulator = 0.0
+
+    def ticks(self):
+        """返回本帧应执行的逻辑步数（0 ~ max_catch_up）"""
+        now = time.monotonic()
+        self._accumulator += now - self._last
+        self._last = now
+        ticks = int(self._accumulator // self.interval)
+        if ticks > self.max_catch_up:
+            ticks = self.max_catch_up
+            self._accumulator = 0.0
         else:
-            # 简化版：当前空间评估
-            future_space = advanced_flood_fill(next_pos)
-        
-        # 如果吃完食物后仍有足够空间，就去吃
-        min_safe_space = max(10, snake_length // 2)  # 最小安全空间
-        if future_space > min_safe_space:
-            # 记录方向历史
-            if not hasattr(game, 'previous_directions'):
-                game.previous_directions = deque(maxlen=10)
-            game.previous_directions.append(path_to_food[0])
-            return path_to_food[0]
-    
-    # 2. 如果没有直接路径或路径不安全，评估所有方向
-    direction_scores = evaluate_directions()
-    
-    # 找到评分最高的方向
-    valid_directions = [(score, d) for d, score in direction_scores.items() if score > 0]
-    
-    if valid_directions:
-        # 按评分排序
-        valid_directions.sort(reverse=True, key=lambda x: x[0])
-        
-        # 选择最高分方向，但添加一些随机性以避免陷入局部最优
-        best_score = valid_directions[0][0]
-        # 找出所有接近最高分的方向（允许5%的误差）
-        candidates = [d for score, d in valid_directions if score >= best_score * 0.95]
-        
-        # 从候选方向中随机选择（增加探索性）
-        chosen_dir = random.choice(candidates)
-        
-        # 记录方向历史
-        if not hasattr(game, 'previous_directions'):
-            game.previous_directions = deque(maxlen=10)
-        game.previous_directions.append(chosen_dir)
-        
-        return chosen_dir
-    
-    # 3. 实在无路：随机选一条不反向的安全路
-    safe_moves = []
-    for d, (dr, dc) in dirs.items():
-        nr, nc = hx + dr, hy + dc
-        if is_valid((nr, nc)) and d != opposite_dir:
-            safe_moves.append(d)
-    
-    if safe_moves:
-        return random.choice(safe_moves)
-    
-    # 4. 没路就随机（必死）
-    return random.choice([0, 1, 2, 3])
+            self._accumulator -= ticks * self.interval
+        return ticks
+
+    def sleep(self):
+        """等待到下一步到期，但不超过 frame_time"""
+        remaining = self.interval - self._accumulator - (time.monotonic() - self._last)
+        delay = min(remaining, self.frame_time)
+        if delay > 0:
+            time.sleep(delay)
+
+
+# 方向键（含 WASD）对应的动作编号
+KEY_ACTIONS = {pygame.K_UP: 0, pygame.K_w: 0, pygame.K_LEFT: 1, pygame.K_a: 1,
+               pygame.K_RIGHT: 2, pygame.K_d: 2, pygame.K_DOWN: 3, pygame.K_s: 3}
 
 
 # ---------------------------
@@ -2265,18 +1321,19 @@ def init_game(mode="normal"):
     game.enable_sound = game_config["enable_sound"]
     game.food_value = game_config["food_value"]
     game.enable_border = game_config["enable_border"]
+    game.ai_difficulty = game_config.get("ai_difficulty", "medium")  # 决定 AI 每步的计算预算
+    game.replay_dir = game_config.get("replay_dir")  # 录像目录，None 表示不录制
+    game.dirty_rendering = game_config.get("dirty_rendering", False)
     game.mode = mode  # 记录当前游戏模式
+    if game.replay_dir is not None:
+        game.reset()  # 构造时的第一局尚未启用录像，重新开始以便录制
     return game
 
 # 绘制通用欢迎界面
 def draw_welcome_screen(game, title, intro_texts, title_color, title_shadow_color):
     """绘制通用欢迎界面"""
     # 绘制深蓝色渐变背景
-    for y in range(game.display_height):
-        r = int(0)
-        g = int(10)
-        b = int(30 - 20 * y / game.display_height)
-        pygame.draw.line(game.screen, (r, g, b), (0, y), (game.display_width, y))
+    game.screen.blit(gradient_surface(game.display_width, game.display_height, (0, 10, 30), (0, 0, -20)), (0, 0))
         
     center_x = game.display_width // 2
     margin_top = 60  # 顶部边距
@@ -2284,19 +1341,19 @@ def draw_welcome_screen(game, title, intro_texts, title_color, title_shadow_colo
     btn_margin_top = 50  # 按钮与文字间距
 
     # 标题 - 使用大字体和指定颜色
-    title_surf = game.large_font.render(title, True, title_color)
+    title_surf = text_surface(game.large_font, title, True, title_color)
     title_rect = title_surf.get_rect(center=(center_x, margin_top + title_surf.get_height() // 2))
     
     # 标题阴影效果
     shadow_offset = 2
     shadow_surf = pygame.Surface(title_surf.get_size(), pygame.SRCALPHA)
-    shadow_surf.blit(game.large_font.render(title, True, title_shadow_color), (0, 0))
+    shadow_surf.blit(text_surface(game.large_font, title, True, title_shadow_color), (0, 0))
     game.screen.blit(shadow_surf, (title_rect.x + shadow_offset, title_rect.y + shadow_offset))
     game.screen.blit(title_surf, title_rect)
 
     # 绘制介绍文本
     for i, text in enumerate(intro_texts):
-        text_surf = game.font.render(text, True, (200, 200, 200))
+        text_surf = text_surface(game.font, text, True, (200, 200, 200))
         text_rect = text_surf.get_rect(center=(center_x, title_rect.bottom + spacing + i * (text_surf.get_height() + 10)))
         game.screen.blit(text_surf, text_rect)
     
@@ -2304,14 +1361,14 @@ def draw_welcome_screen(game, title, intro_texts, title_color, title_shadow_colo
     btn_width, btn_height = 200, 60
     btn_rect = pygame.Rect(0, 0, btn_width, btn_height)
     btn_rect.centerx = game.display_width // 2
-    btn_rect.top = title_rect.bottom + spacing + len(intro_texts) * (game.font.render("", True, (0,0,0)).get_height() + 10) + btn_margin_top
+    btn_rect.top = title_rect.bottom + spacing + len(intro_texts) * (game.font.get_height() + 10) + btn_margin_top
     
     # 绘制按钮
     pygame.draw.rect(game.screen, title_color, btn_rect, border_radius=10)
     pygame.draw.rect(game.screen, title_shadow_color, btn_rect, 3, border_radius=10)
     
     # 按钮文字
-    btn_text = game.font.render("开始游戏", True, (255, 255, 255))
+    btn_text = text_surface(game.font, "开始游戏", True, (255, 255, 255))
     btn_text_rect = btn_text.get_rect(center=btn_rect.center)
     game.screen.blit(btn_text, btn_text_rect)
     
@@ -2324,7 +1381,7 @@ def handle_countdown(game, countdown_snd, seconds=3):
     """处理倒计时动画"""
     for i in range(seconds, 0, -1):
         game.screen.fill((0, 0, 0))
-        cnt_surf = game.large_font.render(str(i), True, (255, 255, 255))
+        cnt_surf = text_surface(game.large_font, str(i), True, (255, 255, 255))
         game.screen.blit(cnt_surf, (game.display_width // 2 - cnt_surf.get_width() // 2,
                                     game.display_height // 2 - cnt_surf.get_height() // 2))
         pygame.display.flip()
@@ -2354,7 +1411,7 @@ def draw_button(game, x, y, width, height, text, normal_color, hover_color, bord
     pygame.draw.rect(game.screen, hover_border_color if is_hovered else border_color, button_rect, 2, border_radius=10)
     
     # 绘制文本
-    btn_text = game.font.render(text, True, (255, 255, 255))
+    btn_text = text_surface(game.font, text, True, (255, 255, 255))
     text_rect = btn_text.get_rect(center=button_rect.center)
     game.screen.blit(btn_text, text_rect)
     
@@ -2410,11 +1467,10 @@ def handle_game_over_events(game, events):
 def main_normal():
     """普通模式主函数：玩家可自行控制或AI接管"""
     game = init_game("normal")
-    clock = pygame.time.Clock()
-    update_interval = 0.15  # 略微提高游戏更新频率，提升流畅度
-    last_update = time.time()
+    ai_worker = AIWorker()  # 后台线程预先计算 AI 的下一步
+    scheduler = FixedTimestep(game.snake_speed)  # 逻辑步长由 snake_speed 决定
+    pending_actions = deque(maxlen=3)  # 尚未执行的方向键输入，每次逻辑更新取一个
     
-    action = -1
     game_state = "welcome"  # 初始游戏状态：欢迎界面
     ai_connected = False    # AI 开关（由右侧按钮控制）
     ai_control = False      # 当前是否由 AI 控制
@@ -2442,18 +1498,18 @@ def main_normal():
         btn_spacing = 10
 
         # 标题
-        title = game.large_font.render("游戏结束", True, (255, 255, 255))
+        title = text_surface(game.large_font, "游戏结束", True, (255, 255, 255))
         title_rect = title.get_rect(center=(game.display_width // 2, margin_top))
         game.screen.blit(title, title_rect)
 
         # 分数显示
-        score_text = game.font.render(f"最终分数: {game.score}", True, (200, 200, 200))
+        score_text = text_surface(game.font, f"最终分数: {game.score}", True, (200, 200, 200))
         score_rect = score_text.get_rect(center=(game.display_width // 2, title_rect.bottom + spacing))
         game.screen.blit(score_text, score_rect)
 
         # 蛇身长度
         length = len(game.snake)
-        length_text = game.font.render(f"蛇身长度: {length} 格", True, (200, 255, 200))
+        length_text = text_surface(game.font, f"蛇身长度: {length} 格", True, (200, 255, 200))
         length_rect = length_text.get_rect(center=(game.display_width // 2, score_rect.bottom + spacing // 2))
         game.screen.blit(length_text, length_rect)
 
@@ -2521,10 +1577,14 @@ def main_normal():
 
         pygame.display.flip()
 
-    # 主循环
+    # 主循环：逻辑按固定步长更新，画面只在状态变化、有输入或有动画时重绘
+    needs_render = True
     running = True
     while running:
         for event in pygame.event.get():
+            # 任何输入都可能改变画面（按钮悬停、暂停菜单等）
+            needs_render = True
+
             # 退出
             if event.type == pygame.QUIT:
                 running = False
@@ -2539,7 +1599,7 @@ def main_normal():
                             center_x, center_y = game.display_width // 2, game.display_height // 2
                             for i in range(1, 0, -1):
                                 game.screen.fill((0, 0, 0))
-                                cnt_surf = game.large_font.render(str(i), True, (255, 255, 255))
+                                cnt_surf = text_surface(game.large_font, str(i), True, (255, 255, 255))
                                 cnt_rect = cnt_surf.get_rect(center=(center_x, center_y))
                                 game.screen.blit(cnt_surf, cnt_rect)
                                 pygame.display.flip()
@@ -2549,9 +1609,9 @@ def main_normal():
                                     except:
                                         pass  # 静默失败
                                 pygame.time.wait(700)
-                            action = -1
+                            pending_actions.clear()
                             game_state = "running"
-                            last_update = time.time()
+                            scheduler.reset()
 
                 # 游戏结束界面按钮点击
                 elif game_state == "game_over":
@@ -2562,10 +1622,11 @@ def main_normal():
                     if result == "retry":
                         # 使用通用倒计时函数
                         handle_countdown(game, countdown_snd, 1)
+                        ai_worker.cancel()
                         game.reset()
-                        action = -1
+                        pending_actions.clear()
                         game_state = "running"
-                        last_update = time.time()
+                        scheduler.reset()
                         # 开始播放背景音乐
                         game.play_bgm()
                     elif result == "menu":
@@ -2588,136 +1649,68 @@ def main_normal():
                 if event.key == pygame.K_ESCAPE:
                     # 切换暂停状态
                     game.toggle_pause()
-                # 玩家控制优先级高于AI控制
-                # 当玩家按下方向键时，立即执行移动并重置AI控制标志
+                # 玩家控制优先级高于AI控制：按下方向键时收回控制权，
                 # 同时设置ai_connected = False，使AI状态显示从绿色变为红色
-                elif event.key == pygame.K_UP:
-                    action = 0
-                    ai_control = False  # 确保玩家按下方向键时获得控制权
-                    ai_connected = False  # 自动禁用AI连接，使状态显示为红色
-                elif event.key == pygame.K_LEFT:
-                    action = 1
-                    ai_control = False
-                    ai_connected = False
-                elif event.key == pygame.K_RIGHT:
-                    action = 2
-                    ai_control = False
-                    ai_connected = False
-                elif event.key == pygame.K_DOWN:
-                    action = 3
-                    ai_control = False
-                    ai_connected = False
-                # WASD键控制
-                elif event.key == pygame.K_w:
-                    action = 0
-                    ai_control = False  # 确保玩家按下方向键时获得控制权
-                    ai_connected = False  # 自动禁用AI连接，使状态显示为红色
-                elif event.key == pygame.K_a:
-                    action = 1
-                    ai_control = False
-                    ai_connected = False
-                elif event.key == pygame.K_d:
-                    action = 2
-                    ai_control = False
-                    ai_connected = False
-                elif event.key == pygame.K_s:
-                    action = 3
+                elif event.key in KEY_ACTIONS:
+                    # 方向键进入输入队列，由下一次逻辑更新执行（同一步内连续转向按顺序生效）
+                    pending_actions.append(KEY_ACTIONS[event.key])
                     ai_control = False
                     ai_connected = False
-                # 按键后立即执行移动，不等待更新周期
-                if event.key in [pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT, 
-                                pygame.K_w, pygame.K_s, pygame.K_a, pygame.K_d]:
-                    # 立即执行移动
-                    done, info = game.step(action)
-                    # 只有在非暂停状态下才渲染
-                    if not game.paused:
-                        game.render(ai_connected, draw_opponent=False, show_ai=True)
-                    # 重置动作，避免连续移动
-                    action = -1
                 elif event.key == pygame.K_x:
                     # 切换 AI 控制
                     ai_control = not ai_control
                     if ai_control:
                         ai_connected = True
 
-        # 游戏运行状态
-        if game_state == "welcome":
-            draw_welcome()
-            pygame.display.flip()  # 确保欢迎界面正确显示
-            clock.tick(20)
-            continue
-        if game_state == "game_over":
-            draw_game_over()
-            pygame.display.flip()  # 确保游戏结束界面正确显示
-            clock.tick(20)
-            continue
-        
-        # 如果是running状态，确保始终有渲染（即使不在更新间隔）
-        if game_state == "running":
-            # 暂停状态下不渲染游戏画面，只在更新逻辑中渲染暂停菜单
-            if not game.paused:
-                game.render(ai_connected, draw_opponent=False, show_ai=True)
-                pygame.display.flip()  # 确保所有渲染内容显示到屏幕
-
-        # 游戏步骤更新
-        now = time.time()
-        if now - last_update >= update_interval:
-            last_update = now  # 更新时间
-            
-            if game_state == "running":
-                # 检查暂停状态
-                if game.paused:
-                    # 暂停状态下降低渲染频率，减少闪烁
-                    # 初始化last_pause_update变量（如果不存在）
-                    if 'last_pause_update' not in locals():
-                        last_pause_update = now
-                    if now - last_pause_update >= 0.05:  # 每50毫秒更新一次
-                        last_pause_update = now
-                        # 获取鼠标位置
-                        mouse_pos = pygame.mouse.get_pos()
-                        # 绘制暂停菜单
-                        game.draw_pause_menu(mouse_pos)
-                        pygame.display.flip()
-                    continue
-                
-                # 玩家控制绿色蛇
-                # 即使没有新的键盘输入，蛇也会保持当前方向移动
+        # 游戏步骤更新（暂停或不在游戏中时不累计逻辑时间）
+        if game_state == "running" and not game.paused:
+            for _ in range(scheduler.ticks()):
                 if ai_connected and ai_control:
-                    # 只在AI控制时调用get_ai_action
-                    chosen_action = get_ai_action(game, is_opponent=False)
+                    # 只在AI控制时取出后台线程预先算好的动作
+                    chosen_action = ai_worker.take(game, is_opponent=False)
                 else:
-                    # 对于玩家控制，action为-1时保持当前方向
-                    chosen_action = action
-                
+                    # 玩家控制：没有新的按键时保持当前方向
+                    ai_worker.cancel()
+                    chosen_action = pending_actions.popleft() if pending_actions else -1
+
                 # 执行游戏步骤
                 done, info = game.step(chosen_action)
-                
-                # 只有当游戏未结束且未暂停时才渲染
-                if not done and not game.paused:
-                    game.render(ai_connected, draw_opponent=False, show_ai=True)
-                
-                # 重置玩家动作，这样蛇会继续按照当前方向移动
-                # 只有当玩家按下方向键时，action才会改变
-                action = -1
+                needs_render = True
 
-            # 检查游戏结束状态
-            if done:
-                game_state = "game_over"
-                # 保存游戏结束时间，用于固定显示时长
-                game.game_end_time = time.time()
-                # 保存游戏结束时间，用于固定显示时长
-                game.game_end_time = time.time()
-                # 保存游戏结束时间，用于固定显示时长
-                game.game_end_time = time.time()
-                # 保存游戏结束时间，用于固定显示时长
-                game.game_end_time = time.time()
-                # 保存游戏结束时间，用于固定显示时长
-                game.game_end_time = time.time()
-                # 保存游戏结束时间，用于固定显示时长
-                game.game_end_time = time.time()
+                if done:
+                    game_state = "game_over"
+                    # 保存游戏结束时间，用于固定显示时长
+                    game.game_end_time = time.time()
+                    break
 
-        clock.tick(60)
+                # 本步提交后立即在后台计算下一步
+                if ai_connected and ai_control:
+                    ai_worker.submit(game, is_opponent=False)
+        else:
+            scheduler.reset()
+
+        # 绘制当前界面
+        if needs_render or game.is_animating():
+            needs_render = False
+            # 欢迎、结束和暂停界面覆盖整个窗口，回到游戏画面时需要完整重绘
+            if game_state == "welcome":
+                draw_welcome()
+                pygame.display.flip()
+                game.invalidate_frame()
+            elif game_state == "game_over":
+                draw_game_over()
+                game.invalidate_frame()
+            elif game.paused:
+                game.draw_pause_menu(pygame.mouse.get_pos())
+                pygame.display.flip()
+                game.invalidate_frame()
+            else:
+                game.render(ai_connected, draw_opponent=False, show_ai=True)
+
+        scheduler.sleep()
 
+    ai_worker.close()
+    game.finish_replay()  # 中途退出时保存未结束的录像
     pygame.quit()
     sys.exit()
 
@@ -2737,27 +1730,23 @@ def main_three_snake():
     game.enable_sound = game_config["enable_sound"]
     game.food_value = game_config["food_value"]
     game.enable_border = game_config["enable_border"]
+    game.ai_difficulty = game_config.get("ai_difficulty", "medium")  # 决定 AI 每步的计算预算
+    game.replay_dir = game_config.get("replay_dir")  # 录像目录，None 表示不录制
+    game.dirty_rendering = game_config.get("dirty_rendering", False)
 
     # 初始化影子模式游戏状态
     game.reset_three_snake_mode()
 
     # 初始化
-    clock = pygame.time.Clock()
-    update_interval = 0.2  # 游戏更新间隔（秒）
-    last_update = time.time()
-
-    action = -1
+    scheduler = FixedTimestep(game.snake_speed)  # 逻辑步长由 snake_speed 决定
+    pending_actions = deque(maxlen=3)  # 尚未执行的方向键输入，每次逻辑更新取一个
     game_state = "welcome"  # 初始游戏状态：欢迎界面
     countdown_snd = game.sound_count
     
     # 绘制欢迎界面的函数
     def draw_welcome():
         # 绘制深蓝色渐变背景
-        for y in range(game.display_height):
-            r = int(0)
-            g = int(10)
-            b = int(30 - 20 * y / game.display_height)
-            pygame.draw.line(game.screen, (r, g, b), (0, y), (game.display_width, y))
+        game.screen.blit(gradient_surface(game.display_width, game.display_height, (0, 10, 30), (0, 0, -20)), (0, 0))
             
         center_x = game.display_width // 2
         margin_top = 60  # 顶部边距
@@ -2765,14 +1754,14 @@ def main_three_snake():
         btn_margin_top = 50  # 按钮与文字间距
 
         # 标题 - 使用大字体和紫色（影子模式主题色）
-        title = game.large_font.render("贪吃蛇游戏 - 影子模式", True, (220, 70, 220))
+        title = text_surface(game.large_font, "贪吃蛇游戏 - 影子模式", True, (220, 70, 220))
         title_rect = title.get_rect(center=(center_x, margin_top + title.get_height() // 2))
         
         # 标题阴影效果
         shadow_offset = 2
         shadow_surf = pygame.Surface(title.get_size())
         shadow_surf.fill((0, 0, 0, 0))
-        shadow_surf.blit(game.large_font.render("贪吃蛇游戏 - 影子模式", True, (180, 50, 180)), (0, 0))
+        shadow_surf.blit(text_surface(game.large_font, "贪吃蛇游戏 - 影子模式", True, (180, 50, 180)), (0, 0))
         game.screen.blit(shadow_surf, (title_rect.x + shadow_offset, title_rect.y + shadow_offset))
         game.screen.blit(title, title_rect)
 
@@ -2785,7 +1774,7 @@ def main_three_snake():
         
         # 绘制介绍文本
         for i, text in enumerate(intro_texts):
-            text_surf = game.font.render(text, True, (200, 200, 200))
+            text_surf = text_surface(game.font, text, True, (200, 200, 200))
             text_rect = text_surf.get_rect(center=(center_x, title_rect.bottom + spacing + i * (text_surf.get_height() + 10)))
             game.screen.blit(text_surf, text_rect)
         
@@ -2793,26 +1782,27 @@ def main_three_snake():
         btn_width, btn_height = 200, 60
         btn_rect = pygame.Rect(0, 0, btn_width, btn_height)
         btn_rect.centerx = game.display_width // 2
-        btn_rect.top = title_rect.bottom + spacing + len(intro_texts) * (game.font.render("", True, (0,0,0)).get_height() + 10) + btn_margin_top
+        btn_rect.top = title_rect.bottom + spacing + len(intro_texts) * (game.font.get_height() + 10) + btn_margin_top
         
         # 绘制按钮
         pygame.draw.rect(game.screen, (220, 70, 220), btn_rect, border_radius=10)
         pygame.draw.rect(game.screen, (180, 50, 180), btn_rect, 3, border_radius=10)
         
         # 按钮文字
-        btn_text = game.font.render("开始游戏", True, (255, 255, 255))
+        btn_text = text_surface(game.font, "开始游戏", True, (255, 255, 255))
         btn_text_rect = btn_text.get_rect(center=btn_rect.center)
         game.screen.blit(btn_text, btn_text_rect)
         
         # 保存按钮位置用于点击检测
         game.start_button_rect = btn_rect
     
-    # 主游戏循环 - 统一处理所有游戏状态
+    # 主游戏循环 - 统一处理所有游戏状态（逻辑按固定步长更新，画面只在需要时重绘）
+    needs_render = True
     while True:
-        current_time = time.time()
-        
         # 事件处理 - 对所有状态通用
         for event in pygame.event.get():
+            # 任何输入都可能改变画面（按钮悬停、暂停菜单等）
+            needs_render = True
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
@@ -2827,7 +1817,7 @@ def main_three_snake():
                                 countdown_snd.play()
                             except Exception:
                                 pass
-                        last_update = time.time()
+                        scheduler.reset()
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     # 检测开始按钮点击
                     if hasattr(game, 'start_button_rect') and game.start_button_rect.collidepoint(event.pos):
@@ -2837,27 +1827,18 @@ def main_three_snake():
                                 countdown_snd.play()
                             except Exception:
                                 pass
-                        last_update = time.time()
+                        scheduler.reset()
             
             # 游戏运行状态事件处理
             elif game_state == "running":
-                # 获取鼠标位置（用于暂停菜单）
-                mouse_pos = pygame.mouse.get_pos()
-                
                 if event.type == pygame.KEYDOWN:
                     # 暂停/继续游戏
                     if event.key == pygame.K_ESCAPE:
                         game.toggle_pause()
-                    # 方向控制（只在非暂停状态下有效）
+                    # 方向控制（只在非暂停状态下有效，由下一次逻辑更新执行）
                     elif not game.paused:
-                        if event.key in [pygame.K_UP, pygame.K_w]:
-                            action = 0  # UP
-                        elif event.key in [pygame.K_LEFT, pygame.K_a]:
-                            action = 1  # LEFT
-                        elif event.key in [pygame.K_RIGHT, pygame.K_d]:
-                            action = 2  # RIGHT
-                        elif event.key in [pygame.K_DOWN, pygame.K_s]:
-                            action = 3  # DOWN
+                        if event.key in KEY_ACTIONS:
+                            pending_actions.append(KEY_ACTIONS[event.key])
                     elif event.key == pygame.K_q:
                         pygame.quit()
                         main_gui()
@@ -2872,8 +1853,8 @@ def main_three_snake():
                         # 重新开始
                         game.reset_three_snake_mode()
                         game_state = "running"
-                        action = -1  # 重置动作
-                        last_update = time.time()
+                        pending_actions.clear()  # 清空输入
+                        scheduler.reset()
                     elif event.key == pygame.K_m:
                         # 返回菜单
                         pygame.quit()
@@ -2912,8 +1893,8 @@ def main_three_snake():
                     if retry_button_rect.collidepoint(event.pos):
                         game.reset_three_snake_mode()
                         game_state = "running"
-                        action = -1  # 重置动作
-                        last_update = time.time()
+                        pending_actions.clear()  # 清空输入
+                        scheduler.reset()
                     elif menu_button_rect.collidepoint(event.pos):
                         pygame.quit()
                         main_gui()
@@ -2922,47 +1903,39 @@ def main_three_snake():
                         pygame.quit()
                         sys.exit()
         
-        # 根据当前游戏状态执行相应逻辑
-        if game_state == "welcome":
-            # 绘制欢迎界面
-            draw_welcome()
-            pygame.display.flip()
-        
-        elif game_state == "running":
-            # 检查暂停状态
-            if game.paused:
-                # 暂停状态下降低渲染频率，减少闪烁
-                if 'last_pause_update' not in locals():
-                    last_pause_update = current_time  # 初始化变量
-                if current_time - last_pause_update >= 0.05:  # 每50毫秒更新一次
-                    last_pause_update = current_time
-                    # 获取鼠标位置
-                    mouse_pos = pygame.mouse.get_pos()
-                    # 绘制暂停菜单
-                    game.draw_pause_menu(mouse_pos)
-                    pygame.display.flip()
-                continue
-            
-            # 游戏逻辑更新
-            if current_time - last_update >= update_interval:
+        # 游戏逻辑更新（暂停或不在游戏中时不累计逻辑时间）
+        if game_state == "running" and not game.paused:
+            for _ in range(scheduler.ticks()):
+                action = pending_actions.popleft() if pending_actions else -1
                 done, info = game.step_three_snake_mode(action)
-                action = -1  # 重置动作
-                last_update = current_time
-                
+                needs_render = True
                 if done:
                     game_state = "game_over"
-            
-            # 绘制游戏界面
-            game.draw_board()
-            pygame.display.flip()
-        
-        elif game_state == "game_over":
-            # 绘制游戏结束界面
-            game.draw_game_over_screen()
-            pygame.display.flip()
+                    break
+        else:
+            scheduler.reset()
+
+        # 根据当前游戏状态绘制界面
+        if needs_render or game.is_animating():
+            needs_render = False
+            # 欢迎、结束和暂停界面覆盖整个窗口，回到游戏画面时需要完整重绘
+            if game_state == "welcome":
+                draw_welcome()
+                pygame.display.flip()
+                game.invalidate_frame()
+            elif game_state == "game_over":
+                game.draw_game_over_screen()
+                pygame.display.flip()
+                game.invalidate_frame()
+            elif game.paused:
+                game.draw_pause_menu(pygame.mouse.get_pos())
+                pygame.display.flip()
+                game.invalidate_frame()
+            else:
+                game.render(show_panel=False)
         
-        # 控制帧率
-        clock.tick(60)
+        # 等待下一帧
+        scheduler.sleep()
 
 # 对抗模式
 def main_opponent():
@@ -2980,16 +1953,19 @@ def main_opponent():
     game.enable_sound = game_config["enable_sound"]
     game.food_value = game_config["food_value"]
     game.enable_border = game_config["enable_border"]
+    game.ai_difficulty = game_config.get("ai_difficulty", "medium")  # 决定 AI 每步的计算预算
+    game.replay_dir = game_config.get("replay_dir")  # 录像目录，None 表示不录制
+    game.dirty_rendering = game_config.get("dirty_rendering", False)
 
     # 初始化对抗模式游戏状态
     game.reset_opponent_mode()
 
     # 初始化
-    clock = pygame.time.Clock()
-    update_interval = 0.2  # 游戏更新间隔（秒）
-    last_update = time.time()
-
-    action = -1
+    # 后台线程预先计算对抗蛇的下一步（opponent_ai 为 "rollout" 时使用蒙特卡洛模拟策略）
+    opponent_policy = get_rollout_ai_action if game_config.get("opponent_ai") == "rollout" else None
+    ai_worker = AIWorker(opponent_policy)
+    scheduler = FixedTimestep(game.snake_speed)  # 逻辑步长由 snake_speed 决定
+    pending_actions = deque(maxlen=3)  # 尚未执行的方向键输入，每次逻辑更新取一个
     game_state = "welcome"  # 初始游戏状态：欢迎界面
     countdown_snd = game.sound_count
 
@@ -3001,14 +1977,14 @@ def main_opponent():
         btn_margin_top = 60  # 按钮与文字间距
 
         # 标题
-        title = game.large_font.render("对抗模式", True, (255, 255, 255))
+        title = text_surface(game.large_font, "对抗模式", True, (255, 255, 255))
         title_rect = title.get_rect(center=(game.display_width // 2, margin_top + title.get_height() // 2))
         game.screen.blit(title, title_rect)
 
         # 信息文本
-        info1 = game.font.render("方向键或WASD控制绿色蛇（↑↓←→ / W A S D）", True, (200, 200, 200))
-        info2 = game.font.render("小心红色AI蛇！碰到就会死亡！", True, (200, 200, 200))
-        info3 = game.font.render("目标：达到1000积分！", True, (200, 200, 200))
+        info1 = text_surface(game.font, "方向键或WASD控制绿色蛇（↑↓←→ / W A S D）", True, (200, 200, 200))
+        info2 = text_surface(game.font, "小心红色AI蛇！碰到就会死亡！", True, (200, 200, 200))
+        info3 = text_surface(game.font, "目标：达到1000积分！", True, (200, 200, 200))
         game.screen.blit(info1, (game.display_width // 2 - info1.get_width() // 2, title_rect.bottom + spacing))
         game.screen.blit(info2, (game.display_width // 2 - info2.get_width() // 2, title_rect.bottom + spacing + info1.get_height() + 5))
         game.screen.blit(info3, (game.display_width // 2 - info3.get_width() // 2, title_rect.bottom + spacing + info1.get_height() + info2.get_height() + 10))
@@ -3020,7 +1996,7 @@ def main_opponent():
         btn_rect.top = title_rect.bottom + spacing + info1.get_height() + info2.get_height() + info3.get_height() + btn_margin_top
         pygame.draw.rect(game.screen, (100, 100, 100), btn_rect, border_radius=6)
 
-        text_s = game.font.render("开始游戏", True, (255, 255, 255))
+        text_s = text_surface(game.font, "开始游戏", True, (255, 255, 255))
         text_rect = text_s.get_rect(center=btn_rect.center)
         game.screen.blit(text_s, text_rect)
 
@@ -3030,11 +2006,7 @@ def main_opponent():
     # 游戏结束界面
     def draw_game_over():
         # 绘制深蓝色渐变背景
-        for y in range(game.display_height):
-            r = int(0)
-            g = int(10)
-            b = int(30 - 20 * y / game.display_height)
-            pygame.draw.line(game.screen, (r, g, b), (0, y), (game.display_width, y))
+        game.screen.blit(gradient_surface(game.display_width, game.display_height, (0, 10, 30), (0, 0, -20)), (0, 0))
             
         margin_top = 60
         spacing = 35
@@ -3051,8 +2023,8 @@ def main_opponent():
             shadow_color = (150, 150, 150) # 灰色阴影
             
         # 标题阴影效果
-        title_shadow = game.large_font.render(title_text, True, shadow_color)
-        title = game.large_font.render(title_text, True, title_color)
+        title_shadow = text_surface(game.large_font, title_text, True, shadow_color)
+        title = text_surface(game.large_font, title_text, True, title_color)
         title_rect = title.get_rect(center=(game.display_width // 2, margin_top))
         
         # 绘制阴影和标题
@@ -3061,17 +2033,17 @@ def main_opponent():
         game.screen.blit(title, title_rect)
 
         # 分数显示 - 使用更醒目的颜色和更大的字体
-        score_text = game.font.render(f"最终分数: {game.score}", True, (255, 255, 150))
+        score_text = text_surface(game.font, f"最终分数: {game.score}", True, (255, 255, 150))
         score_rect = score_text.get_rect(center=(game.display_width // 2, title_rect.bottom + spacing))
         
         # 分数阴影效果
-        score_shadow = game.font.render(f"最终分数: {game.score}", True, (150, 150, 50))
+        score_shadow = text_surface(game.font, f"最终分数: {game.score}", True, (150, 150, 50))
         game.screen.blit(score_shadow, (score_rect.x + 1, score_rect.y + 1))
         game.screen.blit(score_text, score_rect)
 
         # 蛇身长度 - 使用绿色系
         length = len(game.snake)
-        length_text = game.font.render(f"蛇身长度: {length} 格", True, (150, 255, 150))
+        length_text = text_surface(game.font, f"蛇身长度: {length} 格", True, (150, 255, 150))
         length_rect = length_text.get_rect(center=(game.display_width // 2, score_rect.bottom + spacing // 2))
         game.screen.blit(length_text, length_rect)
         
@@ -3087,14 +2059,14 @@ def main_opponent():
             minutes = int(game_duration // 60)
             seconds = int(game_duration % 60)
             stats_text = f"游戏时长: {minutes}分{seconds}秒"
-            stats_surf = game.font.render(stats_text, True, (200, 200, 255))
+            stats_surf = text_surface(game.font, stats_text, True, (200, 200, 255))
             stats_rect = stats_surf.get_rect(center=(game.display_width // 2, length_rect.bottom + spacing // 2))
             game.screen.blit(stats_surf, stats_rect)
 
         # 死亡原因 - 使用红色系突出显示
         reason_rect = None
         if hasattr(game, 'death_reason') and game.death_reason:
-            reason_text = game.font.render(f"死亡原因: {game.death_reason}", True, (255, 150, 150))
+            reason_text = text_surface(game.font, f"死亡原因: {game.death_reason}", True, (255, 150, 150))
             # 根据前面是否有统计信息调整位置
             if stats_rect:
                 reason_rect = reason_text.get_rect(center=(game.display_width // 2, stats_rect.bottom + spacing // 2))
@@ -3170,10 +2142,14 @@ def main_opponent():
         draw_game_over_screen(game, pygame.mouse.get_pos(), 200, 50, 15, btn_margin_top)
         pygame.display.flip()
 
-    # 主循环
+    # 主循环：逻辑按固定步长更新，画面只在状态变化、有输入或有动画时重绘
+    needs_render = True
     running = True
     while running:
         for event in pygame.event.get():
+            # 任何输入都可能改变画面（按钮悬停、暂停菜单等）
+            needs_render = True
+
             # 退出
             if event.type == pygame.QUIT:
                 running = False
@@ -3187,7 +2163,7 @@ def main_opponent():
                         # 倒计时 1 秒
                         for i in range(1, 0, -1):
                             game.screen.fill((0, 0, 0))
-                            cnt_surf = game.large_font.render(str(i), True, (255, 255, 255))
+                            cnt_surf = text_surface(game.large_font, str(i), True, (255, 255, 255))
                             game.screen.blit(cnt_surf, (game.display_width // 2 - cnt_surf.get_width() // 2,
                                                         game.display_height // 2 - cnt_surf.get_height() // 2))
                             pygame.display.flip()
@@ -3197,9 +2173,9 @@ def main_opponent():
                                 except:
                                     pass
                             pygame.time.wait(700)
-                        action = -1
+                        pending_actions.clear()
                         game_state = "running"
-                        last_update = time.time()
+                        scheduler.reset()
 
                 # 游戏结束界面按钮点击
                 elif game_state == "game_over":
@@ -3208,10 +2184,11 @@ def main_opponent():
                     if result == "retry":
                         # 使用通用倒计时函数
                         handle_countdown(game, countdown_snd, 1)
+                        ai_worker.cancel()
                         game.reset_opponent_mode()  # 使用对抗模式专用的重置方法
-                        action = -1
+                        pending_actions.clear()
                         game_state = "running"
-                        last_update = time.time()
+                        scheduler.reset()
                         # 开始播放背景音乐
                         game.play_bgm()
                     elif result == "menu":
@@ -3228,28 +2205,10 @@ def main_opponent():
                 if event.key == pygame.K_ESCAPE:
                     # 切换暂停状态
                     game.toggle_pause()
-                # 方向控制（只在非暂停状态下有效）
+                # 方向控制（只在非暂停状态下有效，由下一次逻辑更新执行）
                 elif not game.paused:
-                    # 修复重复的键位检查
-                    if event.key == pygame.K_UP or event.key == pygame.K_w:
-                        action = 0
-                    elif event.key == pygame.K_LEFT or event.key == pygame.K_a:
-                        action = 1
-                    elif event.key == pygame.K_RIGHT or event.key == pygame.K_d:
-                        action = 2
-                    elif event.key == pygame.K_DOWN or event.key == pygame.K_s:
-                        action = 3
-                    
-                    # 按键后立即执行移动，不等待更新间隔
-                    if action != -1:
-                        # 立即执行玩家动作
-                        game.step_opponent_mode(action)
-                        # 只有在非暂停状态下才渲染
-                        if not game.paused:
-                            # 立即渲染画面
-                            game.render(ai_connected=False, draw_opponent=True, show_ai=False)
-                        # 重置动作以避免连续移动
-                        action = -1
+                    if event.key in KEY_ACTIONS:
+                        pending_actions.append(KEY_ACTIONS[event.key])
                 elif event.key == pygame.K_q:
                     # Q键退出游戏
                     pygame.quit()
@@ -3257,73 +2216,72 @@ def main_opponent():
             
             # 暂停状态下不处理鼠标点击事件，暂停/恢复仅通过ESC键控制
 
-        # 游戏运行状态
-        if game_state == "welcome":
-            draw_welcome()
-            pygame.display.flip()  # 确保欢迎界面内容显示
-            clock.tick(20)
-            continue
-        if game_state == "game_over":
-            draw_game_over()
-            pygame.display.flip()  # 确保游戏结束界面内容显示
-            clock.tick(20)
-            continue
-
-        # 游戏步骤更新
-        now = time.time()
-        if now - last_update >= update_interval:
-            last_update = now  # 更新时间
-            
-            if game_state == "running":
-                # 检查暂停状态
-                if game.paused:
-                    # 暂停状态下降低渲染频率，减少闪烁
-                    if 'last_pause_update' not in locals():
-                        last_pause_update = now  # 初始化变量
-                    if now - last_pause_update >= 0.05:  # 每50毫秒更新一次
-                        last_pause_update = now
-                        # 获取鼠标位置
-                        mouse_pos = pygame.mouse.get_pos()
-                        # 绘制暂停菜单
-                        game.draw_pause_menu(mouse_pos)
-                        pygame.display.flip()
-                    continue
-                
-                # 玩家控制绿色蛇 - 优化：直接使用action变量，减少中间变量
+        # 游戏步骤更新（暂停或不在游戏中时不累计逻辑时间）
+        if game_state == "running" and not game.paused:
+            for _ in range(scheduler.ticks()):
+                # 玩家控制绿色蛇（先等后台 AI 算完，避免同时读写棋盘）
+                ai_worker.wait()
+                action = pending_actions.popleft() if pending_actions else -1
                 done, info = game.step_opponent_mode(action)
+                needs_render = True
+
+                if done:
+                    game_state = "game_over"
+                    # 保存游戏结束时间，用于固定显示时长
+                    game.game_end_time = time.time()
+                    break
 
-                # 对抗模式下AI控制红色蛇
+                # 对抗模式下AI控制红色蛇：使用上一步提交后在后台算好的动作
+                # （玩家蛇刚走过一步，动作不再安全时会重新计算）
                 if not game.opponent_dead:
-                    opponent_action = get_ai_action(game, is_opponent=True)
+                    opponent_action = ai_worker.take(game, is_opponent=True)
                     done_opponent, _ = game.opponent_step(opponent_action)
                     
                     # 如果对抗蛇死亡，重新部署
                     if done_opponent:
-                        # 延迟一小段时间再重新部署，让玩家能看到死亡效果
+                        # 先显示死亡画面并停顿一小段时间，再重新部署；停顿的时间不计入逻辑步长
+                        game.render(ai_connected=False, draw_opponent=True, show_ai=False)
                         pygame.time.wait(500)
                         game.respawn_opponent()
-
-                # 只有当游戏未结束且未暂停时才渲染
-                if not done and not game.paused:
-                    game.render(ai_connected=False, draw_opponent=True, show_ai=False)
-                
-                # 重置玩家动作
-                action = -1
+                        scheduler.reset()
 
                 # 检查胜利条件（1000积分）
                 if game.score >= 1000:
                     game_state = "game_over"
+                    game.finish_replay()
                     # 保存游戏结束时间，用于固定显示时长
                     game.game_end_time = time.time()
+                    break
 
-            # 检查游戏是否结束
-            if done:
-                game_state = "game_over"
-                # 保存游戏结束时间，用于固定显示时长
-                game.game_end_time = time.time()
+                # 本步提交后立即在后台计算对抗蛇的下一步
+                if not game.opponent_dead:
+                    ai_worker.submit(game, is_opponent=True)
+        else:
+            scheduler.reset()
 
-        clock.tick(60)
+        # 绘制当前界面
+        if needs_render or game.is_animating():
+            needs_render = False
+            # 欢迎、结束和暂停界面覆盖整个窗口，回到游戏画面时需要完整重绘
+            if game_state == "welcome":
+                draw_welcome()
+                pygame.display.flip()
+                game.invalidate_frame()
+            elif game_state == "game_over":
+                draw_game_over()
+                pygame.display.flip()
+                game.invalidate_frame()
+            elif game.paused:
+                game.draw_pause_menu(pygame.mouse.get_pos())
+                pygame.display.flip()
+                game.invalidate_frame()
+            else:
+                game.render(ai_connected=False, draw_opponent=True, show_ai=False)
 
+        scheduler.sleep()
+
+    ai_worker.close()
+    game.finish_replay()  # 中途退出时保存未结束的录像
     pygame.quit()
     sys.exit()
 
@@ -3343,37 +2301,30 @@ def main_timed():
     game.enable_sound = game_config["enable_sound"]
     game.food_value = game_config["food_value"]
     game.enable_border = game_config["enable_border"]
+    game.ai_difficulty = game_config.get("ai_difficulty", "medium")  # 决定 AI 每步的计算预算
+    game.replay_dir = game_config.get("replay_dir")  # 录像目录，None 表示不录制
+    game.dirty_rendering = game_config.get("dirty_rendering", False)
 
     # 初始化
-    clock = pygame.time.Clock()
-    update_interval = 0.15  # 略微提高游戏更新频率，提升流畅度
-    last_update = time.time()
+    ai_worker = AIWorker()  # 后台线程预先计算 AI 的下一步
+    scheduler = FixedTimestep(game.snake_speed)  # 逻辑步长由 snake_speed 决定
+    pending_actions = deque(maxlen=3)  # 尚未执行的方向键输入，每次逻辑更新取一个
     
     # 限时模式特有设置
-    time_limit = 60  # 60秒时间限制
+    time_limit = TIMED_MODE_SECONDS  # 60秒时间限制
     start_time = time.time()
     
     # 预加载按钮文本
     start_button_text = "开始游戏"
     retry_button_text = "再来一次"
 
-    action = -1
     game_state = "welcome"  # 初始游戏状态：欢迎界面
     ai_connected = False    # AI 开关（由右侧按钮控制）
     ai_control = False      # 当前是否由 AI 控制
-    countdown_snd = game.sound_count
-
-    # 画面上用于鼠标点击检测的隐藏文本
-    start_button_surf = game.font.render("START", True, (0, 0, 0))
-    retry_button_surf = game.font.render("RETRY", True, (0, 0, 0))
 
     def draw_welcome():
         # 绘制深蓝色渐变背景
-        for y in range(game.display_height):
-            r = int(0)
-            g = int(10)
-            b = int(30 - 20 * y / game.display_height)
-            pygame.draw.line(game.screen, (r, g, b), (0, y), (game.display_width, y))
+        game.screen.blit(gradient_surface(game.display_width, game.display_height, (0, 10, 30), (0, 0, -20)), (0, 0))
             
         center_x = game.display_width // 2
         margin_top = 60  # 顶部边距
@@ -3381,14 +2332,14 @@ def main_timed():
         btn_margin_top = 50  # 按钮与文字间距
 
         # 标题 - 使用大字体和黄色（限时模式主题色）
-        title = game.large_font.render("贪吃蛇游戏 - 限时模式", True, (255, 215, 0))
+        title = text_surface(game.large_font, "贪吃蛇游戏 - 限时模式", True, (255, 215, 0))
         title_rect = title.get_rect(center=(center_x, margin_top + title.get_height() // 2))
         
         # 标题阴影效果
         shadow_offset = 2
         shadow_surf = pygame.Surface(title.get_size())
         shadow_surf.fill((0, 0, 0, 0))
-        shadow_surf.blit(game.large_font.render("贪吃蛇游戏 - 限时模式", True, (200, 180, 0)), (0, 0))
+        shadow_surf.blit(text_surface(game.large_font, "贪吃蛇游戏 - 限时模式", True, (200, 180, 0)), (0, 0))
         game.screen.blit(shadow_surf, (title_rect.x + shadow_offset, title_rect.y + shadow_offset))
         game.screen.blit(title, title_rect)
 
@@ -3411,7 +2362,7 @@ def main_timed():
             else:  # 其他行使用白色/浅灰色
                 text_color = (200, 200, 200)
             
-            info_text = game.font.render(text_content, True, text_color)
+            info_text = text_surface(game.font, text_content, True, text_color)
             game.screen.blit(info_text, (center_x - info_text.get_width() // 2, text_y))
             text_y += info_text.get_height() + 5
 
@@ -3442,7 +2393,7 @@ def main_timed():
             game.screen.blit(shadow_surf, (shadow_rect.x, shadow_rect.y))
         
         # 按钮文字
-        text_s = game.font.render(start_button_text, True, (0, 0, 0))
+        text_s = text_surface(game.font, start_button_text, True, (0, 0, 0))
         text_rect = text_s.get_rect(center=btn_rect.center)
         game.screen.blit(text_s, text_rect)
         
@@ -3454,47 +2405,43 @@ def main_timed():
 
     def draw_game_over():
         # 绘制渐变背景（红黑渐变）
-        for y in range(game.display_height):
-            # 从黑色到深红色的渐变
-            r = int(50 + 150 * y / game.display_height)
-            g = int(0)
-            b = int(0)
-            pygame.draw.line(game.screen, (r, g, b), (0, y), (game.display_width, y))
+        # 从黑色到深红色的渐变
+        game.screen.blit(gradient_surface(game.display_width, game.display_height, (50, 0, 0), (150, 0, 0)), (0, 0))
         
         center_x = game.display_width // 2
         margin_top = 80
         spacing = 30
         
         # 游戏结束标题
-        title = game.large_font.render("时间到！", True, (255, 215, 0))  # 金色标题
+        title = text_surface(game.large_font, "时间到！", True, (255, 215, 0))  # 金色标题
         title_rect = title.get_rect(center=(center_x, margin_top))
         
         # 添加标题阴影
         shadow_surf = pygame.Surface(title.get_size())
         shadow_surf.fill((0, 0, 0, 0))
-        shadow_surf.blit(game.large_font.render("时间到！", True, (200, 180, 0)), (0, 0))
+        shadow_surf.blit(text_surface(game.large_font, "时间到！", True, (200, 180, 0)), (0, 0))
         game.screen.blit(shadow_surf, (title_rect.x + 2, title_rect.y + 2))
         game.screen.blit(title, title_rect)
         
         # 显示分数信息
-        score_text = game.font.render(f"最终得分: {game.score}", True, (255, 255, 255))
+        score_text = text_surface(game.font, f"最终得分: {game.score}", True, (255, 255, 255))
         score_rect = score_text.get_rect(center=(center_x, title_rect.bottom + spacing))
         game.screen.blit(score_text, score_rect)
         
         # 显示蛇身长度
-        length_text = game.font.render(f"蛇身长度: {len(game.snake)}", True, (255, 255, 255))
+        length_text = text_surface(game.font, f"蛇身长度: {len(game.snake)}", True, (255, 255, 255))
         length_rect = length_text.get_rect(center=(center_x, score_rect.bottom + spacing // 2))
         game.screen.blit(length_text, length_rect)
         
         # 显示游戏时长
         elapsed_time = min(time_limit, time.time() - start_time)
-        time_text = game.font.render(f"游戏时长: {int(elapsed_time)}秒", True, (255, 255, 255))
+        time_text = text_surface(game.font, f"游戏时长: {int(elapsed_time)}秒", True, (255, 255, 255))
         time_rect = time_text.get_rect(center=(center_x, length_rect.bottom + spacing // 2))
         game.screen.blit(time_text, time_rect)
         
         # 显示死亡原因
         if hasattr(game, 'death_reason') and game.death_reason:
-            reason_text = game.font.render(f"{game.death_reason}", True, (255, 100, 100))
+            reason_text = text_surface(game.font, f"{game.death_reason}", True, (255, 100, 100))
             reason_rect = reason_text.get_rect(center=(center_x, time_rect.bottom + spacing))
             game.screen.blit(reason_text, reason_rect)
         
@@ -3539,11 +2486,11 @@ def main_timed():
         pygame.draw.rect(game.screen, (80, 80, 200), menu_button_rect, 2, border_radius=8)
         
         # 按钮文字
-        retry_text = game.font.render(retry_button_text, True, (0, 0, 0))
+        retry_text = text_surface(game.font, retry_button_text, True, (0, 0, 0))
         retry_text_rect = retry_text.get_rect(center=retry_button_rect.center)
         game.screen.blit(retry_text, retry_text_rect)
         
-        menu_text = game.font.render("返回菜单", True, (0, 0, 0))
+        menu_text = text_surface(game.font, "返回菜单", True, (0, 0, 0))
         menu_text_rect = menu_text.get_rect(center=menu_button_rect.center)
         game.screen.blit(menu_text, menu_text_rect)
         
@@ -3555,20 +2502,48 @@ def main_timed():
         # 刷新屏幕显示
         pygame.display.flip()
 
-    # 主循环
+    # 绘制游戏画面和右上角的剩余时间
+    timer_box = [None, None]  # [计时文字 surface, 对应的计时框]，秒数变化时才重新生成计时框
+
+    def draw_running():
+        remaining_time = max(0, time_limit - (time.time() - start_time))
+        time_text = text_surface(game.font, f"时间: {int(remaining_time)}秒", True, (255, 215, 0))
+        time_rect = time_text.get_rect(topright=(game.display_width - 20, 20))
+
+        # 带背景和边框的计时框，作为叠加层交给 render
+        bg_rect = pygame.Rect(0, 0, time_rect.width + 10, time_rect.height + 5)
+        bg_rect.topleft = (time_rect.left - 5, time_rect.top - 2)
+        if timer_box[0] is not time_text:
+            box = pygame.Surface(bg_rect.size).convert()
+            box.fill((0, 0, 0))
+            pygame.draw.rect(box, (255, 215, 0), box.get_rect(), 1)
+            box.blit(time_text, (5, 2))
+            timer_box[:] = [time_text, box]
+        game.render(ai_connected, draw_opponent=False, show_ai=True, overlays=[(timer_box[1], bg_rect.topleft)])
+
+    # 主循环：逻辑按固定步长更新，画面只在状态变化、有输入、有动画或剩余秒数变化时重绘
+    needs_render = True
+    shown_seconds = None  # 上次绘制时显示的剩余秒数
     while True:
         # 检查是否超时
         if game_state == "running":
             elapsed_time = time.time() - start_time
             if elapsed_time >= time_limit:
                 game_state = "game_over"
+                needs_render = True
                 # 设置超时死亡原因
                 game.death_reason = "时间到！游戏结束。"
+                game.finish_replay()
                 # 保存游戏结束时间，用于固定显示时长
                 game.game_end_time = time.time()
+            elif int(time_limit - elapsed_time) != shown_seconds:
+                shown_seconds = int(time_limit - elapsed_time)
+                needs_render = True
         
         # 事件处理
         for event in pygame.event.get():
+            # 任何输入都可能改变画面（按钮悬停、暂停菜单等）
+            needs_render = True
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
@@ -3578,26 +2553,21 @@ def main_timed():
                 if hasattr(game, 'start_button_rect') and game.start_button_rect.collidepoint(event.pos):
                     game_state = "running"
                     start_time = time.time()  # 重置开始时间
+                    ai_worker.cancel()
                     game.reset()
-                    # 立即渲染初始画面，防止黑屏
-                    game.render(ai_connected, draw_opponent=False, show_ai=True)
-                    remaining_time = max(0, time_limit - (time.time() - start_time))
-                    time_text = game.font.render(f"时间: {int(remaining_time)}秒", True, (255, 215, 0))
-                    time_rect = time_text.get_rect(topright=(game.display_width - 20, 20))
-                    bg_rect = pygame.Rect(0, 0, time_rect.width + 10, time_rect.height + 5)
-                    bg_rect.topleft = (time_rect.left - 5, time_rect.top - 2)
-                    pygame.draw.rect(game.screen, (0, 0, 0, 180), bg_rect)
-                    pygame.draw.rect(game.screen, (255, 215, 0), bg_rect, 1)
-                    game.screen.blit(time_text, time_rect)
-                    pygame.display.flip()
+                    pending_actions.clear()
+                    scheduler.reset()
             
             # 游戏结束界面 - 检查按钮点击
             elif game_state == "game_over" and event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                 if hasattr(game, 'retry_button_rect') and game.retry_button_rect.collidepoint(event.pos):
                     # 重新开始游戏
+                    ai_worker.cancel()
                     game.reset()
+                    pending_actions.clear()
                     start_time = time.time()
                     game_state = "running"
+                    scheduler.reset()
                 elif hasattr(game, 'menu_button_rect') and game.menu_button_rect.collidepoint(event.pos):
                     # 返回主菜单
                     pygame.quit()
@@ -3608,16 +2578,10 @@ def main_timed():
                 if event.key == pygame.K_ESCAPE:
                     # 切换暂停状态
                     game.toggle_pause()
-                # 方向控制和AI切换（只在非暂停状态下有效）
+                # 方向控制和AI切换（只在非暂停状态下有效，方向键由下一次逻辑更新执行）
                 elif not game.paused:
-                    if event.key == pygame.K_UP or event.key == pygame.K_w:
-                        action = 0
-                    elif event.key == pygame.K_LEFT or event.key == pygame.K_a:
-                        action = 1
-                    elif event.key == pygame.K_RIGHT or event.key == pygame.K_d:
-                        action = 2
-                    elif event.key == pygame.K_DOWN or event.key == pygame.K_s:
-                        action = 3
+                    if event.key in KEY_ACTIONS:
+                        pending_actions.append(KEY_ACTIONS[event.key])
                     elif event.key == pygame.K_x:
                         # 切换 AI 控制
                         ai_control = not ai_control
@@ -3630,93 +2594,56 @@ def main_timed():
             
             # 暂停状态下不处理鼠标点击事件，暂停/恢复仅通过ESC键控制
 
-        # 游戏运行状态
-        if game_state == "welcome":
-            draw_welcome()
-            pygame.display.flip()  # 确保欢迎界面内容显示
-            clock.tick(20)
-            continue
-        if game_state == "game_over":
-            draw_game_over()
-            pygame.display.flip()  # 确保游戏结束界面内容显示
-            clock.tick(20)
-            continue
-
-        # 游戏步骤更新
-        now = time.time()
-        if now - last_update >= update_interval:
-            last_update = now  # 更新时间
-            
-            if game_state == "running":
-                # 检查暂停状态
-                if game.paused:
-                    # 暂停状态下降低渲染频率，减少闪烁
-                    if 'last_pause_update' not in locals():
-                        last_pause_update = now  # 初始化变量
-                    if now - last_pause_update >= 0.05:  # 每50毫秒更新一次
-                        last_pause_update = now
-                        # 获取鼠标位置
-                        mouse_pos = pygame.mouse.get_pos()
-                        # 绘制暂停菜单
-                        game.draw_pause_menu(mouse_pos)
-                        pygame.display.flip()
-                    continue
-                
+        # 游戏步骤更新（暂停或不在游戏中时不累计逻辑时间）
+        if game_state == "running" and not game.paused:
+            for _ in range(scheduler.ticks()):
                 # 玩家控制绿色蛇
                 # 即使没有新的键盘输入，蛇也会保持当前方向移动
                 if ai_connected and ai_control:
-                    # 只在AI控制时调用get_ai_action
-                    chosen_action = get_ai_action(game, is_opponent=False)
+                    # 只在AI控制时取出后台线程预先算好的动作
+                    chosen_action = ai_worker.take(game, is_opponent=False)
                 else:
-                    # 对于玩家控制，action为-1时保持当前方向
-                    chosen_action = action
+                    # 对于玩家控制，没有新的按键时保持当前方向
+                    ai_worker.cancel()
+                    chosen_action = pending_actions.popleft() if pending_actions else -1
                 
                 # 执行游戏步骤
                 done, info = game.step(chosen_action)
-                
-                # 只有当游戏未结束且未暂停时才渲染
-                if not done and not game.paused:
-                    # 绘制游戏画面，包括剩余时间
-                    game.render(ai_connected, draw_opponent=False, show_ai=True)
-                    
-                    # 在右上角显示剩余时间
-                    remaining_time = max(0, time_limit - (time.time() - start_time))
-                    time_text = game.font.render(f"时间: {int(remaining_time)}秒", True, (255, 215, 0))
-                    time_rect = time_text.get_rect(topright=(game.display_width - 20, 20))
-                    
-                    # 添加文字背景
-                    bg_rect = pygame.Rect(0, 0, time_rect.width + 10, time_rect.height + 5)
-                    bg_rect.topleft = (time_rect.left - 5, time_rect.top - 2)
-                    pygame.draw.rect(game.screen, (0, 0, 0, 180), bg_rect)
-                    pygame.draw.rect(game.screen, (255, 215, 0), bg_rect, 1)
-                    
-                    game.screen.blit(time_text, time_rect)
-                    pygame.display.flip()
-                    
-                    # 重置动作，避免连续移动
-                    action = -1
-                else:
+                needs_render = True
+
+                if done:
                     game_state = "game_over"
                     # 保存游戏结束时间，用于固定显示时长
                     game.game_end_time = time.time()
+                    break
+
+                # 本步提交后立即在后台计算下一步
+                if ai_connected and ai_control:
+                    ai_worker.submit(game, is_opponent=False)
         else:
-            # 即使不在更新间隔，也要绘制界面（特别是剩余时间）
-            if game_state == "running":
-                # 暂停状态下不执行任何渲染，只在更新逻辑中渲染暂停菜单
-                if not game.paused:
-                    remaining_time = max(0, time_limit - (time.time() - start_time))
-                    game.render(ai_connected, draw_opponent=False, show_ai=True)
-                    time_text = game.font.render(f"时间: {int(remaining_time)}秒", True, (255, 215, 0))
-                    time_rect = time_text.get_rect(topright=(game.display_width - 20, 20))
-                    bg_rect = pygame.Rect(0, 0, time_rect.width + 10, time_rect.height + 5)
-                    bg_rect.topleft = (time_rect.left - 5, time_rect.top - 2)
-                    pygame.draw.rect(game.screen, (0, 0, 0, 180), bg_rect)
-                    pygame.draw.rect(game.screen, (255, 215, 0), bg_rect, 1)
-                    game.screen.blit(time_text, time_rect)
-                    pygame.display.flip()
-
-        # 限制帧率
-        clock.tick(60)
+            scheduler.reset()
+
+        # 绘制当前界面
+        if needs_render or game.is_animating():
+            needs_render = False
+            # 欢迎、结束和暂停界面覆盖整个窗口，回到游戏画面时需要完整重绘
+            if game_state == "welcome":
+                draw_welcome()
+                pygame.display.flip()  # 确保欢迎界面内容显示
+                game.invalidate_frame()
+            elif game_state == "game_over":
+                draw_game_over()
+                pygame.display.flip()  # 确保游戏结束界面内容显示
+                game.invalidate_frame()
+            elif game.paused:
+                game.draw_pause_menu(pygame.mouse.get_pos())
+                pygame.display.flip()
+                game.invalidate_frame()
+            else:
+                draw_running()
+
+        # 等待下一帧
+        scheduler.sleep()
 
 
 # ---------------------------
@@ -3727,11 +2654,14 @@ def main_timed():
 game_config = {
     "board_size": 40,
     "cell_size": 20,
-    "snake_speed": 0.10,
+    "snake_speed": DEFAULT_SNAKE_SPEED,
     "enable_sound": True,
     "food_value": 1,
     "enable_border": True,
-    "ai_difficulty": "medium"
+    "ai_difficulty": "medium",
+    "opponent_ai": "search",  # 对抗蛇策略（--opponent-ai）："search" 启发式搜索，"rollout" 蒙特卡洛模拟
+    "replay_dir": None,       # 对局录像保存目录（--replay-dir，如 "replays"），None 表示不录制
+    "dirty_rendering": False  # 只重绘并提交变化的区域（低性能设备、VNC 远程桌面）
 }
 
 # 图形界面模式选择 - 优化版
@@ -3797,7 +2727,7 @@ def main_gui():
             pygame.draw.rect(surface, self.border_color, self.rect, 3, border_radius=12)
             
             # 绘制按钮文本
-            text_surf = font.render(self.text, True, self.text_color)
+            text_surf = text_surface(font, self.text, True, self.text_color)
             text_rect = text_surf.get_rect(center=self.rect.center)
             surface.blit(text_surf, text_rect)
     
@@ -3842,15 +2772,11 @@ def main_gui():
     # 绘制模式选择界面
     def draw_mode_selection():
         # 绘制渐变背景
-        for y in range(560):
-            # 创建从深蓝色到黑色的垂直渐变
-            r = int(0)
-            g = int(0)
-            b = int(50 - 50 * y / 560)
-            pygame.draw.line(screen, (r, g, b), (0, y), (600, y))
+        # 从深蓝色到黑色的垂直渐变
+        screen.blit(gradient_surface(600, 560, (0, 0, 50), (0, 0, -50)), (0, 0))
         
         # 绘制标题（带淡入效果）
-        title = large_font.render("贪吃蛇游戏", True, (255, 255, 255))
+        title = text_surface(large_font, "贪吃蛇游戏", True, (255, 255, 255))
         
         # 创建一个带透明度的surface
         title_surf = pygame.Surface(title.get_size(), pygame.SRCALPHA)
@@ -3861,7 +2787,7 @@ def main_gui():
         screen.blit(title_surf, title_rect)
         
         # 绘制副标题
-        subtitle = font.render("选择游戏模式", True, (200, 200, 200))
+        subtitle = text_surface(font, "选择游戏模式", True, (200, 200, 200))
         subtitle_rect = subtitle.get_rect(center=(center_x, 120))
         screen.blit(subtitle, subtitle_rect)
         
@@ -3870,7 +2796,7 @@ def main_gui():
             button.draw(screen, font)
         
         # 添加版本信息
-        version_text = font.render("v1.0.6 © 2025 Vincent Cassano", True, (100, 100, 100))
+        version_text = text_surface(font, "v1.0.6 © 2025 Vincent Cassano", True, (100, 100, 100))
         screen.blit(version_text, (5, 530))
         
         pygame.display.flip()
@@ -3984,12 +2910,13 @@ def main_settings():
     config = {
         "board_size": 40,          # 棋盘大小
         "cell_size": 20,           # 格子大小
-        "snake_speed": 0.10,       # 蛇移动速度
+        "snake_speed": DEFAULT_SNAKE_SPEED,  # 蛇移动速度
         "enable_sound": True,      # 声音开关
         "food_value": 1,           # 食物分值
         "enable_border": True,     # 边界碰撞
-        #"ai_difficulty": "medium"  # AI难度
+        "ai_difficulty": game_config.get("ai_difficulty", "medium")  # AI难度（决定 AI 每步的计算预算）
     }
+    difficulty_labels = {"easy": "简单", "medium": "中等", "hard": "困难"}
     
     # 可配置选项列表
     options = [
@@ -3998,7 +2925,7 @@ def main_settings():
         {"name": "食物分值", "type": "slider", "min": 1, "max": 5, "step": 1, "value": config["food_value"]},
         {"name": "声音效果", "type": "toggle", "value": config["enable_sound"]},
         {"name": "边界碰撞", "type": "toggle", "value": config["enable_border"]},
-        #{"name": "AI难度", "type": "dropdown", "options": ["简单", "中等", "困难"], "value": config["ai_difficulty"]}
+        {"name": "AI难度", "type": "dropdown", "options": ["简单", "中等", "困难"], "value": difficulty_labels[config["ai_difficulty"]]}
     ]
     
     # 滑动条和开关类
@@ -4055,7 +2982,7 @@ def main_settings():
             pygame.draw.rect(surface, (220, 220, 220), self.handle_rect, border_radius=4)
             pygame.draw.rect(surface, (200, 200, 200), self.handle_rect, 2, border_radius=4)
             # 显示当前值
-            value_text = small_font.render(str(round(self.value, 2)), True, (255, 255, 255))
+            value_text = text_surface(small_font, str(round(self.value, 2)), True, (255, 255, 255))
             value_rect = value_text.get_rect(center=(self.rect.right + 40, self.rect.centery))
             surface.blit(value_text, value_rect)
     
@@ -4120,7 +3047,7 @@ def main_settings():
             pygame.draw.rect(surface, (80, 80, 80), self.rect, border_radius=5)
             pygame.draw.rect(surface, (120, 120, 120), self.rect, 1, border_radius=5)
             # 绘制当前选中的值
-            text = font.render(self.value, True, (255, 255, 255))
+            text = text_surface(font, self.value, True, (255, 255, 255))
             surface.blit(text, (self.rect.x + 10, self.rect.centery - text.get_height() // 2))
             # 绘制下拉箭头
             arrow_points = [(self.rect.right - 15, self.rect.centery - 5),
@@ -4137,7 +3064,7 @@ def main_settings():
                     pygame.draw.rect(surface, hover_color, rect, border_radius=5)
                     # 绘制边框，确保没有漏边
                     pygame.draw.rect(surface, (120, 120, 120), rect, 1, border_radius=5)
-                    option_text = font.render(self.options[i], True, (255, 255, 255))
+                    option_text = text_surface(font, self.options[i], True, (255, 255, 255))
                     surface.blit(option_text, (rect.x + 10, rect.centery - option_text.get_height() // 2))
     
     # 创建UI元素
@@ -4187,7 +3114,7 @@ def main_settings():
             pygame.draw.rect(surface, self.border_color, self.rect, 2, border_radius=8)
             
             # 绘制按钮文本
-            text_surf = font.render(self.text, True, self.text_color)
+            text_surf = text_surface(font, self.text, True, self.text_color)
             text_rect = text_surf.get_rect(center=self.rect.center)
             surface.blit(text_surf, text_rect)
     
@@ -4213,15 +3140,14 @@ def main_settings():
                     config["enable_sound"] = ui_elements[i].value
                 elif option["name"] == "边界碰撞":
                     config["enable_border"] = ui_elements[i].value
-            # elif option["type"] == "dropdown":
-            #     option["value"] = ui_elements[i].value
-            #     if option["name"] == "AI难度":
-            #         difficulty_map = {"简单": "easy", "中等": "medium", "困难": "hard", "easy": "easy", "medium": "medium", "hard": "hard"}
-            #         config["ai_difficulty"] = difficulty_map[ui_elements[i].value]
+            elif option["type"] == "dropdown":
+                option["value"] = ui_elements[i].value
+                if option["name"] == "AI难度":
+                    difficulty_map = {"简单": "easy", "中等": "medium", "困难": "hard"}
+                    config["ai_difficulty"] = difficulty_map[ui_elements[i].value]
         
-        # 将配置保存为全局变量，让其他模式可以访问
-        global game_config
-        game_config = config
+        # 写入全局配置，让其他模式可以访问（原地更新，保留命令行设置的 dirty_rendering 等其他配置项）
+        game_config.update(config)
         
         # 显示保存成功提示
         show_success = True
@@ -4233,18 +3159,26 @@ def main_settings():
     clock = pygame.time.Clock()
     show_success = False
     success_timer = 0
+    mouse_was_down = False
     
     while running:
         mouse_pos = pygame.mouse.get_pos()
         mouse_down = pygame.mouse.get_pressed()[0]
+        mouse_clicked = mouse_down and not mouse_was_down  # 开关和下拉菜单只在按下的那一帧响应
+        mouse_was_down = mouse_down
+        # 下拉菜单展开时选项列表覆盖下方的控件和按钮，只处理菜单本身
+        open_menu = next((e for e in ui_elements if isinstance(e, DropdownMenu) and e.is_open), None)
         
         # 更新按钮状态
         save_button.update(mouse_pos)
         back_button.update(mouse_pos)
         
         # 更新UI元素
-        for element in ui_elements:
-            element.update(mouse_pos, mouse_down)
+        if open_menu is not None:
+            open_menu.update(mouse_pos, mouse_clicked)
+        else:
+            for element in ui_elements:
+                element.update(mouse_pos, mouse_down if isinstance(element, Slider) else mouse_clicked)
         
         # 处理事件
         for event in pygame.event.get():
@@ -4252,7 +3186,7 @@ def main_settings():
                 running = False
                 pygame.quit()
                 sys.exit()
-            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and open_menu is None:
                 # 检查按钮点击
                 if save_button.rect.collidepoint(mouse_pos):
                     show_success, success_timer = save_config()
@@ -4272,27 +3206,23 @@ def main_settings():
         
         # 绘制界面
         # 绘制渐变背景
-        for y in range(600):
-            r = int(20)
-            g = int(20)
-            b = int(40 - 30 * y / 600)
-            pygame.draw.line(screen, (r, g, b), (0, y), (700, y))
+        screen.blit(gradient_surface(700, 600, (20, 20, 40), (0, 0, -30)), (0, 0))
         
         # 绘制标题
-        title = large_font.render("游戏设置", True, (255, 255, 255))
+        title = text_surface(large_font, "游戏设置", True, (255, 255, 255))
         title_rect = title.get_rect(center=(350, 60))
         screen.blit(title, title_rect)
         
         # 绘制设置选项文本
         y_pos = 120
         for i, option in enumerate(options):
-            option_text = font.render(option["name"], True, (220, 220, 220))
+            option_text = text_surface(font, option["name"], True, (220, 220, 220))
             screen.blit(option_text, (50, y_pos))
             y_pos += element_spacing
         
-        # 绘制UI元素
+        # 绘制UI元素（展开的下拉菜单最后绘制，覆盖在其他内容之上）
         for element in ui_elements:
-            if hasattr(element, 'draw'):
+            if hasattr(element, 'draw') and element is not open_menu:
                 element.draw(screen, font)
         
         # 绘制按钮
@@ -4307,14 +3237,18 @@ def main_settings():
             pygame.draw.rect(success_surf, (0, 200, 0), (0, 0, 300, 60), 2, border_radius=10)
             screen.blit(success_surf, (200, 450))
             
-            success_text = font.render("设置保存成功！", True, (255, 255, 255))
+            success_text = text_surface(font, "设置保存成功！", True, (255, 255, 255))
             text_rect = success_text.get_rect(center=(350, 480))
             screen.blit(success_text, text_rect)
         
         # 绘制说明文本
-        help_text = small_font.render("提示: 部分设置需要重新开始游戏才能生效", True, (150, 150, 150))
+        help_text = text_surface(small_font, "提示: 部分设置需要重新开始游戏才能生效", True, (150, 150, 150))
         screen.blit(help_text, (180, 480))
         
+        open_menu = next((e for e in ui_elements if isinstance(e, DropdownMenu) and e.is_open), None)
+        if open_menu is not None:
+            open_menu.draw(screen, font)
+        
         pygame.display.flip()
         clock.tick(60)
 
@@ -4375,9 +3309,9 @@ def main_help():
             pygame.draw.rect(surface, self.border_color, self.rect, 2, border_radius=10)  # 边框
             
             # 绘制按钮文本
-            text_surface = font.render(self.text, True, self.text_color)
-            text_rect = text_surface.get_rect(center=self.rect.center)
-            surface.blit(text_surface, text_rect)
+            text_surf = text_surface(font, self.text, True, self.text_color)
+            text_rect = text_surf.get_rect(center=self.rect.center)
+            surface.blit(text_surf, text_rect)
         
         def update(self, mouse_pos):
             self.is_hovered = self.rect.collidepoint(mouse_pos)
@@ -4393,21 +3327,17 @@ def main_help():
     
     # 绘制渐变背景
     def draw_background():
-        for y in range(600):
-            # 创建从深蓝色到黑色的垂直渐变
-            r = int(0)
-            g = int(0)
-            b = int(50 - 50 * y / 600)
-            pygame.draw.line(screen, (r, g, b), (0, y), (800, y))
+        # 从深蓝色到黑色的垂直渐变
+        screen.blit(gradient_surface(800, 600, (0, 0, 50), (0, 0, -50)), (0, 0))
     
     # 绘制帮助内容
     def draw_help_content():
         # 标题
-        title = large_font.render("游戏帮助与教程", True, (255, 215, 0))
+        title = text_surface(large_font, "游戏帮助与教程", True, (255, 215, 0))
         screen.blit(title, (400 - title.get_width()//2, 40))
         
         # 基本操作
-        operation_title = font.render("基本操作:", True, (255, 255, 255))
+        operation_title = text_surface(font, "基本操作:", True, (255, 255, 255))
         screen.blit(operation_title, (50, 100))
         
         operation_texts = [
@@ -4417,11 +3347,11 @@ def main_help():
         ]
         
         for i, text in enumerate(operation_texts):
-            text_surface = small_font.render(text, True, (200, 200, 255))
-            screen.blit(text_surface, (70, 130 + i * 30))
+            text_surf = text_surface(small_font, text, True, (200, 200, 255))
+            screen.blit(text_surf, (70, 130 + i * 30))
         
         # 游戏规则
-        rules_title = font.render("游戏规则:", True, (255, 255, 255))
+        rules_title = text_surface(font, "游戏规则:", True, (255, 255, 255))
         screen.blit(rules_title, (50, 300))
         
         rules_texts = [
@@ -4432,11 +3362,11 @@ def main_help():
         ]
         
         for i, text in enumerate(rules_texts):
-            text_surface = small_font.render(text, True, (200, 200, 255))
-            screen.blit(text_surface, (70, 330 + i * 30))
+            text_surf = text_surface(small_font, text, True, (200, 200, 255))
+            screen.blit(text_surf, (70, 330 + i * 30))
         
         # 游戏模式说明
-        modes_title = font.render("游戏模式:", True, (255, 255, 255))
+        modes_title = text_surface(font, "游戏模式:", True, (255, 255, 255))
         screen.blit(modes_title, (400, 100))
         
         modes_texts = [
@@ -4448,11 +3378,11 @@ def main_help():
         ]
         
         for i, text in enumerate(modes_texts):
-            text_surface = tiny_font.render(text, True, (200, 200, 255))
-            screen.blit(text_surface, (420, 130 + i * 30))
+            text_surf = text_surface(tiny_font, text, True, (200, 200, 255))
+            screen.blit(text_surf, (420, 130 + i * 30))
         
         # 快捷键提示
-        shortcut_title = font.render("主菜单快捷键:", True, (255, 255, 255))
+        shortcut_title = text_surface(font, "主菜单快捷键:", True, (255, 255, 255))
         screen.blit(shortcut_title, (400, 300))
         
         shortcut_texts = [
@@ -4463,8 +3393,8 @@ def main_help():
         ]
         
         for i, text in enumerate(shortcut_texts):
-            text_surface = tiny_font.render(text, True, (200, 200, 255))
-            screen.blit(text_surface, (420, 330 + i * 25))
+            text_surf = text_surface(tiny_font, text, True, (200, 200, 255))
+            screen.blit(text_surf, (420, 330 + i * 25))
     
     # 主循环
     running = True
@@ -4502,9 +3432,96 @@ def main_help():
 
     pass  # 在实际使用时，会通过函数调用的方式进行保存和加载
 
+# 录像回放
+def main_replay(path, speed=1.0):
+    """
+    录像回放：按录像重新模拟对局并绘制
+
+    操作: 空格 暂停/继续，←/→ 后退/前进 50 帧，↑/↓ 加快/减慢回放速度，Home 回到开头，Esc 退出
+
+    参数:
+        path: 录像文件路径（.snkr）
+        speed: 初始回放倍速
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    board_size = decode_replay(data)[1]
+    game = SnakeGame(seed=0, board_size=board_size, silent_mode=False)
+    game.cell_size = game_config["cell_size"]
+    game.enable_border = game_config["enable_border"]
+    game.dirty_rendering = game_config.get("dirty_rendering", False)
+    game.sound_eat = game.sound_game_over = None  # 回放时不播放音效（跳转时会连续模拟很多步）
+    player = ReplayPlayer(data, engine=game)
+    draw_opponent = player.kind == RESET_OPPONENT
+
+    # 1 倍速时按 snake_speed 的步长回放，高倍速时每帧最多补 64 步
+    scheduler = FixedTimestep(game_config["snake_speed"] / speed, max_catch_up=64)
+    paused = False
+
+    needs_render = True
+    running = True
+    while running:
+        for event in pygame.event.get():
+            needs_render = True
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    running = False
+                elif event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key == pygame.K_RIGHT:
+                    player.seek(player.tick + 50)
+                elif event.key == pygame.K_LEFT:
+                    player.seek(player.tick - 50)
+                elif event.key == pygame.K_HOME:
+                    player.seek(0)
+                elif event.key == pygame.K_UP:
+                    speed = min(speed * 2, 64.0)
+                elif event.key == pygame.K_DOWN:
+                    speed = max(speed / 2, 0.125)
+                scheduler.interval = game_config["snake_speed"] / speed
+
+        # 按倍速推进（暂停或回放结束时不累计时间）
+        if paused or player.tick >= player.length:
+            scheduler.reset()
+        else:
+            for _ in range(scheduler.ticks()):
+                player.step()
+                needs_render = True
+
+        if needs_render or game.is_animating():
+            needs_render = False
+            status = "暂停" if paused else ("回放结束" if player.tick >= player.length else f"{speed:g}x")
+            info_text = text_surface(game.font, f"回放 {player.tick}/{player.length}  {status}", True, (255, 215, 0))
+            info_rect = info_text.get_rect(topright=(game.display_width - 20, 20))
+            overlays = [(info_text, info_rect.topleft)]
+            if game.death_reason and player.tick >= player.length:
+                reason_text = text_surface(game.font, game.death_reason, True, (255, 100, 100))
+                overlays.append((reason_text, reason_text.get_rect(topright=(game.display_width - 20, info_rect.bottom + 10)).topleft))
+            game.render(ai_connected=False, draw_opponent=draw_opponent, show_ai=False, overlays=overlays)
+        scheduler.sleep()
+
+    pygame.quit()
+
 # 游戏主入口
 def main():
-    """游戏主入口，提供模式选择"""
+    """游戏主入口，提供模式选择；指定 --replay 时直接回放录像"""
+    parser = argparse.ArgumentParser(description="贪吃蛇游戏")
+    parser.add_argument("--replay", default=None, help="回放录像文件（.snkr）")
+    parser.add_argument("--speed", type=float, default=1.0, help="回放倍速")
+    parser.add_argument("--dirty-rects", action="store_true", help="只重绘并提交画面中变化的区域（低性能设备、VNC 远程桌面）")
+    parser.add_argument("--replay-dir", default=None, help="对局录像（.snkr）保存目录，不指定时不录制")
+    parser.add_argument("--opponent-ai", choices=("search", "rollout"), default=game_config["opponent_ai"],
+                        help="对抗模式中对抗蛇的策略：search 启发式搜索，rollout 蒙特卡洛模拟")
+    args = parser.parse_args()
+    game_config["dirty_rendering"] = args.dirty_rects
+    game_config["replay_dir"] = args.replay_dir
+    game_config["opponent_ai"] = args.opponent_ai
+    if args.replay is not None:
+        main_replay(args.replay, args.speed)
+        return
+
     # 默认直接进入图形界面模式以便验证功能
     main_gui()
     
@@ -0,0 +1,1289 @@
+# 文件名: snake_ai.py
+# 贪吃蛇 AI 策略
+# 用法: from snake_ai import get_ai_action
+"""
+贪吃蛇 AI 行为接口：只读取游戏状态（SnakeEngine 或 SnakeGame）并返回动作，
+不依赖 pygame，可在图形界面和无界面批量对局中共用。
+"""
+
+# 导入必要的模块
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import lru_cache
+from itertools import islice
+from types import SimpleNamespace
+
+# (动作, 行偏移, 列偏移)，动作编号 0:UP, 1:LEFT, 2:RIGHT, 3:DOWN
+DIRECTION_OFFSETS = ((0, -1, 0), (1, 0, -1), (2, 0, 1), (3, 1, 0))
+ACTION_NAMES = ("UP", "LEFT", "RIGHT", "DOWN")  # 动作编号对应的方向名称，反向动作为 3 - 动作
+
+# AI 难度（game_config["ai_difficulty"]）对应的每步计算预算（秒）
+AI_DIFFICULTY_BUDGETS = {"easy": 0.001, "medium": 0.005, "hard": 0.020}
+LOOKAHEAD_MAX_DEPTH = 32  # 限时决策前瞻搜索的最大深度（第一步之后的步数）
+
+
+# 搜索超时
+class SearchTimeout(Exception):
+    """限时搜索超过截止时刻时抛出，由 get_anytime_ai_action 捕获并返回目前最好的动作"""
+
+
+# 检查截止时刻
+def _check_deadline(deadline):
+    """deadline（time.perf_counter() 的时刻）已过时抛出 SearchTimeout；None 表示不限时"""
+    if deadline is not None and time.perf_counter() > deadline:
+        raise SearchTimeout
+
+
+# ---------------------------
+# 哈密顿回路规划
+# ---------------------------
+
+# 生成偶数边长棋盘上的蛇形哈密顿回路
+def serpentine_cycle(board_size):
+    """第0行从左到右，其余各列蛇形往返，最后沿第0列回到起点（board_size 需为偶数）"""
+    cycle = [(0, c) for c in range(board_size)]
+    for i, c in enumerate(range(board_size - 1, 0, -1)):
+        rows = range(1, board_size) if i % 2 == 0 else range(board_size - 1, 0, -1)
+        cycle.extend((r, c) for r in rows)
+    cycle.extend((r, 0) for r in range(board_size - 1, 0, -1))
+    return cycle
+
+
+# 按棋盘边长缓存哈密顿回路
+@lru_cache(maxsize=None)
+def hamiltonian_cycle(board_size):
+    """
+    计算并缓存哈密顿回路（每种棋盘边长只计算一次）
+
+    返回:
+        tuple: (order, next_action)，均按扁平下标 r * board_size + c 索引：
+               order 为格子在回路中的序号，next_action 为沿回路走到下一格的动作。
+               奇数边长的棋盘不存在哈密顿回路，返回 None
+    """
+    if board_size < 2 or board_size % 2:
+        return None
+    cycle = serpentine_cycle(board_size)
+
+    # 选择回路方向，使初始蛇（位于中心、竖直向下）正好沿回路排列
+    mid = board_size // 2
+    if mid + 1 < board_size:
+        i = cycle.index((mid, mid))
+        if cycle[(i + 1) % len(cycle)] != (mid + 1, mid):
+            cycle.reverse()
+
+    order = [0] * len(cycle)
+    next_action = [0] * len(cycle)
+    for i, (r, c) in enumerate(cycle):
+        nr, nc = cycle[(i + 1) % len(cycle)]
+        order[r * board_size + c] = i
+        next_action[r * board_size + c] = next(a for a, dr, dc in DIRECTION_OFFSETS
+                                               if (dr, dc) == (nr - r, nc - c))
+    return order, next_action
+
+
+# 检查蛇身是否沿回路排列
+def _follows_cycle(order, snake, board_size):
+    """从蛇尾到蛇头，各节在回路上的序号依次前进且总跨度不足一圈（O(蛇长)）"""
+    total = board_size * board_size
+    r, c = snake[-1]
+    prev = order[r * board_size + c]
+    span = 0
+    for r, c in islice(reversed(snake), 1, None):
+        i = order[r * board_size + c]
+        span += (i - prev) % total
+        prev = i
+    return span < total
+
+
+# 沿哈密顿回路移动，可证明安全时走捷径
+def hamiltonian_action(game):
+    """
+    哈密顿回路规划（只适用于普通模式）：
+
+    蛇身沿回路排列时，蛇头只要落在"蛇头到蛇尾"这段空闲回路上，蛇身就仍然沿回路排列，
+    之后沿回路走总能回到蛇尾后方，因此不会被困死。
+    蛇长不足棋盘一半时，允许跳到这段回路中更靠前、但不超过食物且与蛇尾保持余量的相邻格子；
+    之后只沿回路前进，偶数边长棋盘上可保证吃满整个棋盘。每步只做常数次查表。
+
+    返回:
+        int: 动作编号；蛇身未沿回路排列（例如中途接管）或棋盘边长为奇数时返回 None
+    """
+    n = game.board_size
+    cycle = hamiltonian_cycle(n)
+    if cycle is None:
+        return None
+    order, next_action = cycle
+    total = n * n
+
+    snake = game.snake
+    body = game.snake_set
+    head, tail = snake[0], snake[-1]
+
+    # 上一步正是按本规划移动时蛇身必然沿回路排列，否则完整检查一次
+    expected = getattr(game, 'hamiltonian_expected', None)
+    if expected != (id(snake), head) and not _follows_cycle(order, snake, n):
+        return None
+
+    hr, hc = head
+    head_i = order[hr * n + hc]
+    tail_i = order[tail[0] * n + tail[1]]
+    tail_dist = (tail_i - head_i) % total  # 沿回路从蛇头到蛇尾的距离
+
+    # 捷径预算：最多跳过多少格回路
+    fr, fc = game.food
+    if len(snake) * 2 >= total or not (0 <= fr < n and 0 <= fc < n):
+        budget = 1
+    else:
+        food_i = order[fr * n + fc]
+        food_dist = (food_i - head_i) % total
+        budget = tail_dist - 4          # 与蛇尾保持余量
+        if food_dist < tail_dist:
+            budget -= 1                 # 吃到食物后蛇尾会停留一步
+            if (tail_i - food_i) % total < 4:
+                budget -= 10            # 食物紧挨蛇尾时不走捷径
+        budget = min(budget, food_dist)  # 不越过食物
+
+    # 默认沿回路前进一格（蛇身沿回路排列时该格为空格或即将移走的蛇尾）；
+    # 预算内的捷径都是安全的，其中选离食物最近的，同样近时选跳得更远的
+    best_action = next_action[hr * n + hc]
+    best_key = (abs(hr + DIRECTION_OFFSETS[best_action][1] - fr)
+                + abs(hc + DIRECTION_OFFSETS[best_action][2] - fc), -1)
+    for action, dr, dc in DIRECTION_OFFSETS:
+        r, c = hr + dr, hc + dc
+        if 0 <= r < n and 0 <= c < n and (r, c) not in body:
+            dist = (order[r * n + c] - head_i) % total
+            if 1 < dist <= budget and dist < tail_dist:
+                key = (abs(r - fr) + abs(c - fc), -dist)
+                if key < best_key:
+                    best_action, best_key = action, key
+
+    _, dr, dc = DIRECTION_OFFSETS[best_action]
+    game.hamiltonian_expected = (id(snake), (hr + dr, hc + dc))
+    return best_action
+
+
+# 哈密顿回路 AI 模式
+def get_hamiltonian_ai_action(game, is_opponent=False, rng=None):
+    """
+    哈密顿回路 AI 模式，参数与 get_ai_action 相同：
+
+    普通模式下从开局起使用 hamiltonian_action，偶数边长棋盘上保证吃满棋盘且每步耗时固定；
+    对抗模式、奇数边长棋盘或蛇身未沿回路排列时退回 get_ai_action 的搜索策略。
+    """
+    if not is_opponent and not hasattr(game, 'opponent_snake'):
+        action = hamiltonian_action(game)
+        if action is not None:
+            return action
+    return get_ai_action(game, is_opponent, rng)
+
+
+# ---------------------------
+# 共享的棋盘分析
+# ---------------------------
+
+# 按棋盘边长缓存每个格子的相邻格子
+@lru_cache(maxsize=None)
+def neighbor_table(board_size):
+    """返回列表：neighbor_table(n)[r * n + c] 为该格子在棋盘内的相邻格子扁平下标"""
+    n = board_size
+    return [tuple(nr * n + nc for _, dr, dc in DIRECTION_OFFSETS
+                  for nr, nc in ((r + dr, c + dc),) if 0 <= nr < n and 0 <= nc < n)
+            for r in range(n) for c in range(n)]
+
+
+# 有界 LRU 缓存
+class LRUCache:
+    """
+    有界 LRU 缓存（OrderedDict），统计命中和未命中次数
+
+    以 Zobrist 哈希为键，在同一进程内跨对局共享：自我对局和回放中重复出现的局面直接查表。
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """返回缓存值并标记为最近使用；不存在时返回 None"""
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    @property
+    def hit_rate(self):
+        """命中率（尚未查询时为 0）"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def clear(self):
+        """清空缓存和命中统计"""
+        self._data.clear()
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+SPACE_CACHE = LRUCache(65536)     # 局面 -> tail_aware_reachability 的空间评估
+DECISION_CACHE = LRUCache(65536)  # (局面, 历史) -> get_ai_action 的 (动作, 随机抽取次数, 是否记录方向)
+
+
+# 当前局面的标识（用于缓存每个局面只计算一次的分析结果）
+def _state_key(game):
+    """
+    引擎维护了 Zobrist 哈希时为 (棋盘边长, 哈希)，完整区分蛇身、食物和方向；
+    否则由食物和各条蛇的蛇头、蛇尾、长度组成，每走一步蛇头都会改变，足以区分相邻局面
+    """
+    zobrist = getattr(game, 'zobrist', None)
+    if zobrist is not None:
+        return (game.board_size, zobrist)
+    snake = game.snake
+    key = (game.food, id(snake), snake[0], snake[-1], len(snake))
+    opponent = getattr(game, 'opponent_snake', None)
+    if opponent:
+        key += (id(opponent), opponent[0], opponent[-1], len(opponent))
+    return key
+
+
+# 搜索用到的历史状态（DECISION_CACHE 键的一部分）
+def _history_key(game, is_opponent):
+    """
+    _search_ai_action 读取的位置和方向历史：循环检测用到最近 15 个蛇头位置（含本步蛇头）
+    和历史长度（蛇长小于 8 或不足 12 个位置时不检测），方向惩罚用到最近两个方向和历史长度
+    """
+    recent = getattr(game, 'recent_positions', None) or ()
+    directions = getattr(game, 'previous_directions', None) or ()
+    own = game.opponent_snake if is_opponent else game.snake
+    if len(own) < 8 or len(recent) + 1 < 12:
+        positions = None
+    else:
+        positions = (min(len(recent), 16), tuple(islice(recent, max(0, len(recent) - 14), None)))
+    return positions, len(directions) > 3, tuple(islice(directions, max(0, len(directions) - 2), None))
+
+
+# 记录随机抽取的随机数生成器代理
+class _RecordingRandom:
+    """把 choice 转发给 rng，并记录每次的候选个数（判断决策是否与随机抽取无关）"""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.sizes = []
+
+    def choice(self, seq):
+        self.sizes.append(len(seq))
+        return self.rng.choice(seq)
+
+
+# 从食物出发的 BFS 距离场
+def food_distance_field(game, deadline=None):
+    """
+    在扁平占用网格上从食物做一次 BFS，得到格子到食物的最短路径长度
+
+    玩家蛇和对抗蛇的身体都视为障碍。AI 只查询蛇头相邻格子的距离，
+    因此两条蛇蛇头的相邻空格全部标记后即停止搜索，食物较近时只需展开一小片区域。
+    结果按局面缓存在 game 上，同一局面下所有候选方向、两条蛇的 AI 调用都直接查表。
+
+    参数:
+        deadline: 截止时刻，每展开一层检查一次，超时抛出 SearchTimeout（不缓存部分结果）
+
+    返回:
+        list: dist[r * board_size + c]；不可达或超出搜索范围为 -1（蛇头相邻格子不会超出范围）
+    """
+    key = _state_key(game)
+    cached = getattr(game, 'food_distance_cache', None)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    n = game.board_size
+    dist = [-1] * (n * n)
+    fr, fc = game.food
+    if 0 <= fr < n and 0 <= fc < n:
+        occupancy = game.occupancy
+        neighbors = neighbor_table(n)
+
+        # 需要标记的目标：各条蛇蛇头的相邻空格
+        targets = set()
+        for snake in (game.snake, getattr(game, 'opponent_snake', None)):
+            if snake:
+                hr, hc = snake[0]
+                if 0 <= hr < n and 0 <= hc < n:
+                    targets.update(j for j in neighbors[hr * n + hc] if not occupancy[j])
+
+        start = fr * n + fc
+        dist[start] = 0
+        targets.discard(start)
+        frontier = [start]
+        step = 0
+        while frontier and targets:
+            _check_deadline(deadline)
+            step += 1
+            next_frontier = []
+            for i in frontier:
+                for j in neighbors[i]:
+                    if dist[j] < 0 and not occupancy[j]:
+                        dist[j] = step
+                        next_frontier.append(j)
+                        targets.discard(j)
+            frontier = next_frontier
+
+    game.food_distance_cache = (key, dist)
+    return dist
+
+
+# 按棋盘边长缓存每个格子到最近边界的距离
+@lru_cache(maxsize=None)
+def border_distance_table(board_size):
+    """返回列表：border_distance_table(n)[r * n + c] = min(r, c, n - 1 - r, n - 1 - c)"""
+    n = board_size
+    return [min(r, c, n - 1 - r, n - 1 - c) for r in range(n) for c in range(n)]
+
+
+# 空闲区域连通分量标记
+def free_regions(game, deadline=None):
+    """
+    在扁平占用网格上一次遍历标记所有空闲连通区域（玩家蛇和对抗蛇都视为障碍），没有节点上限
+
+    结果按局面缓存在 game 上，每个候选方向只需按标签查表。
+    指定 deadline 时每标记 256 个格子检查一次，超时抛出 SearchTimeout。
+
+    返回:
+        tuple: (labels, regions)
+            labels[r * board_size + c] 为格子所属区域编号，障碍为 -1
+            regions[k] 为 (格子数, 距边界≤1的格子数, 距边界≤2的格子数, 每行格子数, 每列格子数)
+    """
+    key = _state_key(game)
+    cached = getattr(game, 'free_region_cache', None)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    n = game.board_size
+    occupancy = game.occupancy
+    neighbors = neighbor_table(n)
+    border = border_distance_table(n)
+    labels = [-1] * (n * n)
+    regions = []
+
+    for seed in range(n * n):
+        if occupancy[seed] or labels[seed] >= 0:
+            continue
+        label = len(regions)
+        labels[seed] = label
+        stack = [seed]
+        row_counts = [0] * n
+        col_counts = [0] * n
+        size = near_border_1 = near_border_2 = 0
+        while stack:
+            i = stack.pop()
+            size += 1
+            if not size & 255:
+                _check_deadline(deadline)
+            r, c = divmod(i, n)
+            row_counts[r] += 1
+            col_counts[c] += 1
+            if border[i] <= 2:
+                near_border_2 += 1
+                if border[i] <= 1:
+                    near_border_1 += 1
+            for j in neighbors[i]:
+                if labels[j] < 0 and not occupancy[j]:
+                    labels[j] = label
+                    stack.append(j)
+        regions.append((size, near_border_1, near_border_2, row_counts, col_counts))
+
+    result = (labels, regions)
+    game.free_region_cache = (key, result)
+    return result
+
+
+# 考虑蛇身逐步移走的可达性分析
+def tail_aware_reachability(game, is_opponent=False, deadline=None):
+    """
+    从蛇头出发做一次按时间展开的 BFS：蛇身格子不再是永久障碍，
+    而是在它移走之后才可进入。第 t 步到达的格子若为某条蛇的第 i 节（蛇长 L），
+    要求 t >= L - i + offset：玩家蛇先移除尾部再判断碰撞，自身 offset 为 0；
+    对抗蛇移动前尾部尚未移除，另一条蛇也要等它走完这一步，offset 为 1。
+    （途中吃到食物时蛇尾会多停留一步，此处不计。）
+
+    蛇不能原地停留，但可以在已到达的区域里绕行消磨时间：搜索前沿经过一个尚未移走的
+    蛇身格子时，若需要等待的步数不超过该第一步已到达的格子数，就把它排到移走的那一步再进入。
+    这只是近似（没有检查绕行路线是否真的存在、步数奇偶是否吻合），小区域内可能略为高估。
+
+    每个格子记录它是由蛇头的哪个相邻格子（第一步动作）展开而来；
+    不同第一步的搜索相遇时合并为同一区域。
+    game 维护了 Zobrist 哈希时，结果按局面和控制对象缓存在 SPACE_CACHE 中。
+    指定 deadline 时每展开一层检查一次，超时抛出 SearchTimeout。
+
+    返回:
+        tuple: (space, escapes)
+            space[a] 为第一步走动作 a 后可到达的格子数（该步不可走时为 0）
+            escapes[a] 为该区域是否能进入移走后的蛇身格子（即能追上蛇尾、不会被困死）
+    """
+    shared = getattr(game, 'zobrist', None) is not None
+    if shared:
+        key = _state_key(game) + (is_opponent,)
+        cached = SPACE_CACHE.get(key)
+        if cached is not None:
+            return cached
+
+    n = game.board_size
+    neighbors = neighbor_table(n)
+    own = game.opponent_snake if is_opponent else game.snake
+    other = game.snake if is_opponent else getattr(game, 'opponent_snake', None)
+
+    # 每个格子最早可以进入的步数（空格为 0）
+    free_tick = [0] * (n * n)
+    for snake, offset in ((own, 1 if is_opponent else 0), (other, 1)):
+        if snake:
+            length = len(snake)
+            for i, (r, c) in enumerate(snake):
+                if 0 <= r < n and 0 <= c < n:
+                    free_tick[r * n + c] = max(free_tick[r * n + c], length - i + offset)
+
+    arrival = [-1] * (n * n)
+    origin = [-1] * (n * n)
+    parent = [0, 1, 2, 3]   # 按第一步动作合并区域的并查集
+    escaped = [False] * 4
+    opened = [False] * 4    # 第一步是否可走
+    reached = [0] * 4       # 每个第一步已到达的格子数（可用于绕行等待的步数）
+    scheduled = bytearray(n * n)  # 已排入等待队列的蛇身格子
+    waiting = {}            # 步数 -> 到该步移走、届时进入的 [(格子, 第一步动作)]
+
+    def find(a):
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        return a
+
+    hr, hc = own[0]
+    frontier = []
+    for action, dr, dc in DIRECTION_OFFSETS:
+        r, c = hr + dr, hc + dc
+        if 0 <= r < n and 0 <= c < n and free_tick[r * n + c] <= 1:
+            j = r * n + c
+            arrival[j] = 1
+            origin[j] = action
+            opened[action] = True
+            escaped[action] = free_tick[j] > 0
+            reached[action] += 1
+            frontier.append(j)
+
+    step = 1
+    while frontier or waiting:
+        _check_deadline(deadline)
+        step += 1
+        next_frontier = []
+        for i in frontier:
+            a = origin[i]
+            for j in neighbors[i]:
+                if arrival[j] >= 0:
+                    # 与其他第一步展开的区域相遇：合并
+                    b = origin[j]
+                    if b != a:
+                        ra, rb = find(a), find(b)
+                        if ra != rb:
+                            parent[rb] = ra
+                elif free_tick[j] <= step:
+                    arrival[j] = step
+                    origin[j] = a
+                    reached[a] += 1
+                    if free_tick[j]:
+                        escaped[a] = True
+                    next_frontier.append(j)
+                elif not scheduled[j] and free_tick[j] - step <= reached[a]:
+                    # 尚未移走的蛇身格子：在已到达的区域里绕行，等它移走后再进入
+                    scheduled[j] = 1
+                    waiting.setdefault(free_tick[j], []).append((j, a))
+
+        # 等待到期的蛇身格子
+        for j, a in waiting.pop(step, ()):
+            if arrival[j] < 0:
+                arrival[j] = step
+                origin[j] = a
+                reached[a] += 1
+                escaped[a] = True
+                next_frontier.append(j)
+        frontier = next_frontier
+
+    # 按合并后的区域汇总格子数和逃生标记
+    counts = [0] * 4
+    for a in origin:
+        if a >= 0:
+            counts[find(a)] += 1
+    region_escaped = [False] * 4
+    for a in range(4):
+        if escaped[a]:
+            region_escaped[find(a)] = True
+    space = tuple(counts[find(a)] if opened[a] else 0 for a in range(4))
+    escapes = tuple(opened[a] and region_escaped[find(a)] for a in range(4))
+
+    result = (space, escapes)
+    if shared:
+        SPACE_CACHE.put(key, result)
+    return result
+
+
+# ---------------------------
+# AI 行为接口
+# ---------------------------
+def get_ai_action(game, is_opponent=False, rng=None, deadline=None):
+    """
+    智能AI策略：支持控制对抗蛇
+    优化版本：集成A*搜索、智能空间评估、循环检测和长期生存策略
+    对抗模式增强：添加攻击玩家、包围、食物竞争和防御策略
+    is_opponent: True=控制红色对抗蛇，False=控制绿色玩家蛇
+    rng: AI 使用的随机数生成器，默认为 game.ai_rng（不影响游戏本身的随机序列）
+    deadline: 截止时刻（time.perf_counter()），搜索超时抛出 SearchTimeout，默认不限时
+
+    game 维护了 Zobrist 哈希时，选择的动作按局面和搜索用到的历史（_history_key）
+    缓存在 DECISION_CACHE 中，其他对局或回放中出现过的局面直接复用。只缓存与随机抽取
+    无关的决策（每次 choice 都只有一个候选）；命中时按相同次数推进 rng、按相同方式记录历史，
+    因此命中与重新搜索的结果和之后的随机序列完全相同。本局内重复出现的局面说明蛇在绕圈，
+    此时不查缓存，重新搜索（循环检测和随机选择有机会跳出循环）。
+    """
+    if rng is None:
+        rng = game.ai_rng
+    if getattr(game, 'zobrist', None) is None:
+        return _search_ai_action(game, is_opponent, rng, deadline)
+
+    # 本局已访问的局面（重置后蛇身为新的 deque，集合随之重建）
+    visited = getattr(game, 'visited_states', None)
+    if visited is None or visited[0] != id(game.snake):
+        visited = game.visited_states = (id(game.snake), set())
+    state = _state_key(game) + (is_opponent,)
+    repeated = state in visited[1]
+    visited[1].add(state)
+    key = state + _history_key(game, is_opponent)
+
+    if not repeated:
+        cached = DECISION_CACHE.get(key)
+        if cached is not None:
+            action, draws, recorded = cached
+            for _ in range(draws):
+                rng.choice((action,))  # 与搜索时相同地消耗随机数
+            # 与搜索时相同地记录位置和方向历史
+            if not hasattr(game, 'recent_positions'):
+                game.recent_positions = deque(maxlen=30)
+            game.recent_positions.append((game.opponent_snake if is_opponent else game.snake)[0])
+            if not hasattr(game, 'previous_directions'):
+                game.previous_directions = deque(maxlen=10)
+            if recorded:
+                game.previous_directions.append(action)
+            return action
+
+    before = tuple(getattr(game, 'previous_directions', ()))
+    recorder = _RecordingRandom(rng)
+    action = _search_ai_action(game, is_opponent, recorder, deadline)
+    if all(size == 1 for size in recorder.sizes):
+        # 方向历史有变化即为记录了本步方向（历史已满且内容不变时，记录与否结果相同）
+        recorded = tuple(getattr(game, 'previous_directions', ())) != before
+        DECISION_CACHE.put(key, (action, len(recorder.sizes), recorded))
+    return action
+
+
+# 启发式搜索（get_ai_action 未命中缓存时调用）
+def _search_ai_action(game, is_opponent, rng, deadline=None):
+    """参数与 get_ai_action 相同，rng 已确定"""
+    # 根据控制对象选择蛇的信息
+    if is_opponent:
+        snake = game.opponent_snake
+        direction = game.opponent_direction
+        
+        # 获取玩家蛇信息（对抗模式特有）
+        if hasattr(game, 'snake'):
+            player_snake = game.snake
+            player_head = player_snake[0] if player_snake else None
+            player_body = game.snake_set if hasattr(game, 'snake_set') else set(player_snake)
+        else:
+            player_snake = []
+            player_head = None
+            player_body = set()
+    else:
+        snake = game.snake
+        direction = game.direction
+        
+        # 非对抗模式时初始化玩家相关变量
+        player_snake = []
+        player_head = None
+        player_body = set()
+    
+
+
+    head = snake[0]
+    board = game.board_size
+    snake_length = len(snake)
+    
+    # 计算游戏进度百分比
+    board_area = board * board
+    game_progress = snake_length / board_area
+
+    # 方向映射
+    dirs = {
+        0: (-1, 0),  # 上
+        1: (0, -1),  # 左
+        2: (0, 1),   # 右
+        3: (1, 0)    # 下
+    }
+
+    opposite = {"UP": 3, "DOWN": 0, "LEFT": 2, "RIGHT": 1}
+    opposite_dir = opposite.get(direction, -1)  # 使用对应蛇的当前方向
+
+    # 曼哈顿距离计算
+    def manhattan_dist(pos1, pos2):
+        return abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1])
+    
+    # ----------------------------------------------------------------------
+    # 🎯 食物距离场：每个局面只做一次 BFS，所有候选方向和两条蛇共用
+    # ----------------------------------------------------------------------
+    food_field = food_distance_field(game, deadline)
+
+    def first_step_to_food(start):
+        """沿食物距离场从 start 走向食物：返回 (第一步方向, 路径长度)，不可达时为 (None, inf)"""
+        sr, sc = start
+        best_dir, best_dist = None, -1
+        for d, (dr, dc) in dirs.items():
+            r, c = sr + dr, sc + dc
+            if 0 <= r < board and 0 <= c < board:
+                dist = food_field[r * board + c]
+                if dist >= 0 and (best_dir is None or dist < best_dist):
+                    best_dir, best_dist = d, dist
+        if best_dir is None:
+            return None, float('inf')
+        return best_dir, best_dist + 1
+
+    # ----------------------------------------------------------------------
+    # 🏃 智能空间评估：考虑蛇身体增长后的安全空间
+    # ----------------------------------------------------------------------
+    region_labels, regions = free_regions(game, deadline)
+    # 按时间展开的可达性：蛇身格子移走后即可进入，第一步可以跟进即将移走的蛇尾
+    reach_space, reach_escapes = tail_aware_reachability(game, is_opponent, deadline)
+
+    def advanced_flood_fill(start, d):
+        """
+        空间安全评分：直接读取 start 所在空闲区域的统计（区域在每个局面只标记一次）
+        评分综合区域大小、到 start 的平均距离和靠近边界的格子比例；
+        第一步 d 能追上移走的蛇身时，空间按可达性分析的格子数计算，不再视为死路
+        """
+        r0, c0 = start
+        # 快速检查起点是否有效
+        if not (0 <= r0 < board and 0 <= c0 < board) or not reach_space[d]:
+            return 1  # 返回最小值
+        label = region_labels[r0 * board + c0]
+        if label >= 0:
+            seen_size, near_border_1, near_border_2, row_counts, col_counts = regions[label]
+            # 区域内各格子到起点的平均曼哈顿距离（由行、列直方图直接求得）
+            avg_distance = (sum(count * abs(r - r0) for r, count in enumerate(row_counts) if count)
+                            + sum(count * abs(c - c0) for c, count in enumerate(col_counts) if count)) / seen_size
+        else:
+            # 起点是即将移走的蛇身格子，不属于任何空闲区域
+            seen_size = near_border_1 = near_border_2 = 0
+            avg_distance = 1
+        if reach_escapes[d]:
+            seen_size = max(seen_size, reach_space[d])
+        if seen_size == 0:
+            return 1
+
+        # 游戏后期调整边界阈值
+        boundary_count = near_border_2 if game_progress > 0.7 else near_border_1
+        boundary_ratio = boundary_count / seen_size
+        
+        # 优化评分计算
+        if game_progress > 0.6:
+            # 游戏后期更看重空间大小和安全性
+            safety_factor = 1.0 - boundary_ratio
+            return max(1, int(seen_size * 2 * safety_factor))
+        else:
+            # 综合评分：空间大小 * 平均距离 * (1 - 边界接近度)
+            score = seen_size * avg_distance * (1 - boundary_ratio)
+            return max(1, score)
+    
+    # ----------------------------------------------------------------------
+    # 🔄 循环检测：避免蛇在小区域内原地绕圈
+    # ----------------------------------------------------------------------
+    def detect_cycle(pos):
+        """优化版循环检测算法，更高效地识别绕圈行为"""
+        # 如果蛇很短，不可能形成循环
+        if snake_length < 8:  # 降低阈值以便更早检测
+            return False
+        
+        # 获取位置历史记录
+        recent_positions = getattr(game, 'recent_positions', None)
+        if not recent_positions or len(recent_positions) < 12:  # 降低历史长度要求
+            return False
+        
+        # 优化1：使用集合快速统计唯一位置数量
+        recent_10_pos = list(recent_positions)[-10:]
+        unique_pos_count = len(set(recent_10_pos))
+        
+        # 如果唯一位置太少，可能在绕圈
+        if unique_pos_count <= 4:  # 更宽松的阈值，提高检测敏感度
+            return True
+        
+        # 优化2：计算最近位置的平均距离（优化计算方式）
+        if len(recent_positions) > 15:
+            # 只计算最近的8个位置与当前位置的距离
+            recent_8_pos = list(recent_positions)[-8:]
+            total_dist = 0
+            for old_pos in recent_8_pos:
+                total_dist += manhattan_dist(pos, old_pos)
+            avg_dist = total_dist / 8
+            
+            # 游戏后期更严格地检测
+            threshold = 3.0
+            if game_progress > 0.6:
+                threshold = 2.5
+            
+            if avg_dist < threshold:
+                return True
+        
+        # 优化3：检测方向变化模式
+        if len(recent_positions) >= 15:
+            # 检查是否在进行频繁的U形转弯
+            direction_changes = 0
+            positions = list(recent_positions)[-15:]
+            
+            for i in range(2, len(positions)):
+                # 计算连续两步的方向
+                prev_dir = (positions[i-1][0] - positions[i-2][0], 
+                           positions[i-1][1] - positions[i-2][1])
+                curr_dir = (positions[i][0] - positions[i-1][0], 
+                           positions[i][1] - positions[i-1][1])
+                
+                # 检查是否反向
+                if (prev_dir[0] == -curr_dir[0] and prev_dir[1] == -curr_dir[1]):
+                    direction_changes += 1
+                    # 如果短时间内多次反向，立即判定为循环
+                    if direction_changes >= 2:
+                        return True
+        
+        return False
+    
+    # 初始化或更新蛇的位置历史记录
+    if not hasattr(game, 'recent_positions'):
+        game.recent_positions = deque(maxlen=30)  # 减少历史记录长度，节省内存
+    game.recent_positions.append(head)
+    
+    # ----------------------------------------------------------------------
+    # 🔍 评估所有可能的移动方向
+    # ----------------------------------------------------------------------
+    def evaluate_directions():
+        direction_scores = {}
+        hx, hy = head
+
+        # 玩家蛇到食物的路径在所有候选方向间共用（对抗模式）
+        if is_opponent and player_head:
+            player_food_dir, player_food_dist = first_step_to_food(player_head)
+        
+        for d, (dr, dc) in dirs.items():
+            nr, nc = hx + dr, hy + dc
+            new_pos = (nr, nc)
+            
+            # 跳过反向和走不通的方向（即将移走的蛇尾可以进入）
+            if d == opposite_dir or not reach_space[d]:
+                direction_scores[d] = -1
+                continue
+            
+            # 循环惩罚
+            if detect_cycle(new_pos):
+                cycle_penalty = 0.3  # 降低可能导致循环的方向的评分
+            else:
+                cycle_penalty = 1.0
+            
+            # 计算方向评分
+            score = 0
+            
+            # 基础策略评分
+            
+            # 1. 空间安全评分
+            space_score = advanced_flood_fill(new_pos, d)
+            score += space_score * 0.4  # 空间安全权重
+            
+            # 2. 食物接近度评分（距离场中的实际路径长度，不可达时视为整个棋盘）
+            dist_to_food = food_field[nr * board + nc]
+            if dist_to_food < 0:
+                dist_to_food = board_area
+            # 距离越近分数越高，但使用非线性关系
+            food_score = 100 / (dist_to_food + 1)
+            score += food_score * 0.3  # 食物接近度权重
+            
+            # 3. 边界远离度评分（越远离边界越安全）
+            border_dist = min(nr, board - 1 - nr, nc, board - 1 - nc)
+            border_score = border_dist * 10
+            score += border_score * 0.2  # 边界远离度权重
+            
+            # 4. 移动多样性评分（避免一直朝一个方向移动）
+            if hasattr(game, 'previous_directions') and len(game.previous_directions) > 3:
+                if d == game.previous_directions[-1] == game.previous_directions[-2]:
+                    direction_penalty = 0.7  # 连续多次同一方向会被惩罚
+                else:
+                    direction_penalty = 1.0
+            else:
+                direction_penalty = 1.0
+            
+            # 对抗模式特有策略（当is_opponent=True时）
+            if is_opponent and player_head:
+                
+                # 5. 玩家攻击策略：尝试攻击玩家蛇头
+                player_attack_bonus = 0
+                dist_to_player = manhattan_dist(new_pos, player_head)
+                
+                # 如果距离玩家蛇头很近，给予攻击奖励
+                if dist_to_player <= 2:
+                    # 计算是否可以在下一步或两步内攻击到玩家
+                    if dist_to_player == 1:
+                        player_attack_bonus = 300  # 直接攻击奖励
+                    elif dist_to_player == 2:
+                        player_attack_bonus = 150  # 接近攻击奖励
+                
+                # 6. 包围策略：尝试切断玩家蛇的路径
+                encircle_bonus = 0
+                # 计算玩家蛇的可能移动方向
+                if len(player_snake) > 1:
+                    # 如果新位置可以切断玩家到食物的路径，给予奖励
+                    if player_food_dir is not None and new_pos in [
+                        (player_head[0] + dr, player_head[1] + dc) 
+                        for dr, dc in dirs.values()
+                    ]:
+                        encircle_bonus = 100
+                
+                # 7. 防御策略：避免被玩家包围
+                defense_bonus = 0
+                # 计算玩家蛇头与对抗蛇头的位置关系
+                if len(player_snake) > 5 and dist_to_player < 5:
+                    # 检查是否处于被包围的风险
+                    if space_score < 20:
+                        defense_bonus = 50  # 在被包围风险下优先逃跑
+                
+                # 8. 食物竞争策略：当食物靠近时优先获取
+                food_competition_bonus = 0
+                if dist_to_food < player_food_dist:
+                    food_competition_bonus = 80  # 比玩家更接近食物时的奖励
+                
+                # 9. 避免撞玩家蛇：给予玩家蛇身体更大的避让权重
+                avoid_player_penalty = 1.0
+                if new_pos in player_body:
+                    direction_scores[d] = -1
+                    continue
+                # 检查下一步是否靠近玩家蛇身体（只需查看四个相邻格子）
+                for pr, pc in dirs.values():
+                    if (nr + pr, nc + pc) in player_body:
+                        avoid_player_penalty = 0.5
+                        break
+                
+                # 根据游戏状态调整权重
+                current_weight = 0.1  # 默认权重较低
+                
+                # 根据分数差距调整攻击性
+                player_score = len(player_snake) - 3 if player_snake else 0
+                score_diff = score - player_score
+                
+                if score_diff > 5:  # 对抗蛇领先时，更注重防御
+                    current_weight = 0.1
+                elif score_diff < -5:  # 对抗蛇落后时，更注重攻击
+                    current_weight = 0.3
+                else:  # 势均力敌时，平衡策略
+                    current_weight = 0.2
+                
+                # 应用对抗模式策略评分
+                score += (player_attack_bonus + encircle_bonus + 
+                         defense_bonus + food_competition_bonus) * current_weight
+                cycle_penalty *= avoid_player_penalty
+            
+            # 综合所有评分
+            final_score = score * cycle_penalty * direction_penalty
+            direction_scores[d] = final_score
+        
+        return direction_scores
+    
+    # ----------------------------------------------------------------------
+    # � 主决策逻辑
+    # ----------------------------------------------------------------------
+    # 1. 首先沿食物距离场找食物路径
+    food_dir, path_length = first_step_to_food(head)
+    
+    # 如果有到食物的安全路径，且不会导致立即危险
+    if food_dir is not None and food_dir != opposite_dir:
+        # 检查路径第一步是否安全（空间足够）
+        hx, hy = head
+        dr, dc = dirs[food_dir]
+        next_pos = (hx + dr, hy + dc)
+        
+        # 计算吃完食物后的预期空间
+        # 模拟吃完食物后的身体状态（假设身体变长）
+        if hasattr(game, 'simulate_growth'):
+            future_space = game.simulate_growth(next_pos)
+        else:
+            # 简化版：当前空间评估
+            future_space = advanced_flood_fill(next_pos, food_dir)
+        
+        # 如果吃完食物后仍有足够空间，就去吃
+        min_safe_space = max(10, snake_length // 2)  # 最小安全空间
+        if future_space > min_safe_space:
+            # 记录方向历史
+            if not hasattr(game, 'previous_directions'):
+                game.previous_directions = deque(maxlen=10)
+            game.previous_directions.append(food_dir)
+            return food_dir
+    
+    # 2. 如果没有直接路径或路径不安全，评估所有方向
+    direction_scores = evaluate_directions()
+    
+    # 找到评分最高的方向
+    valid_directions = [(score, d) for d, score in direction_scores.items() if score > 0]
+    
+    if valid_directions:
+        # 按评分排序
+        valid_directions.sort(reverse=True, key=lambda x: x[0])
+        
+        # 选择最高分方向，但添加一些随机性以避免陷入局部最优
+        best_score = valid_directions[0][0]
+        # 找出所有接近最高分的方向（允许5%的误差）
+        candidates = [d for score, d in valid_directions if score >= best_score * 0.95]
+        
+        # 从候选方向中随机选择（增加探索性）
+        chosen_dir = rng.choice(candidates)
+        
+        # 记录方向历史
+        if not hasattr(game, 'previous_directions'):
+            game.previous_directions = deque(maxlen=10)
+        game.previous_directions.append(chosen_dir)
+        
+        return chosen_dir
+    
+    # 3. 实在无路：随机选一条不反向的安全路
+    safe_moves = [d for d in dirs if reach_space[d] and d != opposite_dir]
+    
+    if safe_moves:
+        return rng.choice(safe_moves)
+    
+    # 4. 没路就随机（必死）
+    return rng.choice([0, 1, 2, 3])
+
+
+# ---------------------------
+# 限时（anytime）决策
+# ---------------------------
+
+# 贪心一步：不做任何搜索的保底动作
+def _greedy_action(game, is_opponent):
+    """在不反向、不越界、不撞蛇身的方向中选离食物曼哈顿距离最近的（O(1)）；都不可走时保持当前方向"""
+    n = game.board_size
+    snake = game.opponent_snake if is_opponent else game.snake
+    direction = game.opponent_direction if is_opponent else game.direction
+    current = ACTION_NAMES.index(direction)
+    (hr, hc), (fr, fc) = snake[0], game.food
+    occupancy = game.occupancy
+
+    best_action, best_dist = current, None
+    for action, dr, dc in DIRECTION_OFFSETS:
+        r, c = hr + dr, hc + dc
+        if action != 3 - current and 0 <= r < n and 0 <= c < n and not occupancy[r * n + c]:
+            dist = abs(r - fr) + abs(c - fc)
+            if best_dist is None or dist < best_dist:
+                best_action, best_dist = action, dist
+    return best_action
+
+
+# 吃食物安全检查
+def _safe_after_eating(game, is_opponent, action, deadline=None):
+    """
+    第一步走 action 后沿食物距离场的最短路径走到食物，检查吃完后能否追上蛇尾（另一条蛇视为不动）
+
+    食物从该方向不可达时，改为检查当前局面下该方向能否追上蛇尾或可达空间不小于蛇长；
+    超过 deadline 时抛出 SearchTimeout
+    """
+    n = game.board_size
+    own = game.opponent_snake if is_opponent else game.snake
+    space, escapes = tail_aware_reachability(game, is_opponent, deadline)
+    if not space[action]:
+        return False
+
+    _, dr, dc = DIRECTION_OFFSETS[action]
+    i = (own[0][0] + dr) * n + own[0][1] + dc
+    field = food_distance_field(game, deadline)
+    if field[i] < 0:
+        return escapes[action] or space[action] >= len(own)
+
+    # 沿距离场下降到食物（路径上的格子距离都更小，已被 BFS 标记）
+    neighbors = neighbor_table(n)
+    path = [i]
+    while field[i] > 0:
+        i = next(j for j in neighbors[i] if field[j] == field[i] - 1)
+        path.append(i)
+
+    future = deque(own)
+    for i in path[:-1]:
+        future.appendleft(divmod(i, n))
+        future.pop()
+    future.appendleft(divmod(path[-1], n))  # 吃到食物，蛇尾不动
+
+    other = game.snake if is_opponent else getattr(game, 'opponent_snake', None)
+    view = SimpleNamespace(board_size=n, food=game.food,
+                           snake=other if is_opponent else future,
+                           opponent_snake=future if is_opponent else other)
+    space, escapes = tail_aware_reachability(view, is_opponent, deadline)
+    return any(escapes) or max(space) >= len(future)
+
+
+# 前瞻搜索
+def _lookahead_values(game, is_opponent, candidates, depth, deadline):
+    """
+    对每个候选第一步，深度优先搜索之后 depth 步内是否存在一条活路（不反向，另一条蛇视为不动），
+    找到一条即停止
+
+    走法与 SnakeEngine 一致：玩家蛇先移走蛇尾再判断碰撞，对抗蛇带着蛇尾判断；
+    吃到食物时蛇变长（食物只算一次，不生成新食物）。走完后能追上蛇尾即视为活路。
+
+    参数:
+        candidates: 候选的第一步动作
+        depth: 第一步之后再走的步数
+        deadline: 截止时刻，每个局面检查一次，超时抛出 SearchTimeout
+
+    返回:
+        dict: 动作 -> 是否找到活路
+    """
+    n = game.board_size
+    own = game.opponent_snake if is_opponent else game.snake
+    other = game.snake if is_opponent else getattr(game, 'opponent_snake', None)
+    blocked = set(other) if other else set()
+    food = game.food
+    body = deque(own)
+    cells = set(body)
+
+    def alive():
+        # 先做找到蛇尾即停的普通洪泛，找不到时再做按时间展开的可达性分析（蛇身移走后可进入）
+        tail = body[-1]
+        stack = [body[0]]
+        seen = {body[0]}
+        popped = 0
+        while stack:
+            popped += 1
+            if not popped & 127:
+                _check_deadline(deadline)
+            r, c = stack.pop()
+            for _, dr, dc in DIRECTION_OFFSETS:
+                cell = (r + dr, c + dc)
+                if cell == tail:
+                    return True
+                if (cell not in seen and 0 <= cell[0] < n and 0 <= cell[1] < n
+                        and cell not in blocked and cell not in cells):
+                    seen.add(cell)
+                    stack.append(cell)
+        view = SimpleNamespace(board_size=n, food=food,
+                               snake=other if is_opponent else body,
+                               opponent_snake=body if is_opponent else other)
+        return any(tail_aware_reachability(view, is_opponent, deadline)[1])
+
+    def search(action, remaining, eaten):
+        _check_deadline(deadline)
+        _, dr, dc = DIRECTION_OFFSETS[action]
+        r, c = body[0][0] + dr, body[0][1] + dc
+        head = (r, c)
+        if not (0 <= r < n and 0 <= c < n) or head in blocked:
+            return False
+        eat = not eaten and head == food
+        tail = None
+        if not eat and not is_opponent:
+            tail = body.pop()
+            cells.discard(tail)
+        if head in cells:
+            if tail is not None:
+                body.append(tail)
+                cells.add(tail)
+            return False
+        if not eat and tail is None:
+            tail = body.pop()
+            cells.discard(tail)
+        body.appendleft(head)
+        cells.add(head)
+        try:
+            if remaining == 0:
+                return alive()
+            return any(search(nxt, remaining - 1, eaten or eat) for nxt in range(4) if nxt != 3 - action)
+        finally:
+            body.popleft()
+            cells.discard(head)
+            if tail is not None:
+                body.append(tail)
+                cells.add(tail)
+
+    return {action: search(action, depth, False) for action in candidates}
+
+
+# 限时 AI 模式
+def get_anytime_ai_action(game, is_opponent=False, rng=None, budget=None):
+    """
+    限时（anytime）AI 模式，参数与 get_ai_action 相同：在每步计算预算内逐级细化，到期返回目前最好的动作
+
+        第 0 级: 贪心一步（O(1)），保证总有可用动作
+        第 1 级: get_ai_action 的完整评估
+        第 2 级: 吃食物安全检查；所选方向吃完食物后会被困住时，按可达空间从大到小
+                 依次检查其他可走方向，改选第一个安全的方向
+        第 3 级: 逐层加深的前瞻搜索（_lookahead_values），一直加深到预算用完或
+                 LOOKAHEAD_MAX_DEPTH；按最深的完整一层，所选方向找不到活路而其他方向
+                 能找到时，改选其中可达空间最大的方向
+
+    各级搜索内部都检查截止时刻，超时立即返回目前最好的动作，预算是硬上限。
+    第 1、2 级开始前还会用上次实测的耗时判断是否来得及，来不及就跳过；
+    跳过的级别其耗时估计逐步衰减，之后还会再尝试。
+
+    参数:
+        budget: 每步计算预算（秒），默认按 game.ai_difficulty 查 AI_DIFFICULTY_BUDGETS
+    """
+    if budget is None:
+        budget = AI_DIFFICULTY_BUDGETS.get(getattr(game, 'ai_difficulty', 'medium'),
+                                           AI_DIFFICULTY_BUDGETS['medium'])
+    deadline = time.perf_counter() + budget
+
+    # 各级（第 1 级完整评估、第 2 级单次安全检查）上次实测的耗时
+    costs = getattr(game, 'anytime_costs', None)
+    if costs is None:
+        costs = game.anytime_costs = [0.0, 0.0]
+
+    def affordable(level):
+        if time.perf_counter() + costs[level] <= deadline:
+            return True
+        costs[level] *= 0.9
+        return False
+
+    best = _greedy_action(game, is_opponent)
+    if not affordable(0):
+        return best
+
+    start = time.perf_counter()
+    try:
+        best = get_ai_action(game, is_opponent, rng, deadline)
+    except SearchTimeout:
+        return best
+    finally:
+        costs[0] = time.perf_counter() - start
+    chosen = best
+
+    direction = game.opponent_direction if is_opponent else game.direction
+    opposite = 3 - ACTION_NAMES.index(direction)
+    if best == opposite:
+        return best
+
+    try:
+        if affordable(1):
+            start = time.perf_counter()
+            safe = _safe_after_eating(game, is_opponent, best, deadline)
+            costs[1] = time.perf_counter() - start
+            if not safe:
+                space, _ = tail_aware_reachability(game, is_opponent, deadline)
+                for action in sorted(range(4), key=lambda a: -space[a]):
+                    if action == best or action == opposite or not space[action]:
+                        continue
+                    if not affordable(1):
+                        break
+                    if _safe_after_eating(game, is_opponent, action, deadline):
+                        best = action
+                        break
+
+        space, _ = tail_aware_reachability(game, is_opponent, deadline)
+        candidates = [a for a in range(4) if a != opposite and space[a]]
+        if len(candidates) > 1:
+            # 保留最深一层至少有一个方向找到活路的结果（都找不到时再加深也没有意义）
+            values = None
+            try:
+                for depth in range(LOOKAHEAD_MAX_DEPTH + 1):
+                    result = _lookahead_values(game, is_opponent, candidates, depth, deadline)
+                    if not any(result.values()):
+                        break
+                    values = result
+            except SearchTimeout:
+                pass
+            if values and not values.get(best):
+                best = max((a for a in candidates if values[a]), key=lambda a: space[a])
+    except SearchTimeout:
+        pass
+
+    # 方向历史记录改选后的方向
+    if best != chosen and getattr(game, 'previous_directions', None):
+        game.previous_directions[-1] = best
+    return best
+
+
+# ---------------------------
+# 后台 AI 线程
+# ---------------------------
+class AIWorker:
+    """
+    后台 AI 线程：每一步提交后立即开始为下一步预先计算动作，主循环到点时只取结果，
+    搜索耗时不再占用绘制帧。
+
+    后台计算期间游戏状态不能被修改：主循环在修改状态之前（移动、重置等）
+    调用 wait() 等待计算结束，或调用 cancel() 丢弃结果。
+    """
+
+    def __init__(self, policy=None):
+        """
+        参数:
+            policy: AI 策略函数，签名与 get_ai_action 相同，默认为 get_anytime_ai_action
+        """
+        self.policy = policy or get_anytime_ai_action
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snake-ai")
+        self._pending = None  # (future, is_opponent, 提交时的局面标识)
+
+    def submit(self, game, is_opponent=False):
+        """在后台为当前局面计算下一步动作（会先丢弃尚未取走的结果）"""
+        self.cancel()
+        future = self._executor.submit(self.policy, game, is_opponent)
+        self._pending = (future, is_opponent, _state_key(game))
+
+    def wait(self):
+        """等待进行中的计算结束（保留结果），之后可以安全地修改游戏状态"""
+        if self._pending is not None:
+            wait([self._pending[0]])
+
+    def cancel(self):
+        """等待进行中的计算结束并丢弃结果"""
+        self.wait()
+        self._pending = None
+
+    def take(self, game, is_opponent=False):
+        """
+        取出预先计算的动作
+
+        提交后局面没有变化时直接使用；局面已变化（例如对抗模式中玩家蛇先走了一步）时，
+        只要该动作仍然不反向、不越界、不撞蛇身就继续使用，否则以及没有预计算结果时同步计算。
+        """
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            future, pending_opponent, key = pending
+            action = future.result()
+            if pending_opponent == is_opponent and (key == _state_key(game)
+                                                    or _still_safe(game, is_opponent, action)):
+                return action
+        return self.policy(game, is_opponent)
+
+    def close(self):
+        """丢弃结果并结束后台线程"""
+        self.cancel()
+        self._executor.shutdown(wait=True)
+
+
+# 检查预先计算的动作在当前局面下是否仍可走
+def _still_safe(game, is_opponent, action):
+    """不反向、不越界且目标格子未被任何一条蛇占用"""
+    n = game.board_size
+    snake = game.opponent_snake if is_opponent else game.snake
+    direction = game.opponent_direction if is_opponent else game.direction
+    if action == 3 - ACTION_NAMES.index(direction):
+        return False
+    _, dr, dc = DIRECTION_OFFSETS[action]
+    r, c = snake[0][0] + dr, snake[0][1] + dc
+    return 0 <= r < n and 0 <= c < n and not game.occupancy[r * n + c]
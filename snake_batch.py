@@ -0,0 +1,192 @@
+# 文件名: snake_batch.py
+# 贪吃蛇批量向量化环境（普通模式规则）
+# 用法: from snake_batch import SnakeBatchEnv
+"""
+批量贪吃蛇环境：把 N 个棋盘的状态保存在 NumPy 数组中，
+一次 step(actions) 调用同时推进所有棋盘。
+
+规则与 SnakeEngine.step（普通模式）一致：
+    - 动作 -1 表示保持方向，0:UP, 1:LEFT, 2:RIGHT, 3:DOWN，禁止 180 度转向
+    - 没吃到食物时先移除尾格，蛇头可以进入刚空出的尾格
+    - 撞墙或撞到自己即结束，吃到食物加 10 分并在空格中随机生成新食物
+结束的棋盘会在同一次 step 中自动重置，便于大批量连续采样。
+"""
+
+# 导入必要的模块
+import numpy as np
+
+# 方向编号与动作编号一致：0:UP, 1:LEFT, 2:RIGHT, 3:DOWN（相反方向为 3 - d）
+DIRECTION_ROW = np.array([-1, 0, 0, 1], dtype=np.int64)
+DIRECTION_COL = np.array([0, -1, 1, 0], dtype=np.int64)
+DIRECTION_DOWN = 3
+
+
+# ---------------------------
+# 批量环境主类
+# ---------------------------
+class SnakeBatchEnv:
+    # 批量环境主类（普通模式）
+    def __init__(self, num_envs, board_size=40, seed=0):
+        """
+        初始化批量环境
+
+        参数:
+            num_envs: 同时运行的棋盘数量 N
+            board_size: 棋盘边长（格子数）
+            seed: 随机种子，相同种子得到完全相同的批量轨迹
+        """
+        self.num_envs = num_envs
+        self.board_size = board_size
+        self.grid_size = board_size * board_size
+        self.rng = np.random.default_rng(seed)  # 实例独立的随机数生成器
+
+        n, cells = num_envs, self.grid_size
+        self._rows = np.arange(n)                              # 批量下标，用于花式索引
+        self.occupancy = np.zeros((n, cells), dtype=np.bool_)  # 扁平占用网格
+        self.body = np.zeros((n, cells), dtype=np.int32)       # 蛇身环形缓冲区（扁平下标）
+        self.head_ptr = np.zeros(n, dtype=np.int64)            # 蛇头在环形缓冲区中的位置
+        self.length = np.zeros(n, dtype=np.int64)              # 蛇长
+        self.direction = np.zeros(n, dtype=np.int64)           # 当前方向（动作编号）
+        self.food = np.zeros(n, dtype=np.int64)                # 食物位置（扁平下标，-1 表示无空格）
+        self.score = np.zeros(n, dtype=np.int64)               # 当前得分
+
+        self.reset()
+
+    # ---------------------------
+    # 重置
+    # ---------------------------
+
+    # 重置全部棋盘
+    def reset(self):
+        """重置全部棋盘并返回占用网格（形状为 (N, board_size, board_size) 的视图）"""
+        self._reset_envs(self._rows)
+        return self.occupancy.reshape(self.num_envs, self.board_size, self.board_size)
+
+    # 重置指定棋盘
+    def _reset_envs(self, idx):
+        """
+        把 idx 中的棋盘重置为初始状态：3 节蛇位于中心，方向向下
+
+        参数:
+            idx: 需要重置的棋盘下标数组
+        """
+        if len(idx) == 0:
+            return
+        n = self.board_size
+        mid = n // 2
+        self.occupancy[idx] = False
+        # 环形缓冲区从蛇尾到蛇头依次存放：(mid-1, mid), (mid, mid), (mid+1, mid)
+        initial = np.array([(mid - 1) * n + mid, mid * n + mid, (mid + 1) * n + mid], dtype=np.int32)
+        self.body[idx, :3] = initial
+        self.occupancy[idx[:, None], initial[None, :]] = True
+        self.head_ptr[idx] = 2
+        self.length[idx] = 3
+        self.direction[idx] = DIRECTION_DOWN
+        self.score[idx] = 0
+        self.food[idx] = self._spawn_food(idx)
+
+    # ---------------------------
+    # 移动
+    # ---------------------------
+
+    # 所有棋盘同时前进一步
+    def step(self, actions):
+        """
+        所有棋盘同时执行一步移动（普通模式）
+
+        参数:
+            actions: 长度为 N 的整数数组，-1（不变/无输入），或 0:UP, 1:LEFT, 2:RIGHT, 3:DOWN
+
+        返回:
+            tuple: (done, info)
+                done: 长度为 N 的布尔数组，表示该棋盘本步是否结束（已自动重置）
+                info: 字典，"food_obtained" 为本步是否吃到食物，
+                      "score" / "snake_size" 为本步结束时（重置前）的得分和蛇长
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        rows = self._rows
+        n = self.board_size
+        cap = self.grid_size
+
+        # 更新方向：忽略 -1 和 180 度转向
+        turn = (actions >= 0) & (actions != 3 - self.direction)
+        self.direction = np.where(turn, actions, self.direction)
+
+        # 计算新的蛇头位置
+        head = self.body[rows, self.head_ptr]
+        row = head // n + DIRECTION_ROW[self.direction]
+        col = head % n + DIRECTION_COL[self.direction]
+        hit_wall = (row < 0) | (row >= n) | (col < 0) | (col >= n)
+        new_head = np.where(hit_wall, 0, row * n + col)
+
+        # 没吃到食物的棋盘先移除尾格，蛇头可以进入刚空出的尾格
+        food_obtained = ~hit_wall & (new_head == self.food)
+        move = ~hit_wall & ~food_obtained
+        tail_ptr = (self.head_ptr - self.length + 1) % cap
+        tail = self.body[rows, tail_ptr]
+        self.occupancy[rows[move], tail[move]] = False
+        self.length -= move
+
+        # 撞墙或撞到自己即结束
+        hit_self = ~hit_wall & self.occupancy[rows, new_head]
+        done = hit_wall | hit_self
+        alive = ~done
+
+        # 存活的棋盘添加新蛇头
+        live = rows[alive]
+        self.head_ptr[live] = (self.head_ptr[live] + 1) % cap
+        self.body[live, self.head_ptr[live]] = new_head[live]
+        self.occupancy[live, new_head[live]] = True
+        self.length[live] += 1
+
+        # 吃到食物：加分并生成新食物；棋盘被占满时视为结束
+        eaters = rows[food_obtained & alive]
+        if len(eaters):
+            self.score[eaters] += 10
+            self.food[eaters] = self._spawn_food(eaters)
+            done[eaters] = self.food[eaters] < 0
+
+        info = {
+            "food_obtained": food_obtained,
+            "score": self.score.copy(),
+            "snake_size": self.length.copy(),
+        }
+
+        # 自动重置结束的棋盘
+        self._reset_envs(rows[done])
+
+        return done, info
+
+    # 在空格中随机生成食物
+    def _spawn_food(self, idx):
+        """
+        为 idx 中的每个棋盘在空格里均匀随机选取食物位置
+
+        参数:
+            idx: 棋盘下标数组
+
+        返回:
+            np.ndarray: 食物的扁平下标，没有空格的棋盘为 -1
+        """
+        free = ~self.occupancy[idx]
+        free_count = self.grid_size - self.length[idx]
+        # 第 k 个空格（k 在 [0, free_count) 中均匀选取）即为第一个累计空格数超过 k 的位置
+        k = (self.rng.random(len(idx)) * free_count).astype(np.int64)
+        position = np.argmax(np.cumsum(free, axis=1) > k[:, None], axis=1)
+        return np.where(free_count > 0, position, -1)
+
+    # ---------------------------
+    # 状态查询
+    # ---------------------------
+
+    # 获取所有棋盘的蛇头坐标
+    def heads(self):
+        """返回形状为 (N, 2) 的蛇头 (row, col) 坐标数组"""
+        head = self.body[self._rows, self.head_ptr]
+        return np.stack((head // self.board_size, head % self.board_size), axis=1)
+
+    # 获取某个棋盘的蛇身
+    def snake(self, env):
+        """返回第 env 个棋盘的蛇身坐标列表（下标0为蛇头），与 SnakeEngine.snake 顺序一致"""
+        ptr = (self.head_ptr[env] - np.arange(self.length[env])) % self.grid_size
+        return [divmod(int(i), self.board_size) for i in self.body[env, ptr]]
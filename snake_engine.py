@@ -0,0 +1,1172 @@
+# 文件名: snake_engine.py
+# 贪吃蛇无界面模拟引擎
+# 用法: from snake_engine import SnakeEngine
+"""
+贪吃蛇模拟引擎：只保存棋盘状态和移动规则，不依赖 pygame。
+
+可在没有显示器、音频设备的批处理主机上直接导入运行；
+相同的随机种子会得到完全相同的游戏轨迹。
+图形界面中的 SnakeGame 继承本类，只负责绘制、音效和输入处理。
+"""
+
+# 导入必要的模块
+import random, time
+from collections import deque, namedtuple
+from functools import lru_cache
+from itertools import islice
+
+# 占用网格中的格子状态（occupancy[r * board_size + c]）
+CELL_EMPTY = 0     # 空格
+CELL_PLAYER = 1    # 玩家蛇
+CELL_OPPONENT = 2  # 对抗蛇
+
+# Zobrist 哈希中的编号
+OWNER_PLAYER, OWNER_OPPONENT = 0, 1
+DIRECTION_INDEX = {"UP": 0, "LEFT": 1, "RIGHT": 2, "DOWN": 3}
+LINK_INDEX = {(-1, 0): 0, (0, -1): 1, (0, 1): 2, (1, 0): 3}  # 蛇身一节指向下一节（朝蛇尾）的方向
+LINK_END = 4                                                 # 蛇尾没有下一节
+
+# 游戏节奏（图形界面与无界面自我对局共用）
+DEFAULT_SNAKE_SPEED = 0.10  # 默认逻辑步长（秒/步），即 game_config["snake_speed"] 的默认值
+TIMED_MODE_SECONDS = 60     # 限时模式时长（秒）
+
+# 局面快照（不可变）：只包含模拟状态（普通模式或对抗模式），蛇身为元组，随机数生成器为 getstate() 的结果
+EngineSnapshot = namedtuple("EngineSnapshot", (
+    "snake", "direction", "food", "score",
+    "opponent_snake", "opponent_direction", "opponent_score", "opponent_dead",
+    "death_reason", "zobrist", "rng_state", "ai_rng_state"))
+
+
+# ---------------------------
+# Zobrist 哈希
+# ---------------------------
+
+# 按棋盘边长缓存 Zobrist 随机数表
+@lru_cache(maxsize=None)
+def zobrist_table(board_size):
+    """
+    生成 Zobrist 随机数表（固定种子，与游戏随机序列无关，同一边长在任何进程中都相同）
+
+    返回:
+        tuple: (segments, food, directions)
+            segments[owner * 5 + link][r * board_size + c]: 某条蛇的一节位于该格子且指向 link 方向
+            food[r * board_size + c]: 食物位于该格子
+            directions[owner * 4 + DIRECTION_INDEX[d]]: 某条蛇的当前方向
+    """
+    rng = random.Random(f"zobrist:{board_size}")
+    cells = board_size * board_size
+    segments = tuple(tuple(rng.getrandbits(64) for _ in range(cells)) for _ in range(2 * 5))
+    food = tuple(rng.getrandbits(64) for _ in range(cells))
+    directions = tuple(rng.getrandbits(64) for _ in range(2 * 4))
+    return segments, food, directions
+
+
+# ---------------------------
+# 空格池
+# ---------------------------
+class FreeCellPool:
+    """
+    空格池：空格标记数组 + 树状数组（Fenwick 树）计数
+
+    支持 O(1) 的成员判断和计数、O(log N) 的添加、删除和均匀随机选取，
+    用于替代每次生成食物都要 list(set) 的做法。对外接口与 set 保持一致
+    （add / discard / in / len / 迭代），元素为 (row, col) 元组。
+
+    随机选取按扁平下标顺序取第 k 个空格，结果只取决于哪些格子是空的，
+    与添加、删除的先后顺序无关；因此恢复快照后的食物位置与原对局完全相同。
+    """
+
+    def __init__(self, board_size, cells=()):
+        """
+        参数:
+            board_size: 棋盘边长（格子数）
+            cells: 初始空格位置的可迭代对象
+        """
+        self.board_size = board_size
+        size = board_size * board_size
+        self._free = bytearray(size)   # 每个格子（扁平下标 r * board_size + c）是否在池中
+        for r, c in cells:
+            if 0 <= r < board_size and 0 <= c < board_size:
+                self._free[r * board_size + c] = 1
+        self._count = sum(self._free)
+
+        # O(N) 建立树状数组：_tree[i] 为下标 (i - lowbit(i), i] 内的空格数（从 1 开始编号）
+        tree = [0] * (size + 1)
+        for i in range(1, size + 1):
+            tree[i] += self._free[i - 1]
+            parent = i + (i & -i)
+            if parent <= size:
+                tree[parent] += tree[i]
+        self._tree = tree
+        self._top = 1 << (size.bit_length() - 1) if size else 0  # 不超过 size 的最大 2 的幂
+
+    def _update(self, i, delta):
+        tree = self._tree
+        i += 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def add(self, pos):
+        """加入一个空格（越界位置和已在池中的位置直接忽略）"""
+        r, c = pos
+        if 0 <= r < self.board_size and 0 <= c < self.board_size:
+            i = r * self.board_size + c
+            if not self._free[i]:
+                self._free[i] = 1
+                self._count += 1
+                self._update(i, 1)
+
+    def discard(self, pos):
+        """移除一个空格"""
+        r, c = pos
+        if 0 <= r < self.board_size and 0 <= c < self.board_size:
+            i = r * self.board_size + c
+            if self._free[i]:
+                self._free[i] = 0
+                self._count -= 1
+                self._update(i, -1)
+
+    def copy(self):
+        """复制空格池（数组的浅拷贝）"""
+        clone = FreeCellPool.__new__(FreeCellPool)
+        clone.board_size = self.board_size
+        clone._free = self._free[:]
+        clone._count = self._count
+        clone._tree = self._tree[:]
+        clone._top = self._top
+        return clone
+
+    def choice(self, rng):
+        """用随机数生成器 rng 均匀地随机选取一个空格：在树状数组上二分查找第 k 个空格"""
+        k = rng.randrange(self._count)
+        tree = self._tree
+        i, step = 0, self._top
+        while step:
+            j = i + step
+            if j < len(tree) and tree[j] <= k:
+                i = j
+                k -= tree[j]
+            step >>= 1
+        return divmod(i, self.board_size)
+
+    def __contains__(self, pos):
+        r, c = pos
+        return (0 <= r < self.board_size and 0 <= c < self.board_size
+                and self._free[r * self.board_size + c] == 1)
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        n = self.board_size
+        return (divmod(i, n) for i, free in enumerate(self._free) if free)
+
+
+# ---------------------------
+# 模拟引擎主类
+# ---------------------------
+class SnakeEngine:
+    # 模拟引擎主类（无界面）
+
+    # Zobrist 哈希及其覆盖的状态（food / direction / opponent_direction 通过属性赋值时增量更新哈希）
+    zobrist = 0
+    _food = None
+    _direction = None
+    _opponent_direction = None
+
+    def __init__(self, seed=0, board_size=50, check_consistency=False):
+        """
+        初始化模拟引擎
+
+        参数:
+            seed: 随机种子，用于复现游戏状态
+            board_size: 棋盘边长（格子数）
+            check_consistency: 调试模式，每次增量更新空格池后与全量重建结果比对
+        """
+        # 棋盘参数
+        self.board_size = board_size          # 棋盘边长（格子数）
+        self.grid_size = self.board_size ** 2  # 总格子数
+
+        # 游戏状态初始化
+        self._zobrist_table = zobrist_table(board_size)
+        self.zobrist = 0         # 局面的 Zobrist 哈希（蛇身各节及其连接方向、食物、方向），每步 O(1) 增量更新
+        self.snake = None        # 玩家蛇身体（deque，下标0为蛇头）
+        self.occupancy = None    # 扁平占用网格，与 snake_set / opponent_snake_set 保持同步
+        self.non_snake = None    # 空格池（FreeCellPool），用于生成食物
+        self.direction = None
+        self.score = 0
+        self.food = None
+        self.seed_value = seed
+        self.check_consistency = check_consistency  # 空格池一致性检查（调试用，较慢）
+        # 每个实例拥有独立的随机数生成器，多个游戏可在同一进程/线程中互不干扰地运行
+        self.rng = random.Random(seed)               # 游戏规则（食物、对抗蛇重生）
+        self.ai_rng = random.Random(f"{seed}:ai")    # AI 决策，与游戏随机序列相互独立
+
+        self.reset()
+
+
+    # ---------------------------
+    # 复制模拟状态
+    # ---------------------------
+
+    # 复制当前局面
+    def copy(self):
+        """
+        复制模拟状态，返回新的 SnakeEngine（即使 self 是 SnakeGame，也不复制 pygame 对象、
+        AI 历史和缓存）。蛇身、占用网格和空格池各复制一次，随机数生成器状态一并复制，
+        因此副本与原局面的后续轨迹完全相同；用于前瞻搜索和蒙特卡洛模拟。
+        """
+        clone = SnakeEngine.__new__(SnakeEngine)
+        state = clone.__dict__
+        for name in ('board_size', 'grid_size', '_zobrist_table', 'zobrist', '_direction', '_food',
+                     'score', 'seed_value', 'death_reason', 'game_start_time',
+                     '_opponent_direction', 'opponent_dead', 'opponent_score',
+                     'ai1_direction', 'ai2_direction', 'ai1_dead', 'ai2_dead', 'ai1_score', 'ai2_score',
+                     'ai1_alive', 'ai2_alive'):
+            if name in self.__dict__:
+                state[name] = self.__dict__[name]
+        for name in ('snake', 'snake_set', 'opponent_snake', 'opponent_snake_set',
+                     'ai1_snake', 'ai1_snake_set', 'ai2_snake', 'ai2_snake_set', 'occupancy'):
+            if name in self.__dict__:
+                state[name] = self.__dict__[name].copy()
+        clone.non_snake = self.non_snake.copy()
+        clone.check_consistency = False
+        clone.rng = random.Random()
+        clone.rng.setstate(self.rng.getstate())
+        clone.ai_rng = random.Random()
+        clone.ai_rng.setstate(self.ai_rng.getstate())
+        return clone
+
+    # 保存局面快照
+    def snapshot(self):
+        """
+        把模拟状态（蛇身、食物、方向、分数、随机数生成器状态）保存为不可变的 EngineSnapshot，
+        不包含 pygame 对象、占用网格和空格池（恢复时按蛇身增量重建）。适用于普通模式和对抗模式，
+        影子模式（影子蛇不计入占用网格）不支持快照，抛出 ValueError。
+        """
+        if hasattr(self, 'ai1_snake'):
+            raise ValueError("影子模式不支持局面快照")
+        opponent = getattr(self, 'opponent_snake', None)
+        return EngineSnapshot(
+            tuple(self.snake), self._direction, self._food, self.score,
+            tuple(opponent) if opponent is not None else None, self._opponent_direction,
+            getattr(self, 'opponent_score', 0), getattr(self, 'opponent_dead', False),
+            self.death_reason, self.zobrist, self.rng.getstate(), self.ai_rng.getstate())
+
+    # 恢复局面快照
+    def restore(self, snap):
+        """
+        恢复 snapshot() 保存的局面（须为同一棋盘边长、同一模式，模式不一致时抛出 ValueError）
+
+        占用网格和空格池只按当前蛇身和快照蛇身增量更新，耗时 O(蛇长)，与棋盘大小无关；
+        哈希直接取快照中的值。
+        """
+        # 增量更新只清除当前模式下的蛇：模式不一致时另一模式的蛇会残留在网格中，直接拒绝
+        if hasattr(self, 'ai1_snake'):
+            raise ValueError("影子模式不支持恢复局面快照")
+        if (snap.opponent_snake is None) != (getattr(self, 'opponent_snake', None) is None):
+            expected = "普通模式" if getattr(self, 'opponent_snake', None) is None else "对抗模式"
+            actual = "普通模式" if snap.opponent_snake is None else "对抗模式"
+            raise ValueError(f"局面快照模式不一致：快照为{actual}，引擎为{expected}")
+        # 清除当前各条蛇占据的格子（撞到其他蛇的蛇头不覆盖网格，只清除本蛇的格子）
+        n = self.board_size
+        occupancy = self.occupancy
+        for snake, cell in ((self.snake, CELL_PLAYER), (getattr(self, 'opponent_snake', None), CELL_OPPONENT)):
+            for pos in snake or ():
+                r, c = pos
+                if 0 <= r < n and 0 <= c < n and occupancy[r * n + c] == cell:
+                    occupancy[r * n + c] = CELL_EMPTY
+                    self.non_snake.add(pos)
+
+        self.snake = deque(snap.snake)
+        self.snake_set = set(snap.snake)
+        if snap.opponent_snake is not None:
+            self.opponent_snake = deque(snap.opponent_snake)
+            self.opponent_snake_set = set(snap.opponent_snake)
+            self.opponent_score = snap.opponent_score
+            self.opponent_dead = snap.opponent_dead
+        # 先标记蛇身再标记蛇头：撞死的蛇头与原局面一样不覆盖被撞的格子
+        marks = [(snap.snake, CELL_PLAYER), (snap.opponent_snake, CELL_OPPONENT)]
+        for start, stop in ((1, None), (0, 1)):
+            for snake, cell in marks:
+                for pos in islice(snake or (), start, stop):
+                    r, c = pos
+                    if 0 <= r < n and 0 <= c < n and occupancy[r * n + c] == CELL_EMPTY:
+                        occupancy[r * n + c] = cell
+                        self.non_snake.discard(pos)
+
+        self._direction = snap.direction
+        self._opponent_direction = snap.opponent_direction
+        self._food = snap.food
+        self.score = snap.score
+        self.death_reason = snap.death_reason
+        self.zobrist = snap.zobrist
+        self.rng.setstate(snap.rng_state)
+        self.ai_rng.setstate(snap.ai_rng_state)
+
+    # 序列化时不保存 Zobrist 随机数表（按棋盘边长重新生成，每个进程只生成一次）
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_zobrist_table', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._zobrist_table = zobrist_table(self.board_size)
+
+
+    # ---------------------------
+    # 重置游戏状态
+    # ---------------------------
+
+    # 重新设置随机种子
+    def _reseed(self, seed):
+        """seed 不为 None 时用它重新初始化两个随机数生成器（与以该种子新建引擎相同），供录像回放复现对局"""
+        if seed is not None:
+            self.seed_value = seed
+            self.rng.seed(seed)
+            self.ai_rng.seed(f"{seed}:ai")
+
+    # 重置游戏状态（普通模式）
+    def reset(self, seed=None):
+        """重置游戏状态（普通模式）
+
+        初始化玩家蛇、食物位置和游戏状态变量。
+
+        参数:
+            seed: 新的随机种子，默认沿用当前随机数生成器的状态
+        """
+        self._reseed(seed)
+        # 计算棋盘中心点
+        mid = self.board_size // 2
+
+        # 初始化玩家蛇（3节，位于中心）
+        self.snake = deque((mid + i, mid) for i in range(1, -2, -1))
+        self.snake_set = set(self.snake)  # 用于快速碰撞检测
+        self.direction = "DOWN"          # 玩家蛇初始方向
+
+        # 初始化游戏状态
+        self.score = 0
+        self.death_reason = None
+        self.game_start_time = time.time()  # 初始化游戏开始时间
+
+        # 重建占用网格和可用位置集合
+        self._rebuild_occupancy()
+        self._update_available_positions()
+
+        # 生成初始食物
+        self.food = self._generate_food()
+
+    # 重置游戏状态（影子模式）
+    def reset_three_snake_mode(self, seed=None):
+        """重置影子模式游戏状态
+
+        初始化玩家蛇、AI1蛇（影子）、AI2蛇（影子）、食物位置和游戏状态变量。
+        AI蛇完全模仿玩家的移动和蛇身长度，AI就是影子，AI死亡玩家也会死亡。
+
+        参数:
+            seed: 新的随机种子，默认沿用当前随机数生成器的状态
+        """
+        self._reseed(seed)
+        # 计算棋盘中心点
+        mid = self.board_size // 2
+
+        # 初始化玩家蛇（3节，位于中心）
+        self.snake = deque((mid + i, mid) for i in range(1, -2, -1))
+        self.snake_set = set(self.snake)
+        self.direction = "DOWN"          # 玩家蛇初始方向
+
+        # 初始化AI1蛇（3节，位于玩家左侧）
+        self.ai1_snake = [(mid + i, mid - 5) for i in range(1, -2, -1)]
+        self.ai1_snake_set = set(self.ai1_snake)
+        self.ai1_direction = "DOWN"       # AI1蛇初始方向（与玩家相同）
+        self.ai1_dead = False
+
+        # 初始化AI2蛇（3节，位于玩家右侧）
+        self.ai2_snake = [(mid + i, mid + 5) for i in range(1, -2, -1)]
+        self.ai2_snake_set = set(self.ai2_snake)
+        self.ai2_direction = "DOWN"       # AI2蛇初始方向（与玩家相同）
+        self.ai2_dead = False
+
+        # 初始化游戏状态
+        self.score = 0
+        self.ai1_score = 0
+        self.ai2_score = 0
+        self.death_reason = None
+        self.game_start_time = time.time()  # 初始化游戏开始时间
+
+        # 重建占用网格（影子蛇每步整体重算，不计入网格）
+        self._rebuild_occupancy()
+
+        # 更新可用位置集合（排除三条蛇的位置）
+        all_snake_positions = self.snake_set | self.ai1_snake_set | self.ai2_snake_set
+        self.non_snake = FreeCellPool(self.board_size, ((r, c) for r in range(self.board_size) for c in range(self.board_size) if (r, c) not in all_snake_positions))
+
+        # 生成初始食物
+        self.food = self._generate_food()
+
+    # 重置游戏状态（对抗模式）
+    def reset_opponent_mode(self, seed=None):
+        """重置游戏状态（对抗模式）
+
+        初始化玩家蛇、对抗蛇、食物位置和游戏状态变量。
+
+        参数:
+            seed: 新的随机种子，默认沿用当前随机数生成器的状态
+        """
+        self._reseed(seed)
+        # 计算棋盘中心点
+        mid = self.board_size // 2
+
+        # 初始化玩家蛇（3节，位于中心）
+        self.snake = deque((mid + i, mid) for i in range(1, -2, -1))
+        self.snake_set = set(self.snake)
+        self.direction = "DOWN"          # 玩家蛇初始方向
+
+        # 初始化对抗蛇（3节，位于对角位置避免与玩家蛇重叠）
+        self.opponent_snake = deque((mid - i - 5, mid - 5) for i in range(1, -2, -1))
+        self.opponent_snake_set = set(self.opponent_snake)
+        self.opponent_direction = "UP"   # 对抗蛇初始方向（与玩家相反）
+        self.opponent_dead = False       # 对抗蛇死亡状态标记
+
+        # 初始化游戏状态
+        self.score = 0
+        self.opponent_score = 0
+        self.death_reason = None
+        self.game_start_time = time.time()  # 初始化游戏开始时间
+
+        # 重建占用网格和可用位置集合（排除两条蛇的位置）
+        self._rebuild_occupancy()
+        self._update_available_positions()
+
+        # 生成初始食物
+        self.food = self._generate_food()
+
+
+    # ---------------------------
+    # 游戏模式相关设置
+    # ---------------------------
+
+    # 执行游戏的一步移动（普通模式）
+    def step(self, action):
+        """
+        执行游戏的一步移动（普通模式）
+
+        参数:
+            action: -1（不变/无输入），或 0:UP, 1:LEFT, 2:RIGHT, 3:DOWN
+
+        返回:
+            tuple: (done, info) - done表示游戏是否结束，info包含游戏状态信息
+        """
+        # 更新方向（如果有新的动作输入）
+        if action != -1:
+            self._update_direction(action)
+
+        # 计算新的蛇头位置
+        row, col = self.snake[0]  # 当前蛇头位置
+        if self.direction == "UP":
+            row -= 1
+        elif self.direction == "DOWN":
+            row += 1
+        elif self.direction == "LEFT":
+            col -= 1
+        elif self.direction == "RIGHT":
+            col += 1
+
+        new_head = (row, col)
+
+        # 初始化状态变量
+        done = False
+        self.death_reason = None
+        food_obtained = False
+
+        # 处理蛇的移动
+        if new_head == self.food:
+            # 吃到食物的情况（不删除尾部，蛇长度增加）
+            food_obtained = True
+            self.score += 10
+        else:
+            # 没吃到食物的情况：先移除尾格，蛇头可以进入刚空出的尾格
+            self._pop_tail()
+
+        # 检查碰撞条件（占用网格查询为 O(1)，与蛇长无关）
+        # 1. 撞墙检测
+        if row < 0 or row >= self.board_size or col < 0 or col >= self.board_size:
+            done = True
+            self.death_reason = "撞墙死亡"
+        # 2. 撞到自己检测（检查蛇头是否与身体其他部分碰撞）
+        elif self.occupancy[row * self.board_size + col] == CELL_PLAYER:
+            done = True
+            self.death_reason = "撞到自己"
+
+        # 添加新头部
+        self._push_head(new_head, done)
+
+        # 吃到食物且游戏未结束时生成新食物
+        if not done and food_obtained:
+            self.food = self._generate_food()
+
+        # 调试模式：检查增量维护的哈希
+        if self.check_consistency:
+            self._check_zobrist("step")
+
+        # 构建并返回游戏状态信息
+        info = {
+            "snake_size": len(self.snake),
+            "snake_head_pos": self.snake[0],  # 直接使用元组，避免不必要的转换
+            "prev_snake_head_pos": self.snake[1] if len(self.snake) > 1 else self.snake[0],
+            "food_pos": self.food,
+            "food_obtained": food_obtained,
+            "death_reason": self.death_reason
+        }
+
+        return done, info
+
+    # 重建空格池，排除两条蛇的位置（对抗模式）
+    def _update_available_positions(self):
+        """全量重建空格池（O(board²)，仅在重置时使用）
+
+        以占用网格为准：玩家蛇和对抗蛇都不占用的格子即为空格。
+        移动过程中空格池只按变化的蛇头、蛇尾格子增量更新。
+        """
+        n = self.board_size
+        occupancy = self.occupancy
+        self.non_snake = FreeCellPool(n, (divmod(i, n) for i in range(self.grid_size)
+                                          if occupancy[i] == CELL_EMPTY))
+
+    # 调试模式：检查增量维护的空格池是否与全量重建一致
+    def _check_free_cells(self, where):
+        """
+        将增量维护的空格池与全量重建结果比对，不一致时抛出 RuntimeError
+
+        参数:
+            where: 调用位置，用于错误信息
+        """
+        n = self.board_size
+        expected = set(divmod(i, n) for i in range(self.grid_size) if self.occupancy[i] == CELL_EMPTY)
+        actual = set(self.non_snake)
+        if actual != expected or len(actual) != len(self.non_snake):
+            missing = sorted(expected - actual)[:5]
+            extra = sorted(actual - expected)[:5]
+            raise RuntimeError(f"{where}: 空格池与全量重建不一致，缺少 {missing}，多出 {extra}")
+
+    # 执行游戏的一步移动（对抗模式）
+    def step_opponent_mode(self, action):
+        """
+        执行游戏的一步移动（对抗模式）
+
+        参数:
+            action: -1（不变/无输入），或 0:UP, 1:LEFT, 2:RIGHT, 3:DOWN
+
+        返回:
+            tuple: (done, info) - done表示游戏是否结束，info包含游戏状态信息
+        """
+        # 更新方向（如果有新的动作输入）
+        if action != -1:
+            self._update_direction(action)
+
+        # 计算新的蛇头位置
+        row, col = self.snake[0]  # 当前蛇头位置
+        if self.direction == "UP":
+            row -= 1
+        elif self.direction == "DOWN":
+            row += 1
+        elif self.direction == "LEFT":
+            col -= 1
+        elif self.direction == "RIGHT":
+            col += 1
+
+        new_head = (row, col)
+
+        # 初始化状态变量
+        done = False
+        self.death_reason = None
+        food_obtained = False
+
+        # 检查是否吃到食物
+        if new_head == self.food:
+            food_obtained = True
+            self.score += 10
+        else:
+            # 没吃到食物时移除尾部，蛇头可以进入刚空出的尾格
+            self._pop_tail()
+
+        # 检查碰撞条件（占用网格查询为 O(1)，与蛇长无关）
+        # 1. 撞墙检测
+        if row < 0 or row >= self.board_size or col < 0 or col >= self.board_size:
+            done = True
+            self.death_reason = "撞墙死亡"
+        else:
+            cell = self.occupancy[row * self.board_size + col]
+            # 2. 撞到自己检测（检查蛇头是否与身体其他部分碰撞）
+            if cell == CELL_PLAYER:
+                done = True
+                self.death_reason = "撞到自己"
+            # 3. 撞到对抗蛇检测
+            elif cell == CELL_OPPONENT:
+                done = True
+                self.death_reason = "撞到对抗蛇"
+
+        # 添加新头部
+        self._push_head(new_head, done)
+
+        # 吃到食物且游戏未结束时生成新食物
+        if not done and food_obtained:
+            self.food = self._generate_food()
+
+        # 调试模式：检查增量维护的空格池
+        if self.check_consistency:
+            self._check_free_cells("step_opponent_mode")
+            self._check_zobrist("step_opponent_mode")
+
+        # 构建并返回游戏状态信息
+        info = {
+            "snake_size": len(self.snake),
+            "snake_head_pos": self.snake[0],  # 直接使用元组
+            "prev_snake_head_pos": self.snake[1] if len(self.snake) > 1 else self.snake[0],
+            "food_pos": self.food,
+            "food_obtained": food_obtained,
+            "death_reason": self.death_reason
+        }
+
+        return done, info
+
+    # 执行对抗蛇的一步移动（增强版）
+    def opponent_step(self, action):
+        """
+        处理对抗蛇的移动逻辑（增强版）
+
+        参数:
+            action: -1（不变/无输入），或 0:UP, 1:LEFT, 2:RIGHT, 3:DOWN
+
+        返回:
+            tuple: (done, info) - done表示对抗蛇是否死亡，
+                   info包含死亡原因和对抗蛇是否吃到食物
+        """
+        # 如果对抗蛇已经死亡，则不再移动
+        if hasattr(self, 'opponent_dead') and self.opponent_dead:
+            return True, {"death_reason": self.death_reason, "food_obtained": False}
+
+        # 更新移动方向（如果有新的动作输入）
+        if action != -1:
+            self._update_opponent_direction(action)
+
+        # 计算新的对抗蛇头位置
+        row, col = self.opponent_snake[0]  # 当前对抗蛇头位置
+        if self.opponent_direction == "UP":
+            row -= 1
+        elif self.opponent_direction == "DOWN":
+            row += 1
+        elif self.opponent_direction == "LEFT":
+            col -= 1
+        elif self.opponent_direction == "RIGHT":
+            col += 1
+
+        new_head = (row, col)
+
+        # 初始化状态变量
+        done = False
+        death_reason = None
+        food_obtained = False
+
+        # 检查碰撞条件（此时尾部尚未移除，占用网格查询为 O(1)）
+        # 1. 撞墙检测
+        if row < 0 or row >= self.board_size or col < 0 or col >= self.board_size:
+            done = True
+            death_reason = "对抗蛇撞墙死亡"
+        else:
+            cell = self.occupancy[row * self.board_size + col]
+            # 2. 撞到自己检测
+            if cell == CELL_OPPONENT:
+                done = True
+                death_reason = "对抗蛇撞到自己"
+            # 3. 撞到玩家蛇检测
+            elif cell == CELL_PLAYER:
+                done = True
+                death_reason = "对抗蛇撞到玩家蛇"
+
+        # 添加新头部（无论是否吃到食物）
+        self._zobrist_push(OWNER_OPPONENT, self.opponent_snake, new_head)
+        self.opponent_snake.appendleft(new_head)
+        self.opponent_snake_set.add(new_head)
+        if not done:
+            self.occupancy[row * self.board_size + col] = CELL_OPPONENT
+            self.non_snake.discard(new_head)
+
+        # 处理对抗蛇死亡逻辑
+        if done:
+            self.opponent_dead = True
+            self.death_reason = death_reason
+            # 为玩家增加额外奖励分数
+            self.score += 50  # 击败对抗蛇的奖励
+            return done, {"death_reason": death_reason, "food_obtained": False}
+
+        # 处理移动后的蛇身更新
+        if new_head != self.food:
+            # 没吃到食物时移除尾部（如果蛇长度>1）
+            if len(self.opponent_snake) > 1:
+                tail = self.opponent_snake.pop()
+                self._zobrist_pop(OWNER_OPPONENT, self.opponent_snake, tail)
+                self.opponent_snake_set.discard(tail)
+                self._set_cell(tail, CELL_EMPTY)
+                self.non_snake.add(tail)
+        else:
+            # 吃到食物，生成新食物
+            food_obtained = True
+            self.opponent_score += 10
+            self.food = self._generate_food()
+
+        # 空格池和哈希已按蛇头、蛇尾增量更新；调试模式下与全量重建比对
+        if self.check_consistency:
+            self._check_free_cells("opponent_step")
+            self._check_zobrist("opponent_step")
+
+        return done, {"death_reason": death_reason, "food_obtained": food_obtained}
+
+    # 重新部署对抗蛇（确保与玩家蛇不重叠）
+    def respawn_opponent(self):
+        """重新部署对抗蛇"""
+        mid = self.board_size // 2
+
+        # 尝试最多10次生成有效的对抗蛇位置
+        for _ in range(10):
+            # 随机选择一个远离玩家的区域
+            # 使用边界检查确保位置有效
+            opponent_row = self.rng.randint(2, self.board_size - 5)
+            opponent_col = self.rng.randint(2, self.board_size - 5)
+
+            # 创建对抗蛇（3节）
+            new_opponent_snake = deque((opponent_row + i, opponent_col) for i in range(1, -2, -1))
+            new_opponent_set = set(new_opponent_snake)
+
+            # 检查是否与玩家蛇重叠或越界
+            valid_position = True
+            for pos in new_opponent_snake:
+                r, c = pos
+                # 检查是否在棋盘内
+                if r < 0 or r >= self.board_size or c < 0 or c >= self.board_size:
+                    valid_position = False
+                    break
+                # 检查是否与玩家蛇重叠
+                if pos in self.snake_set:
+                    valid_position = False
+                    break
+
+            if valid_position:
+                # 有效位置，更新对抗蛇
+                self._clear_opponent_cells()
+                self.opponent_snake = new_opponent_snake
+                self.opponent_snake_set = new_opponent_set
+                self.opponent_direction = self.rng.choice(["UP", "DOWN", "LEFT", "RIGHT"])
+                self.opponent_dead = False
+                self._mark_opponent_cells()
+                return
+
+        # 如果多次尝试都失败，使用安全的默认位置
+        self._clear_opponent_cells()
+        self.opponent_snake = deque([(max(2, mid - 3), max(2, mid - 5)),
+                                     (max(2, mid - 4), max(2, mid - 5)),
+                                     (max(2, mid - 5), max(2, mid - 5))])
+        self.opponent_snake_set = set(self.opponent_snake)
+        self.opponent_direction = "UP"
+        self.opponent_dead = False
+        self._mark_opponent_cells()
+
+    # 更新玩家蛇的移动方向（防止180度转向）
+    def _update_direction(self, action):
+        """
+        根据用户操作更新玩家蛇的移动方向
+
+        参数:
+            action: 0:UP, 1:LEFT, 2:RIGHT, 3:DOWN
+
+        说明:
+            实现了180度转向限制，防止蛇直接反向移动
+        """
+        # 使用条件判断直接更新方向，避免不必要的嵌套
+        if action == 0 and self.direction != "DOWN":  # 向上且不与当前方向冲突
+            self.direction = "UP"
+        elif action == 1 and self.direction != "RIGHT":  # 向左且不与当前方向冲突
+            self.direction = "LEFT"
+        elif action == 2 and self.direction != "LEFT":  # 向右且不与当前方向冲突
+            self.direction = "RIGHT"
+        elif action == 3 and self.direction != "UP":  # 向下且不与当前方向冲突
+            self.direction = "DOWN"
+
+    # 更新对抗蛇的移动方向（防止180度转向）
+    def _update_opponent_direction(self, action):
+        """
+        根据输入更新对抗蛇的移动方向
+
+        参数:
+            action: 0:UP, 1:LEFT, 2:RIGHT, 3:DOWN
+
+        说明:
+            实现了180度转向限制，防止对抗蛇直接反向移动
+        """
+        # 使用条件判断直接更新方向，避免不必要的嵌套
+        if action == 0 and self.opponent_direction != "DOWN":  # 向上且不与当前方向冲突
+            self.opponent_direction = "UP"
+        elif action == 1 and self.opponent_direction != "RIGHT":  # 向左且不与当前方向冲突
+            self.opponent_direction = "LEFT"
+        elif action == 2 and self.opponent_direction != "LEFT":  # 向右且不与当前方向冲突
+            self.opponent_direction = "RIGHT"
+        elif action == 3 and self.opponent_direction != "UP":  # 向下且不与当前方向冲突
+            self.opponent_direction = "DOWN"
+
+    # 执行游戏的一步移动（影子模式）
+    def step_three_snake_mode(self, action):
+        """
+        影子模式的游戏逻辑步骤
+        AI蛇完全模仿玩家的移动和蛇身长度，AI就是影子，AI死亡玩家也死亡
+        玩家吃到食物增长蛇身，AI也会增长蛇身
+
+        参数:
+            action: -1（不变/无输入），或 0:UP, 1:LEFT, 2:RIGHT, 3:DOWN
+
+        返回:
+            tuple: (done, info) - done表示游戏是否结束，info包含游戏状态信息
+        """
+        # 确保AI蛇的生命状态属性存在并设置为True
+        if not hasattr(self, 'ai1_alive'):
+            self.ai1_alive = True
+        if not hasattr(self, 'ai2_alive'):
+            self.ai2_alive = True
+
+        # 初始化状态变量
+        done = False
+        self.death_reason = None
+        food_obtained = False
+
+        # 1. 处理玩家蛇的移动 - 传统蛇形移动方式
+        if action != -1:
+            self._update_direction(action)
+
+        # 计算新的蛇头位置
+        row, col = self.snake[0]  # 当前蛇头位置
+        if self.direction == "UP":
+            row -= 1
+        elif self.direction == "DOWN":
+            row += 1
+        elif self.direction == "LEFT":
+            col -= 1
+        elif self.direction == "RIGHT":
+            col += 1
+
+        new_head = (row, col)
+
+        # 检查碰撞条件（玩家蛇，此时尾部尚未移除）
+        # 1. 撞墙检测
+        if row < 0 or row >= self.board_size or col < 0 or col >= self.board_size:
+            done = True
+            self.death_reason = "玩家蛇撞墙死亡！"
+        # 2. 撞自己检测
+        elif self.occupancy[row * self.board_size + col] == CELL_PLAYER:
+            done = True
+            self.death_reason = "玩家蛇咬到自己！"
+        # 3. 撞AI蛇检测
+        elif hasattr(self, 'ai1_snake') and new_head in self.ai1_snake:
+            done = True
+            self.death_reason = "玩家蛇撞到AI1蛇！"
+        elif hasattr(self, 'ai2_snake') and new_head in self.ai2_snake:
+            done = True
+            self.death_reason = "玩家蛇撞到AI2蛇！"
+
+        # 添加新头部（无论是否吃到食物）
+        self._push_head(new_head, done)
+
+        # 2. 处理食物逻辑
+        if not done and hasattr(self, 'food') and new_head == self.food:
+            food_obtained = True
+            self.score += 10
+            # 记录最后食物位置用于视觉效果
+            if hasattr(self, 'non_snake'):
+                # 从可用位置集合中移除旧食物位置
+                self.non_snake.discard(self.food)
+            # 生成新食物
+            self.food = self._generate_food()
+        else:
+            # 如果没吃到食物，移除尾部（保持蛇长度不变）
+            self._pop_tail()
+
+        # 3. 处理AI蛇的移动 - AI蛇完全模仿玩家移动（作为影子）
+        if hasattr(self, 'ai1_snake') and hasattr(self, 'ai2_snake') and not done:
+            # 3.1 计算AI1蛇的新位置（位于玩家左侧一定距离）
+            shadow_offset1 = -5  # AI1位于玩家左侧5格
+            new_ai1_snake = []
+
+            for i, (r, c) in enumerate(self.snake):
+                # 复制玩家蛇的形状，但水平位置偏移
+                new_c = c + shadow_offset1
+                # 确保在边界内
+                new_c = max(0, min(new_c, self.board_size - 1))
+                new_ai1_snake.append((r, new_c))
+
+            # 3.2 计算AI2蛇的新位置（位于玩家右侧一定距离）
+            shadow_offset2 = 5  # AI2位于玩家右侧5格
+            new_ai2_snake = []
+
+            for i, (r, c) in enumerate(self.snake):
+                # 复制玩家蛇的形状，但水平位置偏移
+                new_c = c + shadow_offset2
+                # 确保在边界内
+                new_c = max(0, min(new_c, self.board_size - 1))
+                new_ai2_snake.append((r, new_c))
+
+            # 检查AI蛇的碰撞
+            # AI1蛇碰撞检测
+            ai1_dead = False
+            # 检查AI1蛇是否撞墙
+            for (r, c) in new_ai1_snake:
+                if r < 0 or r >= self.board_size or c < 0 or c >= self.board_size:
+                    ai1_dead = True
+                    break
+            # 检查AI1蛇是否咬自己
+            if not ai1_dead and len(set(new_ai1_snake)) != len(new_ai1_snake):
+                ai1_dead = True
+            # 检查AI1蛇是否撞玩家蛇
+            if not ai1_dead and any(pos in self.snake_set for pos in new_ai1_snake):
+                ai1_dead = True
+            # 检查AI1蛇是否撞AI2蛇
+            if not ai1_dead and any(pos in new_ai2_snake for pos in new_ai1_snake):
+                ai1_dead = True
+
+            # AI2蛇碰撞检测
+            ai2_dead = False
+            # 检查AI2蛇是否撞墙
+            for (r, c) in new_ai2_snake:
+                if r < 0 or r >= self.board_size or c < 0 or c >= self.board_size:
+                    ai2_dead = True
+                    break
+            # 检查AI2蛇是否咬自己
+            if not ai2_dead and len(set(new_ai2_snake)) != len(new_ai2_snake):
+                ai2_dead = True
+            # 检查AI2蛇是否撞玩家蛇
+            if not ai2_dead and any(pos in self.snake_set for pos in new_ai2_snake):
+                ai2_dead = True
+            # 检查AI2蛇是否撞AI1蛇
+            if not ai2_dead and any(pos in new_ai1_snake for pos in new_ai2_snake):
+                ai2_dead = True
+
+            # 更新AI蛇的生命状态
+            self.ai1_alive = not ai1_dead
+            self.ai2_alive = not ai2_dead
+
+            # 如果任何一条AI蛇死亡，玩家也死亡
+            if ai1_dead or ai2_dead:
+                done = True
+                if ai1_dead and ai2_dead:
+                    self.death_reason = "两条影子蛇都死亡了！"
+                elif ai1_dead:
+                    self.death_reason = "左侧影子蛇死亡了！"
+                else:
+                    self.death_reason = "右侧影子蛇死亡了！"
+            else:
+                # 更新AI蛇的位置
+                # 先从non_snake中移除旧位置
+                if hasattr(self, 'non_snake'):
+                    for pos in self.ai1_snake:
+                        self.non_snake.add(pos)
+                    for pos in self.ai2_snake:
+                        self.non_snake.add(pos)
+
+                # 更新AI蛇的位置
+                self.ai1_snake = new_ai1_snake
+                self.ai2_snake = new_ai2_snake
+
+                # 从non_snake中添加新位置
+                if hasattr(self, 'non_snake'):
+                    for pos in self.ai1_snake:
+                        self.non_snake.discard(pos)
+                    for pos in self.ai2_snake:
+                        self.non_snake.discard(pos)
+
+        # 返回游戏状态
+        info = {
+            "death_reason": self.death_reason,
+            "score": self.score,
+            "food_obtained": food_obtained,
+            "ai1_alive": self.ai1_alive,
+            "ai2_alive": self.ai2_alive
+        }
+
+        return done, info
+
+    # ---------------------------
+    # 蛇身与占用网格维护
+    # ---------------------------
+
+    # 设置占用网格中某个格子的状态（越界位置忽略）
+    def _set_cell(self, pos, value):
+        """设置占用网格中 pos 格的状态，越界位置直接忽略"""
+        r, c = pos
+        if 0 <= r < self.board_size and 0 <= c < self.board_size:
+            self.occupancy[r * self.board_size + c] = value
+
+    # 根据当前蛇身重建占用网格
+    def _rebuild_occupancy(self):
+        """根据 snake_set 和 opponent_snake_set 重建占用网格（仅在重置时调用）"""
+        self.occupancy = bytearray(self.grid_size)
+        for pos in self.snake_set:
+            self._set_cell(pos, CELL_PLAYER)
+        if hasattr(self, 'opponent_snake_set'):
+            for pos in self.opponent_snake_set:
+                self._set_cell(pos, CELL_OPPONENT)
+        self.zobrist = self._full_zobrist()
+
+    # 清除占用网格中对抗蛇（包括已死亡的对抗蛇）的格子
+    def _clear_opponent_cells(self):
+        """重新部署前清除旧对抗蛇在占用网格中的格子，并把空出的格子放回空格池"""
+        self.zobrist ^= self._body_zobrist(OWNER_OPPONENT, self.opponent_snake)
+        for pos in self.opponent_snake:
+            r, c = pos
+            if (0 <= r < self.board_size and 0 <= c < self.board_size
+                    and self.occupancy[r * self.board_size + c] == CELL_OPPONENT):
+                self.occupancy[r * self.board_size + c] = CELL_EMPTY
+                self.non_snake.add(pos)
+
+    # 在占用网格中标记新部署的对抗蛇
+    def _mark_opponent_cells(self):
+        """标记新对抗蛇占据的格子并从空格池中移除（只涉及对抗蛇的几个格子）"""
+        self.zobrist ^= self._body_zobrist(OWNER_OPPONENT, self.opponent_snake)
+        for pos in self.opponent_snake:
+            self._set_cell(pos, CELL_OPPONENT)
+            self.non_snake.discard(pos)
+        if self.check_consistency:
+            self._check_free_cells("respawn_opponent")
+            self._check_zobrist("respawn_opponent")
+
+    # 玩家蛇添加新头部
+    def _push_head(self, new_head, done):
+        """
+        在玩家蛇头部添加新格子，同步更新 snake_set、non_snake 和占用网格
+
+        参数:
+            new_head: 新蛇头位置
+            done: 本步是否已判定死亡（死亡时不覆盖占用网格中其他蛇的格子）
+        """
+        self._zobrist_push(OWNER_PLAYER, self.snake, new_head)
+        self.snake.appendleft(new_head)
+        self.snake_set.add(new_head)
+        self.non_snake.discard(new_head)
+        if not done:
+            self.occupancy[new_head[0] * self.board_size + new_head[1]] = CELL_PLAYER
+
+    # 玩家蛇移除尾部
+    def _pop_tail(self):
+        """移除玩家蛇尾部格子，同步更新 snake_set、non_snake 和占用网格"""
+        tail = self.snake.pop()
+        self._zobrist_pop(OWNER_PLAYER, self.snake, tail)
+        self.snake_set.discard(tail)
+        self.non_snake.add(tail)
+        r, c = tail
+        if 0 <= r < self.board_size and 0 <= c < self.board_size:
+            self.occupancy[r * self.board_size + c] = CELL_EMPTY
+        return tail
+
+    # ---------------------------
+    # Zobrist 哈希维护
+    # ---------------------------
+
+    # 食物和方向：赋值时增量更新哈希
+    @property
+    def food(self):
+        return self._food
+
+    @food.setter
+    def food(self, pos):
+        self.zobrist ^= self._food_zobrist(self._food) ^ self._food_zobrist(pos)
+        self._food = pos
+
+    @property
+    def direction(self):
+        return self._direction
+
+    @direction.setter
+    def direction(self, value):
+        self.zobrist ^= (self._direction_zobrist(OWNER_PLAYER, self._direction)
+                         ^ self._direction_zobrist(OWNER_PLAYER, value))
+        self._direction = value
+
+    @property
+    def opponent_direction(self):
+        return self._opponent_direction
+
+    @opponent_direction.setter
+    def opponent_direction(self, value):
+        self.zobrist ^= (self._direction_zobrist(OWNER_OPPONENT, self._opponent_direction)
+                         ^ self._direction_zobrist(OWNER_OPPONENT, value))
+        self._opponent_direction = value
+
+    # 食物位置的哈希值（无食物或越界为 0）
+    def _food_zobrist(self, pos):
+        if pos is None:
+            return 0
+        r, c = pos
+        n = self.board_size
+        return self._zobrist_table[1][r * n + c] if 0 <= r < n and 0 <= c < n else 0
+
+    # 蛇方向的哈希值（未设置为 0）
+    def _direction_zobrist(self, owner, direction):
+        if direction is None:
+            return 0
+        return self._zobrist_table[2][owner * 4 + DIRECTION_INDEX[direction]]
+
+    # 蛇身一节的哈希值
+    def _segment_zobrist(self, owner, pos, nxt):
+        """pos 处的一节指向下一节 nxt（蛇尾为 None）；越界的格子（撞墙后的蛇头）为 0"""
+        r, c = pos
+        n = self.board_size
+        if not (0 <= r < n and 0 <= c < n):
+            return 0
+        link = LINK_END if nxt is None else LINK_INDEX.get((nxt[0] - r, nxt[1] - c), LINK_END)
+        return self._zobrist_table[0][owner * 5 + link][r * n + c]
+
+    # 整条蛇的哈希值
+    def _body_zobrist(self, owner, snake):
+        """O(蛇长)，只在重置和重新部署时使用"""
+        h = 0
+        for pos, nxt in zip(snake, islice(snake, 1, None)):
+            h ^= self._segment_zobrist(owner, pos, nxt)
+        if snake:
+            h ^= self._segment_zobrist(owner, snake[-1], None)
+        return h
+
+    # 添加蛇头前更新哈希
+    def _zobrist_push(self, owner, snake, new_head):
+        """新蛇头指向原蛇头，其余各节不变"""
+        self.zobrist ^= self._segment_zobrist(owner, new_head, snake[0] if snake else None)
+
+    # 移除蛇尾后更新哈希
+    def _zobrist_pop(self, owner, snake, tail):
+        """移除原蛇尾，新的最后一节变为蛇尾"""
+        self.zobrist ^= self._segment_zobrist(owner, tail, None)
+        if snake:
+            last = snake[-1]
+            self.zobrist ^= self._segment_zobrist(owner, last, tail) ^ self._segment_zobrist(owner, last, None)
+
+    # 全量计算局面哈希
+    def _full_zobrist(self):
+        """由蛇身、食物和方向全量计算哈希（重置时使用）"""
+        h = self._body_zobrist(OWNER_PLAYER, self.snake)
+        h ^= self._food_zobrist(self._food) ^ self._direction_zobrist(OWNER_PLAYER, self._direction)
+        if getattr(self, 'opponent_snake', None) is not None:
+            h ^= self._body_zobrist(OWNER_OPPONENT, self.opponent_snake)
+        h ^= self._direction_zobrist(OWNER_OPPONENT, self._opponent_direction)
+        return h
+
+    # 调试模式：检查增量维护的哈希是否与全量计算一致
+    def _check_zobrist(self, where):
+        """不一致时抛出 RuntimeError"""
+        if self.zobrist != self._full_zobrist():
+            raise RuntimeError(f"{where}: Zobrist 哈希与全量计算不一致")
+
+    # 生成食物（确保不在蛇身体或对抗蛇身体上）
+    def _generate_food(self):
+        """随机在空格里生成食物（若无可用空格则返回 (0,0)）"""
+        if len(self.non_snake) > 0:
+            # 从空格池中 O(1) 均匀随机选取，无需把整个集合转换为列表
+            return self.non_snake.choice(self.rng)
+        else:
+            return (0, 0)
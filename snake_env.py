@@ -0,0 +1,106 @@
+# 文件名: snake_env.py
+# 贪吃蛇 Gym 风格接口（普通模式）
+# 用法: from snake_env import SnakeEnv
+"""
+在 SnakeEngine 之上提供 reset() / step(action) -> (obs, reward, done, info) 接口。
+
+观测是一个预先分配的 (board_size, board_size) uint8 网格：
+    OBS_EMPTY 空格、OBS_BODY 蛇身、OBS_HEAD 蛇头、OBS_FOOD 食物。
+每一步只根据变化的格子（新蛇头、旧蛇头、移除的蛇尾、新食物）原地更新，
+代价与棋盘大小无关。返回的 obs 是该缓冲区的只读视图而不是副本，
+下一次 step 会改变它的内容；需要保存历史观测时请自行 copy()。
+"""
+
+# 导入必要的模块
+import numpy as np
+
+from snake_engine import SnakeEngine
+
+# 观测网格中的格子取值
+OBS_EMPTY = 0  # 空格
+OBS_BODY = 1   # 蛇身
+OBS_HEAD = 2   # 蛇头
+OBS_FOOD = 3   # 食物
+
+# 奖励设置
+REWARD_FOOD = 1.0    # 吃到食物
+REWARD_DEATH = -1.0  # 撞墙或撞到自己
+
+
+# ---------------------------
+# Gym 风格环境
+# ---------------------------
+class SnakeEnv:
+    # Gym 风格环境主类（普通模式规则）
+    def __init__(self, seed=0, board_size=40, engine=None):
+        """
+        初始化环境
+
+        参数:
+            seed: 随机种子，传给 SnakeEngine，相同种子得到相同的轨迹
+            board_size: 棋盘边长（格子数）
+            engine: 可选，已有的 SnakeEngine / SnakeGame 实例（需要界面显示时传入），
+                    此时忽略 seed 和 board_size
+        """
+        self.engine = engine if engine is not None else SnakeEngine(seed=seed, board_size=board_size)
+        board_size = self.engine.board_size
+        self.board_size = board_size
+
+        # 预分配观测缓冲区，对外只提供只读视图
+        self._grid = np.zeros((board_size, board_size), dtype=np.uint8)
+        self.observation = self._grid.view()
+        self.observation.flags.writeable = False
+
+        self.reset()
+
+    # 重置环境
+    def reset(self):
+        """重置游戏并返回初始观测（重置时整张网格重绘一次）"""
+        engine = self.engine
+        engine.reset()
+        grid = self._grid
+        grid.fill(OBS_EMPTY)
+        for r, c in engine.snake:
+            grid[r, c] = OBS_BODY
+        grid[engine.snake[0]] = OBS_HEAD
+        grid[engine.food] = OBS_FOOD
+        return self.observation
+
+    # 执行一步
+    def step(self, action):
+        """
+        执行一步移动
+
+        参数:
+            action: -1（不变/无输入），或 0:UP, 1:LEFT, 2:RIGHT, 3:DOWN
+
+        返回:
+            tuple: (obs, reward, done, info)
+                obs: 观测网格的只读视图（原地更新）
+                reward: 吃到食物为 REWARD_FOOD，死亡为 REWARD_DEATH，否则为 0
+                done: 游戏是否结束，结束后需调用 reset()
+                info: SnakeEngine.step 返回的状态信息
+        """
+        engine = self.engine
+        old_head = engine.snake[0]
+        old_tail = engine.snake[-1]
+
+        done, info = engine.step(action)
+
+        # 死亡时蛇头可能在棋盘外，观测保持死亡前的局面
+        if done:
+            return self.observation, REWARD_DEATH, True, info
+
+        # 只更新发生变化的格子；先清除蛇尾，蛇头可能正好移入刚空出的尾格
+        grid = self._grid
+        if not info["food_obtained"]:
+            grid[old_tail] = OBS_EMPTY
+        grid[old_head] = OBS_BODY
+        grid[info["snake_head_pos"]] = OBS_HEAD
+        if info["food_obtained"]:
+            # 棋盘占满时引擎返回的食物位置落在蛇身上，不覆盖
+            if engine.food not in engine.snake_set:
+                grid[engine.food] = OBS_FOOD
+            return self.observation, REWARD_FOOD, False, info
+
+        return self.observation, 0.0, False, info
@@ -0,0 +1,286 @@
+# 文件名: snake_replay.py
+# 对局录像的录制与回放
+# 运行: python snake_replay.py replays/20260101-120000-12345.snkr [--seek 500]
+"""
+对局录像：只保存随机种子和动作序列，回放时用 SnakeEngine 重新模拟，
+因此无需保存画面即可完整复现任意一局（包括 AI 的死亡过程）。
+
+文件格式（小端）:
+    文件头 HEADER: 魔数 b"SNKR"、版本号、重置方式（RESET_*）、棋盘边长、随机种子
+    事件流: 每个事件一个字节 event << 3 | (action + 1)，event 为 EVENT_*，
+            action 为 -1（方向不变）或新的方向编号（0:UP, 1:LEFT, 2:RIGHT, 3:DOWN）；
+            该字节带 RUN_FLAG 时后面跟一个 LEB128 变长整数 n，表示同一事件连续出现 n + 2 次
+
+只有方向真正改变时才记录方向编号，其余都记为 -1，因此直线移动的长段被压缩成几个字节，
+平均每帧只需一到两个字节。
+
+回放器每 KEYFRAME_INTERVAL 帧保存一次局面快照（snapshot），seek 时从最近的快照
+开始重新模拟，跳转到任意位置最多只需模拟 KEYFRAME_INTERVAL 帧。
+"""
+
+# 导入必要的模块
+import argparse, os, struct, time
+
+from snake_engine import SnakeEngine
+
+REPLAY_MAGIC = b"SNKR"
+REPLAY_VERSION = 1
+HEADER = struct.Struct("<4sBBHQ")  # 魔数、版本号、重置方式、棋盘边长、随机种子
+REPLAY_SUFFIX = ".snkr"
+
+# 重置方式（录像开始时调用的 SnakeEngine 重置方法）
+RESET_NORMAL, RESET_OPPONENT, RESET_THREE_SNAKE = range(3)
+RESET_METHODS = ("reset", "reset_opponent_mode", "reset_three_snake_mode")
+
+# 事件类型（对应的 SnakeEngine 方法见 EVENT_METHODS）
+EVENT_STEP, EVENT_STEP_OPPONENT_MODE, EVENT_OPPONENT_STEP, EVENT_RESPAWN, EVENT_STEP_THREE_SNAKE = range(5)
+EVENT_METHODS = ("step", "step_opponent_mode", "opponent_step", "respawn_opponent", "step_three_snake_mode")
+TICK_EVENTS = (EVENT_STEP, EVENT_STEP_OPPONENT_MODE, EVENT_STEP_THREE_SNAKE)  # 玩家蛇移动，每次开始新的一帧
+
+RUN_FLAG = 0x40            # 事件字节的游程标记
+KEYFRAME_INTERVAL = 256    # 回放时每隔多少帧保存一次快照
+
+
+# 编码一段连续相同的事件
+def _encode_run(symbol, count):
+    """返回 count 个 symbol 的编码：单个事件一个字节，两个以上为带 RUN_FLAG 的字节 + LEB128(count - 2)"""
+    if count == 1:
+        return bytes((symbol,))
+    out = bytearray((symbol | RUN_FLAG,))
+    n = count - 2
+    while n >= 0x80:
+        out.append(n & 0x7F | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+
+# 解析录像数据
+def decode_replay(data):
+    """
+    解析录像数据
+
+    参数:
+        data: 录像文件的全部字节
+
+    返回:
+        tuple: (kind, board_size, seed, events)，events 为 (event, action) 列表
+
+    数据格式不正确时抛出 ValueError
+    """
+    if len(data) < HEADER.size:
+        raise ValueError("录像数据不完整：缺少文件头")
+    magic, version, kind, board_size, seed = HEADER.unpack_from(data)
+    if magic != REPLAY_MAGIC:
+        raise ValueError("不是贪吃蛇录像文件")
+    if version != REPLAY_VERSION:
+        raise ValueError(f"不支持的录像版本: {version}")
+    if kind >= len(RESET_METHODS):
+        raise ValueError(f"未知的重置方式: {kind}")
+
+    events = []
+    i, size = HEADER.size, len(data)
+    while i < size:
+        symbol = data[i]
+        i += 1
+        count = 1
+        if symbol & RUN_FLAG:
+            n, shift = 0, 0
+            while True:
+                if i >= size:
+                    raise ValueError("录像数据不完整：游程长度被截断")
+                byte = data[i]
+                i += 1
+                n |= (byte & 0x7F) << shift
+                shift += 7
+                if not byte & 0x80:
+                    break
+            count = n + 2
+            symbol &= ~RUN_FLAG
+        event, action = symbol >> 3, (symbol & 7) - 1
+        if event >= len(EVENT_METHODS) or action > 3:
+            raise ValueError(f"录像数据损坏：无效的事件字节 {symbol:#04x}")
+        events.extend([(event, action)] * count)
+    return kind, board_size, seed, events
+
+
+# ---------------------------
+# 录制
+# ---------------------------
+class ReplayRecorder:
+    """
+    录像录制器：由 SnakeGame 在重置时创建，每次移动调用 record 记录一个事件，
+    对局结束时调用 save 写入文件。相同的连续事件合并为一个游程，内存占用与文件大小相同。
+    """
+
+    def __init__(self, kind, board_size, seed):
+        """
+        参数:
+            kind: 重置方式（RESET_*）
+            board_size: 棋盘边长（格子数）
+            seed: 重置时使用的随机种子
+        """
+        self.kind = kind
+        self.board_size = board_size
+        self.seed = seed
+        self.events = 0          # 已记录的事件数
+        self._data = bytearray(HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, kind, board_size, seed))
+        self._symbol = None      # 尚未写入的游程
+        self._count = 0
+
+    def record(self, event, action):
+        """
+        记录一个事件
+
+        参数:
+            event: 事件类型（EVENT_*）
+            action: -1（方向不变）或新的方向编号 0~3
+        """
+        symbol = event << 3 | (action + 1)
+        if symbol == self._symbol:
+            self._count += 1
+        else:
+            if self._symbol is not None:
+                self._data += _encode_run(self._symbol, self._count)
+            self._symbol, self._count = symbol, 1
+        self.events += 1
+
+    def to_bytes(self):
+        """返回到目前为止的完整录像数据（不影响后续录制）"""
+        if self._symbol is None:
+            return bytes(self._data)
+        return bytes(self._data) + _encode_run(self._symbol, self._count)
+
+    def save(self, replay_dir):
+        """
+        把录像写入 replay_dir/<时间>-<种子>.snkr（目录不存在时自动创建）
+
+        返回:
+            str: 文件路径
+        """
+        os.makedirs(replay_dir, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{self.seed}{REPLAY_SUFFIX}"
+        path = os.path.join(replay_dir, name)
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+        return path
+
+
+# ---------------------------
+# 回放
+# ---------------------------
+class ReplayPlayer:
+    """
+    录像回放器：在 engine 上按录像重新模拟对局，可逐帧前进或跳转到任意一帧。
+
+    一帧从一次玩家蛇移动开始，包含随后的对抗蛇移动和重新部署。
+    影子模式的快照不包含两条影子蛇，因此向后跳转时从头重新模拟。
+    """
+
+    def __init__(self, data_or_path, engine=None):
+        """
+        参数:
+            data_or_path: 录像数据（bytes）或录像文件路径
+            engine: 用于模拟的 SnakeEngine（可传入 SnakeGame 以便绘制），
+                    默认新建一个无界面引擎；棋盘边长须与录像一致
+        """
+        if isinstance(data_or_path, (bytes, bytearray)):
+            data = bytes(data_or_path)
+        else:
+            with open(data_or_path, "rb") as f:
+                data = f.read()
+        self.kind, self.board_size, self.seed, self._events = decode_replay(data)
+        self.size = len(data)  # 录像字节数
+
+        # 每帧第一个事件的下标，末尾追加事件总数作为哨兵
+        self._tick_starts = [i for i, (event, _) in enumerate(self._events)
+                             if event in TICK_EVENTS or i == 0]
+        self._tick_starts.append(len(self._events))
+
+        if engine is None:
+            engine = SnakeEngine(seed=self.seed, board_size=self.board_size)
+        elif engine.board_size != self.board_size:
+            raise ValueError(f"棋盘边长不一致：录像为 {self.board_size}，引擎为 {engine.board_size}")
+        self.engine = engine
+        self._keyframes = {}
+        self._rewind()
+
+    @property
+    def length(self):
+        """录像总帧数"""
+        return len(self._tick_starts) - 1
+
+    def _rewind(self):
+        """用录像的种子重置引擎，回到第 0 帧"""
+        getattr(self.engine, RESET_METHODS[self.kind])(seed=self.seed)
+        self.tick = 0
+        if self.kind != RESET_THREE_SNAKE:
+            self._keyframes[0] = self.engine.snapshot()
+
+    def step(self):
+        """
+        前进一帧
+
+        返回:
+            bool: 是否前进（已到录像末尾时返回 False）
+        """
+        if self.tick >= self.length:
+            return False
+        engine = self.engine
+        for event, action in self._events[self._tick_starts[self.tick]:self._tick_starts[self.tick + 1]]:
+            if event == EVENT_RESPAWN:
+                engine.respawn_opponent()
+            else:
+                getattr(engine, EVENT_METHODS[event])(action)
+        self.tick += 1
+        if (self.tick % KEYFRAME_INTERVAL == 0 and self.kind != RESET_THREE_SNAKE
+                and self.tick not in self._keyframes):
+            self._keyframes[self.tick] = engine.snapshot()
+        return True
+
+    def seek(self, tick):
+        """
+        跳转到第 tick 帧（自动限制在 0 ~ length 之间）：从不晚于目标的最近快照恢复后逐帧模拟
+        """
+        tick = max(0, min(tick, self.length))
+        if self.kind == RESET_THREE_SNAKE:
+            if tick < self.tick:
+                self._rewind()
+        else:
+            keyframe = tick - tick % KEYFRAME_INTERVAL
+            while keyframe not in self._keyframes:
+                keyframe -= KEYFRAME_INTERVAL
+            if tick < self.tick or keyframe > self.tick:
+                self.engine.restore(self._keyframes[keyframe])
+                self.tick = keyframe
+        while self.tick < tick:
+            self.step()
+
+
+# 命令行入口：无界面回放并打印摘要
+def main():
+    parser = argparse.ArgumentParser(description="无界面回放贪吃蛇录像")
+    parser.add_argument("path", help="录像文件路径（.snkr）")
+    parser.add_argument("--seek", type=int, default=None, help="跳转到指定帧并打印该帧的局面（默认回放到末尾）")
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    player = ReplayPlayer(args.path)
+    player.seek(player.length if args.seek is None else args.seek)
+    elapsed = time.perf_counter() - start_time
+
+    engine = player.engine
+    print(f"{args.path}: {RESET_METHODS[player.kind]}，棋盘 {player.board_size}，种子 {player.seed}")
+    print(f"共 {player.length} 帧，{player.size} 字节（每帧 {player.size / max(player.length, 1):.2f} 字节）")
+    print(f"第 {player.tick} 帧：得分 {engine.score}，蛇长 {len(engine.snake)}，蛇头 {engine.snake[0]}，"
+          f"食物 {engine.food}，方向 {engine.direction}")
+    if player.kind == RESET_OPPONENT:
+        print(f"对抗蛇：得分 {engine.opponent_score}，蛇长 {len(engine.opponent_snake)}，"
+              f"{'已死亡' if engine.opponent_dead else '存活'}")
+    if engine.death_reason:
+        print(f"死亡原因: {engine.death_reason}")
+    print(f"模拟用时 {elapsed * 1000:.1f} 毫秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+# 文件名: snake_rollout.py
+# 对抗模式的蒙特卡洛模拟 AI
+# 用法: from snake_rollout import get_rollout_ai_action, RolloutPlanner
+"""
+对抗蛇的蒙特卡洛模拟（rollout）策略：不依赖手工调节的奖励权重，
+而是对每个候选动作在局面副本上做许多次短模拟（每批复制一次，之后用快照恢复），
+两条蛇都按廉价的随机贪心策略走 ROLLOUT_DEPTH 步，选平均收益最高的动作。
+
+模拟在固定的时间预算内进行；指定 workers 时每一轮的模拟分给进程池并行执行，
+在同样的时间预算内完成的模拟次数随 CPU 核数增长，AI 随之变强。
+也可以改为指定每个候选动作的模拟次数，此时决策与机器速度无关，可以复现（用于自我对局）。
+"""
+
+# 导入必要的模块
+import pickle, random, time
+from multiprocessing import Pool, RawArray
+
+from snake_ai import (AI_DIFFICULTY_BUDGETS, ACTION_NAMES, DIRECTION_OFFSETS,
+                      get_ai_action)
+
+ROLLOUT_DEPTH = 20         # 每次模拟的步数
+ROLLOUT_BATCH = 8          # 每个候选动作每批的模拟次数
+GREEDY_PROB = 0.8          # 模拟策略选择离食物最近方向的概率
+REWARD_FOOD = 1.0          # 对抗蛇每吃到一个食物
+REWARD_PLAYER_FOOD = -0.5  # 玩家蛇每吃到一个食物
+REWARD_PLAYER_DEAD = 5.0   # 玩家蛇死亡
+REWARD_DEAD = -10.0        # 对抗蛇死亡
+SHARED_BUFFER_SIZE = 1 << 16  # 共享局面缓冲区的初始字节数（40×40 棋盘的局面约 15KB）
+
+
+# 模拟中使用的廉价策略
+def rollout_policy(engine, is_opponent, rng):
+    """在不反向、不越界、不撞蛇身的方向中，以 GREEDY_PROB 的概率选离食物最近的，否则随机选一个"""
+    n = engine.board_size
+    snake = engine.opponent_snake if is_opponent else engine.snake
+    current = ACTION_NAMES.index(engine.opponent_direction if is_opponent else engine.direction)
+    hr, hc = snake[0]
+    fr, fc = engine.food
+    occupancy = engine.occupancy
+
+    moves = []
+    for action, dr, dc in DIRECTION_OFFSETS:
+        r, c = hr + dr, hc + dc
+        if action != 3 - current and 0 <= r < n and 0 <= c < n and not occupancy[r * n + c]:
+            moves.append((abs(r - fr) + abs(c - fc), action))
+    if not moves:
+        return current
+    if rng.random() < GREEDY_PROB:
+        return min(moves)[1]
+    return rng.choice(moves)[1]
+
+
+# 从给定局面出发做一次模拟
+def rollout(sim, first_action, rng, depth=ROLLOUT_DEPTH):
+    """
+    直接在 sim 上模拟对抗模式（由调用方负责复制或恢复局面）：每步玩家蛇先走，
+    对抗蛇后走（与 main_opponent 相同），对抗蛇第一步走 first_action，之后两条蛇都按 rollout_policy 移动
+
+    返回:
+        float: 对抗蛇的收益
+    """
+    sim.rng.seed(rng.getrandbits(32))  # 每次模拟的食物位置各不相同
+    score, opponent_score = sim.score, sim.opponent_score
+    reward = 0.0
+    action = first_action
+    for _ in range(depth):
+        done, _ = sim.step_opponent_mode(rollout_policy(sim, False, rng))
+        if done:
+            reward += REWARD_PLAYER_DEAD
+            break
+        done, _ = sim.opponent_step(action)
+        if done:
+            reward += REWARD_DEAD
+            break
+        action = rollout_policy(sim, True, rng)
+    # 玩家蛇撞死对抗蛇时会得到额外奖励分，这里只按食物计分
+    reward += REWARD_FOOD * (sim.opponent_score - opponent_score) / 10
+    if not sim.opponent_dead:
+        reward += REWARD_PLAYER_FOOD * (sim.score - score) / 10
+    return reward
+
+
+# 一批模拟（进程池的任务函数，需要在模块顶层定义）
+def rollout_batch(args):
+    """
+    args 为 (engine, first_action, 次数, 种子)，返回 (first_action, 收益总和, 次数)
+
+    整批只复制一次局面，每次模拟前用快照恢复（O(蛇长)）
+    """
+    engine, first_action, count, seed = args
+    rng = random.Random(seed)
+    sim = engine.copy()
+    start = sim.snapshot()
+    total = 0.0
+    for _ in range(count):
+        sim.restore(start)
+        total += rollout(sim, first_action, rng)
+    return first_action, total, count
+
+
+# ---------------------------
+# 进程池工作进程
+# ---------------------------
+_shared_buffer = None          # 与主进程共享的局面缓冲区（由 _init_worker 设置）
+_shared_engine = (None, None)  # 已反序列化的 (局面代号, 局面)
+
+
+# 工作进程初始化
+def _init_worker(buffer):
+    """保存共享缓冲区（RawArray）；之后每次决策的局面都写在其中，不再随任务传递"""
+    global _shared_buffer
+    _shared_buffer = buffer
+
+
+# 读取共享局面后做一批模拟（进程池的任务函数）
+def _shared_rollout_batch(args):
+    """args 为 (局面代号, 局面的字节数, first_action, 次数, 种子)；同一代号的局面在每个工作进程中只反序列化一次"""
+    global _shared_engine
+    generation, size, first_action, count, seed = args
+    if _shared_engine[0] != generation:
+        _shared_engine = (generation, pickle.loads(_shared_buffer[:size]))
+    return rollout_batch((_shared_engine[1], first_action, count, seed))
+
+
+# ---------------------------
+# 模拟规划器
+# ---------------------------
+class RolloutPlanner:
+    """
+    对抗蛇的蒙特卡洛模拟规划器
+
+    每一轮为每个候选动作提交若干批（每批 ROLLOUT_BATCH 次）模拟：单进程时一批，
+    workers > 0 时 workers 批，保证所有工作进程都有任务。第一轮总会完成，之后按上一轮的
+    实测耗时判断，来不及在时间预算内完成的一轮不再开始。
+
+    使用进程池时，每次决策的局面只序列化一次，写入与工作进程共享的缓冲区
+    （局面超出缓冲区大小时按新的大小重建进程池）。
+
+    模拟的随机种子每次决策从 rng（默认 game.ai_rng）取一次，规划器本身不保存随机状态，
+    因此可以在多局之间共用，每局的决策只由该局的种子决定。
+    """
+
+    def __init__(self, workers=0):
+        """
+        参数:
+            workers: 进程数，0 表示在当前线程中执行
+        """
+        self.workers = workers
+        self._pool = None
+        self._buffer = None     # 与工作进程共享的局面缓冲区
+        self._generation = 0    # 共享缓冲区中局面的代号
+        self.last_rollouts = 0  # 上一次决策完成的模拟次数
+        if workers > 0:
+            self._start_pool(SHARED_BUFFER_SIZE)
+
+    def _start_pool(self, size):
+        """创建进程池和 size 字节的共享缓冲区"""
+        self._buffer = RawArray('c', size)
+        self._pool = Pool(self.workers, initializer=_init_worker, initargs=(self._buffer,))
+
+    def _share(self, engine):
+        """把局面写入共享缓冲区，返回任务中引用它的 (代号, 字节数)"""
+        data = pickle.dumps(engine, pickle.HIGHEST_PROTOCOL)
+        if self._buffer is None or len(data) > len(self._buffer):
+            self.close()
+            self._start_pool(2 * len(data))
+        self._buffer[:len(data)] = data
+        self._generation += 1
+        return self._generation, len(data)
+
+    def plan(self, game, budget, rng=None, rollouts=None):
+        """
+        为对抗蛇选择动作
+
+        参数:
+            game: 对抗模式的游戏状态（SnakeEngine 或 SnakeGame）
+            budget: 时间预算（秒）
+            rng: 提供模拟种子的随机数生成器，默认为 game.ai_rng
+            rollouts: 每个候选动作至少完成的模拟次数；指定时不看时间预算，
+                      在进程数相同时结果可以复现
+
+        返回:
+            int: 动作编号；没有不会立即死亡的动作时返回 None
+        """
+        deadline = time.perf_counter() + budget
+        n = game.board_size
+        hr, hc = game.opponent_snake[0]
+        current = ACTION_NAMES.index(game.opponent_direction)
+        candidates = [action for action, dr, dc in DIRECTION_OFFSETS
+                      if action != 3 - current and 0 <= hr + dr < n and 0 <= hc + dc < n
+                      and not game.occupancy[(hr + dr) * n + hc + dc]]
+        if len(candidates) <= 1:
+            return candidates[0] if candidates else None
+
+        seeds = random.Random((rng or game.ai_rng).getrandbits(32))
+        engine = game.copy()
+        shared = self._share(engine) if self.workers > 0 else None
+        chunks = max(1, self.workers)
+        totals = dict.fromkeys(candidates, 0.0)
+        counts = dict.fromkeys(candidates, 0)
+        while True:
+            start = time.perf_counter()
+            tasks = [(action, ROLLOUT_BATCH, seeds.getrandbits(32)) for action in candidates for _ in range(chunks)]
+            if self.workers > 0:
+                results = self._pool.map(_shared_rollout_batch, [shared + task for task in tasks], chunksize=1)
+            else:
+                results = map(rollout_batch, [(engine,) + task for task in tasks])
+            for action, total, count in results:
+                totals[action] += total
+                counts[action] += count
+            if rollouts is not None:
+                if min(counts.values()) >= rollouts:
+                    break
+                continue
+            now = time.perf_counter()
+            if now + (now - start) > deadline:
+                break
+
+        self.last_rollouts = sum(counts.values())
+        return max(candidates, key=lambda a: totals[a] / counts[a])
+
+    def close(self):
+        """关闭进程池（之后再决策时重新创建）"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+            self._buffer = None
+
+
+_default_planner = None
+
+
+# 蒙特卡洛模拟 AI 模式
+def get_rollout_ai_action(game, is_opponent=False, rng=None, budget=None, planner=None, rollouts=None):
+    """
+    蒙特卡洛模拟 AI 模式，参数与 get_ai_action 相同：
+
+    控制对抗蛇时用 RolloutPlanner 在时间预算内做模拟；控制玩家蛇、
+    或对抗蛇没有安全动作时退回 get_ai_action 的搜索策略。
+
+    参数:
+        budget: 时间预算（秒），默认按 game.ai_difficulty 查 AI_DIFFICULTY_BUDGETS
+        planner: 使用的 RolloutPlanner，默认为模块内共享的单进程规划器（不保存随机状态，各局互不影响）
+        rollouts: 每个候选动作的模拟次数，指定时代替时间预算（见 RolloutPlanner.plan）
+    """
+    global _default_planner
+    if not is_opponent:
+        return get_ai_action(game, is_opponent, rng)
+    if budget is None:
+        budget = AI_DIFFICULTY_BUDGETS.get(getattr(game, 'ai_difficulty', 'medium'),
+                                           AI_DIFFICULTY_BUDGETS['medium'])
+    if planner is None:
+        if _default_planner is None:
+            _default_planner = RolloutPlanner()
+        planner = _default_planner
+    action = planner.plan(game, budget, rng, rollouts)
+    if action is None:
+        return get_ai_action(game, is_opponent, rng)
+    return action